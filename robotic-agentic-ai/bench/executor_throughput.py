@@ -0,0 +1,182 @@
+"""
+Executor throughput against dummy bridges.
+
+Run from robotic-agentic-ai/:
+    python -m bench.executor_throughput --plans 50 --steps 6 --bridges 4 \
+        --exec-time 0 --out bench_executor.json
+
+Starts a throwaway redis-server (or uses --redis-url), runs N dummy bridges
+(or N reference-bridge workers) in threads and drives M concurrent plans through the executor. Reports
+throughput, per-step dispatch overhead and retry amplification as JSON.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import redis
+
+from bench.local_redis import local_redis
+from bridge.reference_bridge import ReferenceBridge, SampledHandler, parse_exec_time
+
+PLAN_TEMPLATE = [
+    {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}},
+    {"skill_name": "pour_liquid", "arguments": {"source_id": "tube_1", "target_id": "beaker_2"}},
+    {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}},
+    {"skill_name": "grasp_container", "arguments": {"container_id": "beaker_2"}},
+    {"skill_name": "rotate_container", "arguments": {"container_id": "beaker_2"}},
+    {"skill_name": "release_container", "arguments": {"container_id": "beaker_2"}},
+    {"skill_name": "verify_color", "arguments": {"color": "blue", "container_id": "beaker_2"}},
+]
+
+
+def make_plan(steps: int) -> list[dict]:
+    return [PLAN_TEMPLATE[i % len(PLAN_TEMPLATE)] for i in range(steps)]
+
+
+def ensure_groups(client: redis.Redis):
+    for stream, group in (("robot.tasks", "ros_bridge"), ("robot.events", "langgraph")):
+        try:
+            client.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    # Imported here so the bench's REDIS_URL is set before anything connects.
+    import telemetry
+    from executor.async_graph import execute_plans
+    from executor.graph import build_executor, run_config
+    from executor.state import new_exec_state
+    from executor.test import DummyBridge
+
+    client = redis.Redis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+    ensure_groups(client)
+    tasks_before = client.xlen("robot.tasks")
+
+    stop = threading.Event()
+    if args.bridge == "reference":
+        reference = ReferenceBridge(
+            workers=args.bridges,
+            handler=SampledHandler(args.exec_time, args.fail_prob),
+            url=os.environ["REDIS_URL"],
+        )
+        bridges, threads = [], []
+        reference.start()
+    else:
+        reference = None
+        exec_time = parse_exec_time(args.exec_time)
+        bridges = [
+            DummyBridge(
+                redis.Redis.from_url(os.environ["REDIS_URL"]),
+                consumer=f"bench_bridge_{i}",
+                exec_time=exec_time,
+                fail_probability=args.fail_prob,
+                verbose=False,
+            )
+            for i in range(args.bridges)
+        ]
+        threads = [
+            threading.Thread(target=b.run, args=(stop, 100), daemon=True) for b in bridges
+        ]
+        for t in threads:
+            t.start()
+
+    plans = [make_plan(args.steps) for _ in range(args.plans)]
+    out = io.StringIO() if args.quiet else None
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+        if args.mode == "async":
+            results = execute_plans(plans, args.window)
+        else:
+            executor = build_executor()
+            with ThreadPoolExecutor(max_workers=args.plans) as pool:
+                results = list(
+                    pool.map(
+                        lambda p: executor.invoke(
+                            new_exec_state(p, window=args.window), run_config(len(p))
+                        ),
+                        plans,
+                    )
+                )
+    wall = time.perf_counter() - start
+
+    stop.set()
+    for t in threads:
+        t.join()
+    if reference is not None:
+        reference.stop()
+
+    tasks_sent = client.xlen("robot.tasks") - tasks_before
+    steps_done = sum(r["step"] for r in results)
+    succeeded = sum(1 for r in results if r.get("outcome") == "SUCCESS")
+
+    snapshot = telemetry.snapshot()
+
+    def mean(metric, name):
+        entries = [e for e in snapshot if e["metric"] == metric and e["name"] == name]
+        count = sum(e["count"] for e in entries)
+        return sum(e["mean"] * e["count"] for e in entries) / count if count else 0.0
+
+    return {
+        "revision": git_revision(),
+        "config": vars(args),
+        "wall_s": wall,
+        "plans_succeeded": succeeded,
+        "plans_per_s": len(plans) / wall,
+        "steps_per_s": steps_done / wall,
+        "tasks_sent": tasks_sent,
+        "tasks_executed": sum(b.executed for b in bridges) if bridges else None,
+        "retry_amplification": tasks_sent / steps_done if steps_done else None,
+        "dispatch_overhead_mean_s": {
+            "xadd": mean("span", "redis.xadd"),
+            "queue": mean("task_phase", "queue"),
+            "deliver": mean("task_phase", "deliver"),
+        },
+        "telemetry": snapshot,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=len(PLAN_TEMPLATE))
+    parser.add_argument("--bridges", type=int, default=2)
+    parser.add_argument("--bridge", choices=["dummy", "reference"], default="dummy")
+    parser.add_argument("--exec-time", default="0")
+    parser.add_argument("--fail-prob", type=float, default=0.0)
+    parser.add_argument("--window", type=int, default=1)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--verbose", dest="quiet", action="store_false")
+    args = parser.parse_args()
+
+    with local_redis(args.redis_url) as url:
+        os.environ["REDIS_URL"] = url
+        report = run(args)
+
+    summary = {k: v for k, v in report.items() if k != "telemetry"}
+    print(json.dumps(summary, indent=2))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Import-time budget for the fast CLI paths.
+
+Run from robotic-agentic-ai/ (exits 1 when over budget, e.g. in CI):
+    python -m bench.import_budget --out import_budget.json
+
+Each check runs a fresh `python -X importtime` and sums the cumulative
+import time of the modules it imported, leaving out the interpreter's own
+startup (site and whatever .pth files it loads). It also fails when a path
+imports one of the heavy modules it is supposed to avoid.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# One small step that is valid against planner/world_state.json.
+SAMPLE_PLAN = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}]
+
+# Heavy dependencies that none of the checked paths may pull in.
+HEAVY_MODULES = ("langgraph", "langchain_core", "langchain_ollama", "ollama", "httpx", "redis")
+
+# name -> (python -c code, stdin, import budget in ms)
+CHECKS = {
+    "cli": ("import cli", None, 25),
+    "validate": ("import cli, sys; sys.exit(cli.main(['validate', '-']))", SAMPLE_PLAN, 150),
+}
+
+
+def import_times(code: str, stdin=None) -> tuple[list[tuple[str, int, float]], int]:
+    """(module, nesting depth, cumulative ms) per import, and the exit code of `code`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        input=json.dumps(stdin) if stdin is not None else None,
+        capture_output=True,
+        text=True,
+    )
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(cumulative) / 1000))
+    # Lines are printed as imports finish, so everything up to and
+    # including site belongs to interpreter startup.
+    names = [name for name, _, _ in imports]
+    if "site" in names:
+        imports = imports[names.index("site") + 1 :]
+    return imports, proc.returncode
+
+
+def run_check(code: str, stdin, budget_ms: float) -> dict:
+    imports, returncode = import_times(code, stdin)
+    top = [(name, ms) for name, depth, ms in imports if depth == 0]
+    total = sum(ms for _, ms in top)
+    heavy = sorted({name for name, _, _ in imports if name in HEAVY_MODULES})
+    return {
+        "import_ms": round(total, 1),
+        "budget_ms": budget_ms,
+        "heavy_modules": heavy,
+        "exit_code": returncode,
+        "slowest": {name: round(ms, 1) for name, ms in sorted(top, key=lambda t: -t[1])[:5]},
+        "ok": returncode == 0 and total <= budget_ms and not heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    report = {
+        name: run_check(code, stdin, budget * args.scale)
+        for name, (code, stdin, budget) in CHECKS.items()
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [name for name, result in report.items() if not result["ok"]]
+    if failed:
+        print(f"Over budget: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
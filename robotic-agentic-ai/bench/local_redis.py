@@ -0,0 +1,53 @@
+import shutil
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import redis
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_redis(url: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield a Redis URL for benchmarking.
+
+    With `url`, that server is used as-is. Otherwise a throwaway
+    redis-server without persistence is started on a free port.
+    """
+    if url:
+        yield url
+        return
+
+    binary = shutil.which("redis-server")
+    if binary is None:
+        raise RuntimeError("redis-server not found on PATH; pass --redis-url instead")
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [binary, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    try:
+        client = redis.Redis.from_url(url)
+        for _ in range(100):
+            try:
+                client.ping()
+                break
+            except redis.ConnectionError:
+                time.sleep(0.05)
+        else:
+            raise RuntimeError("local redis-server did not come up")
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
@@ -0,0 +1,105 @@
+"""
+Time-to-first-token with and without KV prefix reuse.
+
+Run from robotic-agentic-ai/:
+    python -m bench.prompt_prefix --rounds 5 --out prefix.json
+
+"stable_prefix" sends the byte-stable rules+catalog first and the
+per-request world state and task last. "task_first" sends the same
+messages with the task line put in front of everything, so consecutive
+requests differ from the first token and no prefix can be reused.
+
+Each layout runs as its own block, after one unmeasured warm-up request,
+so one layout's requests never evict or warm the other's cache.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from planner.planner import Planner
+from planner.prompt import build_request_suffix
+
+TASKS = [
+    "pick and place the tube_1 from ground and place it on a table",
+    "pour the blue tube into the empty beaker",
+    "stir the yellow tube",
+    "Create green color",
+]
+
+
+def time_to_first_token(planner: Planner, messages) -> float:
+    start = time.perf_counter()
+    for _ in planner.model.stream(messages):
+        break
+    return time.perf_counter() - start
+
+
+def stable_prefix_messages(planner: Planner, task: str, world_state: dict):
+    return planner._messages(task, world_state)
+
+
+def task_first_messages(planner: Planner, task: str, world_state: dict):
+    # Tasks cycle, so neighbouring requests never start with the same text.
+    suffix = build_request_suffix(json.dumps(world_state, indent=0), task)
+    return [
+        SystemMessage(content=f"TASK:\n{task}\n\n---\n\n{planner.static_prefix()}"),
+        HumanMessage(content=suffix),
+    ]
+
+
+LAYOUTS = {
+    "stable_prefix": stable_prefix_messages,
+    "task_first": task_first_messages,
+}
+
+
+def run_layouts(planner: Planner, world_state: dict, rounds: int) -> dict[str, list[float]]:
+    """Time-to-first-token samples per layout, one layout after the other."""
+    results: dict[str, list[float]] = {}
+    for layout, messages in LAYOUTS.items():
+        # Not measured: loads the model and leaves this layout's prompt cached.
+        time_to_first_token(planner, messages(planner, TASKS[-1], world_state))
+        results[layout] = [
+            time_to_first_token(planner, messages(planner, task, world_state))
+            for _ in range(rounds)
+            for task in TASKS
+        ]
+    return results
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "p50_s": ordered[len(ordered) // 2],
+        "max_s": ordered[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--world-state", default="planner/world_state.json")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    with open(args.world_state) as f:
+        world_state = json.load(f)
+
+    planner = Planner(cache=None)
+    results = run_layouts(planner, world_state, args.rounds)
+    report = {layout: summarize(samples) for layout, samples in results.items()}
+    print(json.dumps(report, indent=2))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Reference robot bridge: a pool of workers in the ros_bridge consumer group.
+
+Run from robotic-agentic-ai/:
+    python -m bridge.reference_bridge --workers 8 --exec-time uniform:0.5:2
+
+Each worker reads robot.tasks in batches, reclaims entries left pending by
+crashed consumers with XAUTOCLAIM, and publishes every result with one
+pipelined XACK + XADD. Steps of the same plan are kept in seq order across
+workers through the plan progress set. With --robot-id the bridge serves
+that robot's own streams (robot.tasks.<id>, robot.events.<id>) and keeps
+its capabilities registered for the fleet scheduler. Swap `handler` for real ROS 2 action
+calls to turn this into the production bridge; with the sampled handler it
+doubles as a load generator.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+import redis
+
+from executor import codec
+from fleet.registry import HEARTBEAT_EVERY_SEC, RobotInfo, RobotRegistry
+from redis_config import REDIS_URL, get_client
+
+
+TASK_STREAM = "robot.tasks"
+EVENT_STREAM = "robot.events"
+CONTROL_STREAM = "robot.control"
+PROGRESS_KEY = "robot.plan_progress"
+TASK_GROUP = "ros_bridge"
+STREAM_MAXLEN = int(os.environ.get("ROBOT_STREAM_MAXLEN", "100000"))
+
+BATCH = 16
+BLOCK_MS = 1000
+# Pending entries idle this long belong to a dead consumer and are reclaimed.
+# A live worker touches every entry it holds (running, waiting for its turn
+# or still queued in its batch) every CLAIM_EVERY_SEC, however long the
+# motion in front of them takes, so only a dead worker's entries go idle.
+CLAIM_IDLE_MS = 60_000
+CLAIM_EVERY_SEC = 5
+# How long a worker waits for the previous step of the same plan.
+ORDER_TIMEOUT_SEC = 120
+ORDER_POLL_SEC = 0.02
+
+# handler(skill, params) -> (success, reason)
+Handler = Callable[[str, dict], tuple[bool, Optional[str]]]
+
+
+def task_stream(robot_id: Optional[str] = None) -> str:
+    return f"{TASK_STREAM}.{robot_id}" if robot_id else TASK_STREAM
+
+
+def event_stream(robot_id: Optional[str] = None) -> str:
+    return f"{EVENT_STREAM}.{robot_id}" if robot_id else EVENT_STREAM
+
+
+def parse_exec_time(spec: str) -> Callable[[str], float]:
+    """
+    "0.05"                  fixed seconds
+    "uniform:LOW:HIGH"      uniform in [LOW, HIGH]
+    "trace:FILE.jsonl"      resample per skill from a telemetry trace
+    """
+    kind, _, rest = spec.partition(":")
+    if kind == "uniform":
+        low, high = (float(x) for x in rest.split(":"))
+        return lambda skill: random.uniform(low, high)
+    if kind == "trace":
+        samples: dict[str, list[float]] = {}
+        with open(rest) as f:
+            for line in f:
+                rec = json.loads(line)
+                if rec.get("metric") == "task_phase" and rec.get("name") == "execute":
+                    samples.setdefault(rec["skill"], []).append(rec["seconds"])
+        pooled = [s for values in samples.values() for s in values] or [0.0]
+        return lambda skill: random.choice(samples.get(skill) or pooled)
+    fixed = float(spec)
+    return lambda skill: fixed
+
+
+class SampledHandler:
+    """Load-generator handler: sleeps a sampled time and fails at random."""
+
+    def __init__(self, exec_time: str = "0", fail_probability: float = 0.0):
+        self.exec_time_spec = exec_time
+        self.fail_probability = fail_probability
+        self._exec_time = parse_exec_time(exec_time)
+
+    def __getstate__(self):
+        return {"exec_time": self.exec_time_spec, "fail_probability": self.fail_probability}
+
+    def __setstate__(self, state):
+        self.__init__(state["exec_time"], state["fail_probability"])
+
+    def __call__(self, skill: str, params: dict) -> tuple[bool, Optional[str]]:
+        time.sleep(self._exec_time(skill))
+        if skill == "fail":
+            return False, "FORCED_FAILURE"
+        if random.random() < self.fail_probability:
+            return False, "SIMULATED_FAILURE"
+        return True, None
+
+
+class BridgeWorker:
+    def __init__(
+        self,
+        client: redis.Redis,
+        consumer: str,
+        handler: Handler,
+        verbose: bool = False,
+        robot_id: Optional[str] = None,
+    ):
+        self.r = client
+        self.consumer = consumer
+        self.task_stream = task_stream(robot_id)
+        self.event_stream = event_stream(robot_id)
+        self.handler = handler
+        self.verbose = verbose
+        self.executed = 0
+        self.reclaimed = 0
+        self.min_epoch: dict[str, int] = {}
+        # Entries read or claimed by this worker and not yet acknowledged.
+        self._held: set = set()
+        self._held_lock = threading.Lock()
+        latest = self.r.xrevrange(CONTROL_STREAM, count=1)
+        self._control_id = latest[0][0] if latest else "0-0"
+
+    def log(self, msg: str):
+        if self.verbose:
+            print(f"[BRIDGE {self.consumer}] {msg}")
+
+    def poll_control(self):
+        messages = self.r.xread({CONTROL_STREAM: self._control_id}, count=100)
+        for _, entries in messages or []:
+            for msg_id, fields in entries:
+                self._control_id = msg_id
+                try:
+                    msg = codec.decode(fields)
+                except ValueError as e:
+                    print(f"[BRIDGE {self.consumer}] Skipping malformed control {msg_id!r}: {e}")
+                    continue
+                if msg.get("type") == "cancel":
+                    plan_id = msg["plan_id"]
+                    self.min_epoch[plan_id] = max(
+                        self.min_epoch.get(plan_id, 0), int(msg["epoch"])
+                    )
+
+    def is_cancelled(self, task: dict) -> bool:
+        plan_id = task.get("plan_id")
+        if not plan_id:
+            return False
+        return int(task.get("epoch", 0)) < self.min_epoch.get(plan_id, 0)
+
+    def wait_for_turn(self, task: dict) -> Optional[str]:
+        """None when the task may run, else the reason it must not."""
+        plan_id = task.get("plan_id")
+        if not plan_id or task.get("seq") in (None, ""):
+            return None
+
+        seq = int(task["seq"])
+        deadline = time.monotonic() + ORDER_TIMEOUT_SEC
+        while True:
+            self.poll_control()
+            if self.is_cancelled(task):
+                return "CANCELLED"
+            done = self.r.zscore(PROGRESS_KEY, plan_id)
+            if done is None or int(done) >= seq - 1:
+                return None
+            if time.monotonic() > deadline:
+                return "ORDER_TIMEOUT"
+            time.sleep(ORDER_POLL_SEC)
+
+    def decode_task(self, msg_id, fields) -> Optional[dict]:
+        """
+        Task of a stream entry, or None for a malformed one. Those are
+        acknowledged and dropped so they are not re-delivered forever.
+        """
+        try:
+            return codec.decode(fields)
+        except ValueError as e:
+            print(f"[BRIDGE {self.consumer}] Dropping malformed task {msg_id!r}: {e}")
+        self.r.xack(self.task_stream, TASK_GROUP, msg_id)
+        with self._held_lock:
+            self._held.discard(msg_id)
+        return None
+
+    def hold(self, entries):
+        with self._held_lock:
+            self._held.update(msg_id for msg_id, _ in entries)
+
+    def touch(self):
+        """Reset the idle time of held entries so no other worker reclaims them."""
+        with self._held_lock:
+            held = list(self._held)
+        if held:
+            self.r.xclaim(self.task_stream, TASK_GROUP, self.consumer, 0, held, justid=True)
+
+    def _keep_alive(self, stop: threading.Event):
+        while not stop.wait(CLAIM_EVERY_SEC):
+            try:
+                self.touch()
+            except redis.RedisError as e:
+                print(f"[BRIDGE {self.consumer}] Could not touch pending tasks: {e}")
+
+    def publish(self, msg_id: str, task: dict, status: str, reason: Optional[str], started_ms=None):
+        pipe = self.r.pipeline(transaction=True)
+        pipe.xack(self.task_stream, TASK_GROUP, msg_id)
+        event = {"task_id": task["task_id"], "status": status, "reason": reason or ""}
+        if started_ms is not None:
+            event["started_ms"] = started_ms
+        if status == "SUCCESS":
+            # Lets the world-state follower apply the skill's effects.
+            event["skill"] = task.get("skill")
+            event["params"] = task.get("params") or {}
+        pipe.xadd(
+            self.event_stream,
+            codec.encode(self.event_stream, event),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+
+        plan_id = task.get("plan_id")
+        if plan_id and task.get("seq") not in (None, ""):
+            if status == "SUCCESS":
+                pipe.zadd(PROGRESS_KEY, {plan_id: int(task["seq"])}, gt=True)
+            elif status == "FAILED":
+                # Stop every worker from running the rest of this epoch.
+                cancel = {"type": "cancel", "plan_id": plan_id, "epoch": int(task.get("epoch", 0)) + 1}
+                pipe.xadd(
+                    CONTROL_STREAM,
+                    codec.encode(CONTROL_STREAM, cancel),
+                    maxlen=STREAM_MAXLEN,
+                    approximate=True,
+                )
+        pipe.execute()
+        with self._held_lock:
+            self._held.discard(msg_id)
+        self.log(f"Task {task['task_id']} -> {status}")
+
+    def handle(self, msg_id: str, task: dict):
+        blocked = self.wait_for_turn(task)
+        if blocked is not None:
+            status = "CANCELLED" if blocked == "CANCELLED" else "FAILED"
+            self.publish(msg_id, task, status, blocked)
+            return
+
+        started_ms = int(time.time() * 1000)
+        try:
+            success, reason = self.handler(task["skill"], task["params"])
+        except Exception as e:
+            success, reason = False, f"BRIDGE_ERROR: {e}"
+        self.executed += 1
+        self.publish(msg_id, task, "SUCCESS" if success else "FAILED", reason, started_ms)
+
+    def reclaim(self):
+        start = "0-0"
+        while True:
+            result = self.r.xautoclaim(
+                self.task_stream,
+                TASK_GROUP,
+                self.consumer,
+                CLAIM_IDLE_MS,
+                start_id=start,
+                count=BATCH,
+            )
+            start, entries = result[0], result[1]
+            self.hold(entries)
+            for msg_id, fields in entries:
+                if not fields:
+                    # Entry was trimmed from the stream; just drop it.
+                    self.r.xack(self.task_stream, TASK_GROUP, msg_id)
+                    with self._held_lock:
+                        self._held.discard(msg_id)
+                    continue
+                task = self.decode_task(msg_id, fields)
+                if task is None:
+                    continue
+                self.reclaimed += 1
+                self.log(f"Reclaimed stale task {task.get('task_id')}")
+                self.handle(msg_id, task)
+            if start in ("0-0", b"0-0"):
+                return
+
+    def run(self, stop: Optional[threading.Event] = None):
+        self.log("Started")
+        next_claim = 0.0
+        stopped = threading.Event()
+        threading.Thread(
+            target=self._keep_alive, args=(stopped,), name=f"{self.consumer}-keepalive", daemon=True
+        ).start()
+
+        try:
+            while stop is None or not stop.is_set():
+                if time.monotonic() >= next_claim:
+                    self.reclaim()
+                    next_claim = time.monotonic() + CLAIM_EVERY_SEC
+
+                messages = self.r.xreadgroup(
+                    TASK_GROUP, self.consumer, {self.task_stream: ">"}, count=BATCH, block=BLOCK_MS
+                )
+                for _, entries in messages or []:
+                    self.hold(entries)
+                    self.poll_control()
+                    for msg_id, fields in entries:
+                        task = self.decode_task(msg_id, fields)
+                        if task is None:
+                            continue
+                        if self.is_cancelled(task):
+                            self.publish(msg_id, task, "CANCELLED", "CANCELLED")
+                            continue
+                        self.handle(msg_id, task)
+        finally:
+            stopped.set()
+
+
+def ensure_group(client: redis.Redis, stream: str = TASK_STREAM):
+    try:
+        client.xgroup_create(stream, TASK_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def consumer_name(index: int) -> str:
+    return f"bridge-{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+def _worker_main(
+    url: str, index: int, handler: Handler, verbose: bool, stop=None, robot_id=None
+):
+    client = get_client(url=url)
+    BridgeWorker(client, consumer_name(index), handler, verbose, robot_id).run(stop)
+
+
+class ReferenceBridge:
+    """Pool of BridgeWorkers, as threads or as separate processes."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        handler: Optional[Handler] = None,
+        url: str = REDIS_URL,
+        use_processes: bool = False,
+        verbose: bool = False,
+        robot_id: Optional[str] = None,
+        skills: Optional[list[str]] = None,
+        workspaces: Optional[list[str]] = None,
+        slots: int = 1,
+    ):
+        self.workers = workers
+        self.handler = handler or SampledHandler()
+        self.url = url
+        self.use_processes = use_processes
+        self.verbose = verbose
+        # Workers only parallelise the bridge's I/O; how many plans the
+        # robot itself can run at once is a separate, physical limit.
+        self.robot = RobotInfo(robot_id, skills, workspaces, slots) if robot_id else None
+        self._stop = multiprocessing.Event() if use_processes else threading.Event()
+        self._runners: list = []
+
+    def _heartbeat(self):
+        registry = RobotRegistry(get_client(url=self.url))
+        registry.register(self.robot)
+        while not self._stop.wait(HEARTBEAT_EVERY_SEC):
+            registry.heartbeat(self.robot.robot_id)
+        registry.deregister(self.robot.robot_id)
+
+    def start(self):
+        robot_id = self.robot.robot_id if self.robot else None
+        ensure_group(get_client(url=self.url), task_stream(robot_id))
+        for i in range(self.workers):
+            args = (self.url, i, self.handler, self.verbose, self._stop, robot_id)
+            if self.use_processes:
+                runner = multiprocessing.Process(target=_worker_main, args=args, daemon=True)
+            else:
+                runner = threading.Thread(target=_worker_main, args=args, daemon=True)
+            runner.start()
+            self._runners.append(runner)
+        if self.robot is not None:
+            runner = threading.Thread(target=self._heartbeat, daemon=True)
+            runner.start()
+            self._runners.append(runner)
+        print(
+            f"[BRIDGE] {self.workers} worker {'processes' if self.use_processes else 'threads'} started"
+        )
+
+    def stop(self):
+        self._stop.set()
+        for runner in self._runners:
+            runner.join()
+        self._runners = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference multi-worker robot bridge")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--processes", action="store_true")
+    parser.add_argument("--exec-time", default="2")
+    parser.add_argument("--fail-prob", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--robot-id", default=None, help="serve this robot's own streams")
+    parser.add_argument("--skills", default=None, help="comma-separated; default any")
+    parser.add_argument("--workspaces", default=None, help="comma-separated; default any")
+    parser.add_argument(
+        "--slots", type=int, default=1, help="plans the robot can safely run at once"
+    )
+    args = parser.parse_args()
+
+    bridge = ReferenceBridge(
+        workers=args.workers,
+        handler=SampledHandler(args.exec_time, args.fail_prob),
+        use_processes=args.processes,
+        verbose=args.verbose,
+        robot_id=args.robot_id,
+        skills=args.skills.split(",") if args.skills else None,
+        workspaces=args.workspaces.split(",") if args.workspaces else None,
+        slots=args.slots,
+    )
+    bridge.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        bridge.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Command-line entry points for single jobs.
+
+Each subcommand imports its own dependencies, so validating a plan loads
+the skill catalog and nothing else: no model client, no graph and no
+Redis connection. Redis clients come from redis_config.get_client() and
+are opened on first use.
+
+Run from robotic-agentic-ai/:
+    python cli.py validate plan.json
+    python cli.py plan "pick and place tube_1" --out plan.json
+    python cli.py execute plan.json --window 4
+    python cli.py replay robot.tasks --target scratch.tasks --since 2024-05-01T12:00
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional
+
+WORLD_STATE_PATH = "planner/world_state.json"
+
+
+def read_json(path: str):
+    """JSON from `path`, or from stdin for "-"."""
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_plan(path: str) -> list:
+    """Plan from `path`; ValueError unless it is a JSON list of step objects."""
+    plan = read_json(path)
+    if not isinstance(plan, list):
+        raise ValueError(f"Plan must be a JSON list of steps, got {type(plan).__name__}")
+    for step_idx, step in enumerate(plan):
+        if not isinstance(step, dict):
+            raise ValueError(f"[Step {step_idx}] Step must be an object")
+    return plan
+
+
+def world_state(args: argparse.Namespace) -> dict:
+    if args.live_world:
+        from world.store import load_world_state
+
+        return load_world_state(live=True, path=args.world)
+    return read_json(args.world)
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    from verifier.skill_validator import check_skills_validity
+
+    try:
+        plan = read_plan(args.plan)
+        check_skills_validity(plan, world_state(args))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"[VALIDATE] {len(plan)} steps OK")
+    return 0
+
+
+def cmd_plan(args: argparse.Namespace) -> int:
+    from planner.planner import Planner, get_planner
+    from verifier.skill_validator import check_skills_validity
+
+    world = world_state(args)
+    planner = Planner(hedge=True) if args.hedge else get_planner()
+    try:
+        plan = planner.plan(args.task, world, use_cache=not args.no_cache)
+        if plan:
+            check_skills_validity(plan, world)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not plan:
+        print("[PLANNER] Task is infeasible", file=sys.stderr)
+        return 1
+
+    text = json.dumps(plan, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def cmd_execute(args: argparse.Namespace) -> int:
+    from executor.checkpoint import RedisCheckpointSaver
+    from executor.graph import build_executor, run_config
+    from executor.redis_io import dispatcher
+    from executor.state import new_exec_state
+    from verifier.skill_validator import check_skills_validity
+
+    world = world_state(args)
+    try:
+        plan = read_plan(args.plan)
+        check_skills_validity(plan, world)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    # Repair needs the planner, so it is only loaded when a task is given.
+    repairer = None
+    if args.task:
+        from planner.planner import repair_plan
+
+        repairer = repair_plan
+
+    checkpointer = RedisCheckpointSaver() if args.checkpoint else None
+    state = new_exec_state(
+        plan,
+        args.plan_id,
+        window=args.window,
+        robot_id=args.robot_id,
+        task=args.task,
+        world_state=world if args.task else None,
+    )
+    if checkpointer is not None:
+        print(f"[EXECUTOR] Checkpointing plan {state['plan_id']}")
+
+    dispatcher.start()
+    executor = build_executor(checkpointer, repairer=repairer)
+    final = executor.invoke(state, run_config(len(plan), state["plan_id"]))
+    return 0 if final.get("outcome") == "SUCCESS" else 1
+
+
+def cmd_replay(args: argparse.Namespace) -> int:
+    from retention.replay import run
+
+    run(args)
+    return 0
+
+
+def add_world_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--world", default=WORLD_STATE_PATH, help="world_state.json")
+    parser.add_argument("--live-world", action="store_true", help="use the world store")
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Only `command`'s own argument definitions are imported."""
+    parser = argparse.ArgumentParser(description="Plan, validate, execute and replay robot plans")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="check a plan against the skill catalog")
+    validate.add_argument("plan", help="plan JSON file, or - for stdin")
+    add_world_arguments(validate)
+    validate.set_defaults(func=cmd_validate)
+
+    plan = commands.add_parser("plan", help="plan a task and print the plan JSON")
+    plan.add_argument("task")
+    plan.add_argument("--out", default=None, help="write the plan here instead of stdout")
+    plan.add_argument("--hedge", action="store_true", help="race several model backends")
+    plan.add_argument("--no-cache", action="store_true", help="skip the plan cache")
+    add_world_arguments(plan)
+    plan.set_defaults(func=cmd_plan)
+
+    execute = commands.add_parser("execute", help="execute a plan file on the bridge")
+    execute.add_argument("plan", help="plan JSON file, or - for stdin")
+    execute.add_argument("--window", type=int, default=1, help="steps queued ahead")
+    execute.add_argument("--plan-id", default=None)
+    execute.add_argument("--robot-id", default=None)
+    execute.add_argument("--task", default=None, help="instruction, enables plan repair")
+    execute.add_argument("--checkpoint", action="store_true", help="resume after a crash")
+    add_world_arguments(execute)
+    execute.set_defaults(func=cmd_execute)
+
+    replay = commands.add_parser("replay", help="replay archived stream entries")
+    if command == "replay":
+        from retention.replay import add_arguments
+
+        add_arguments(replay)
+    replay.set_defaults(func=cmd_replay)
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(argv[0] if argv else None).parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
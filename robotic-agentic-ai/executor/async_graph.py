@@ -0,0 +1,113 @@
+import asyncio
+from typing import Iterable, Optional
+
+from executor import async_redis_io as aio
+from executor.durations import duration_model
+from executor.graph import (
+    Repairer,
+    build_graph,
+    plan_update,
+    pull_next_step,
+    run_config,
+    settle_step,
+    window_to_send,
+)
+from executor.state import ExecState, SkillCall, new_exec_state
+
+
+async def publish_eta(state: ExecState, plan: list):
+    await duration_model.apublish_eta(
+        state.get("plan_id"), plan, state["step"], state.get("robot_id")
+    )
+
+
+async def send_step(state: ExecState) -> dict:
+    if state["step"] < len(state["plan"]):
+        plan, finished = state["plan"], None
+    else:
+        # Waiting on a plan feed blocks, so keep it off the event loop.
+        plan, finished = await asyncio.to_thread(pull_next_step, state)
+    if finished is not None:
+        return finished
+
+    step = state["step"]
+    epoch = state.get("epoch", 0)
+
+    if (state.get("window") or 1) <= 1:
+        task_id = await aio.send_skill(
+            plan[step], state.get("plan_id"), step, epoch, state.get("robot_id")
+        )
+        await publish_eta(state, plan)
+        return {
+            **plan_update(state, plan),
+            "current_task_id": task_id,
+        }
+
+    queued, upcoming = window_to_send(state, plan)
+    if upcoming:
+        task_ids = await aio.send_window(
+            upcoming, state["plan_id"], epoch, state.get("robot_id"), done=step - 1
+        )
+        for (i, _), task_id in zip(upcoming, task_ids):
+            queued[str(i)] = task_id
+    await publish_eta(state, plan)
+
+    return {
+        **plan_update(state, plan),
+        "queued": queued,
+        "current_task_id": queued[str(step)],
+    }
+
+
+async def wait_step(state: ExecState) -> dict:
+    task_id = state["current_task_id"]
+    assert task_id is not None
+
+    deadline = await duration_model.adeadline(state["plan"][state["step"]])
+    ok, reason = await aio.wait_for_outcome(task_id, deadline)
+
+    queued, epoch, cancelled = settle_step(state, ok)
+    if cancelled:
+        await aio.cancel_plan(state["plan_id"], epoch)
+        for queued_id in cancelled:
+            aio.get_dispatcher().forget(queued_id)
+
+    return {
+        "last_ok": ok,
+        "current_task_id": None,
+        "queued": queued,
+        "epoch": epoch,
+        **({} if ok else {"failure": reason}),
+    }
+
+
+def build_async_executor(checkpointer=None, repairer: Optional[Repairer] = None):
+    """Same graph as build_executor(), with Redis I/O on redis.asyncio; use ainvoke."""
+    return build_graph(send_step, wait_step, repairer).compile(checkpointer=checkpointer)
+
+
+async def run_plans(
+    plans: Iterable[list[SkillCall]], window: int = 1, executor=None
+) -> list[ExecState]:
+    """Execute many plans concurrently on the current event loop."""
+    executor = executor or build_async_executor()
+    states = [new_exec_state(plan, window=window) for plan in plans]
+    return await asyncio.gather(
+        *(
+            executor.ainvoke(state, run_config(len(state["plan"]), state["plan_id"]))
+            for state in states
+        )
+    )
+
+
+def execute_plans(plans: Iterable[list[SkillCall]], window: int = 1) -> list[ExecState]:
+    """Blocking wrapper around run_plans() for synchronous callers."""
+
+    async def run() -> list[ExecState]:
+        try:
+            return await run_plans(plans, window)
+        finally:
+            # The loop ends here; its reader and clients go with it.
+            await aio.shutdown()
+
+    return asyncio.run(run())
@@ -0,0 +1,248 @@
+import asyncio
+import uuid
+import weakref
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+import telemetry
+from executor import codec
+from executor.durations import DEFAULT_TIMEOUT_SEC, duration_model, duration_sample
+from executor.redis_io import (
+    CONTROL_STREAM,
+    EVENT_BATCH,
+    EVENT_BLOCK_MS,
+    EVENT_STREAM,
+    PROGRESS_KEY,
+    STREAM_MAXLEN,
+    event_stream,
+    task_fields,
+    task_stream,
+)
+from redis_config import close_async_clients, get_async_client
+
+
+class AsyncEventDispatcher:
+    """
+    asyncio counterpart of redis_io.EventDispatcher: one reader task per
+    event loop resolves an asyncio future per registered task_id, so a
+    waiting step costs a coroutine instead of a thread.
+    """
+
+    def __init__(self, client: Optional[aioredis.Redis] = None, stream: str = EVENT_STREAM):
+        self._client = client
+        self.stream = stream
+        self._pending: dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._last_ids: dict[str, str] = {}
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or get_async_client()
+
+    async def watch(self, stream: str):
+        if stream in self._last_ids:
+            return
+        latest = await self.client.xrevrange(stream, count=1)
+        self._last_ids.setdefault(stream, latest[0][0] if latest else "0-0")
+
+    async def start(self):
+        if self._reader is not None and not self._reader.done():
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._reader is not None and not self._reader.done():
+                return
+            await self.watch(self.stream)
+            self._reader = asyncio.create_task(self._run(), name="event-dispatcher")
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+    async def expect(self, task_id: str) -> asyncio.Future:
+        await self.start()
+        fut = self._pending.get(task_id)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._pending[task_id] = fut
+        return fut
+
+    def forget(self, task_id: str):
+        fut = self._pending.pop(task_id, None)
+        if fut is not None and not fut.done():
+            fut.cancel()
+        telemetry.task_forgotten(task_id)
+
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def _run(self):
+        while True:
+            try:
+                messages = await self.client.xread(
+                    dict(self._last_ids),
+                    block=EVENT_BLOCK_MS,
+                    count=EVENT_BATCH,
+                )
+            except redis.RedisError as e:
+                print(f"[REDIS] Event reader error: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            samples = []
+            for stream, entries in messages or []:
+                stream = stream.decode() if isinstance(stream, bytes) else stream
+                for msg_id, fields in entries:
+                    self._last_ids[stream] = msg_id
+                    try:
+                        event = codec.decode(fields)
+                    except ValueError as e:
+                        print(f"[REDIS] Skipping malformed event {msg_id!r} on {stream}: {e}")
+                        continue
+                    fut = self._pending.get(event.get("task_id"))
+                    if fut is not None and not fut.done():
+                        telemetry.task_finished(event, msg_id)
+                        fut.set_result(event)
+                        sample = duration_sample(event, msg_id)
+                        if sample is not None:
+                            samples.append(sample)
+            if samples:
+                pipe = self.client.pipeline(transaction=False)
+                duration_model.add_samples(pipe, samples)
+                try:
+                    await pipe.execute()
+                except redis.RedisError as e:
+                    print(f"[REDIS] Could not record skill durations: {e}")
+
+
+# One dispatcher per event loop: its reader task and lock belong to that loop.
+_dispatchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEventDispatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_dispatcher() -> AsyncEventDispatcher:
+    """The running event loop's dispatcher."""
+    loop = asyncio.get_running_loop()
+    dispatcher = _dispatchers.get(loop)
+    if dispatcher is None:
+        dispatcher = _dispatchers[loop] = AsyncEventDispatcher()
+    return dispatcher
+
+
+async def shutdown():
+    """Stop the running loop's event reader and close its Redis clients."""
+    dispatcher = _dispatchers.pop(asyncio.get_running_loop(), None)
+    if dispatcher is not None:
+        await dispatcher.stop()
+    await close_async_clients()
+
+
+async def send_skill(
+    skill: dict,
+    plan_id: Optional[str] = None,
+    seq: Optional[int] = None,
+    epoch: int = 0,
+    robot_id: Optional[str] = None,
+) -> str:
+    task_id = str(uuid.uuid4())
+
+    dispatcher = get_dispatcher()
+    await dispatcher.expect(task_id)
+    if robot_id:
+        await dispatcher.watch(event_stream(robot_id))
+    with telemetry.span("redis.xadd", skill["skill_name"], plan_id=plan_id, task_id=task_id):
+        entry_id = await get_async_client().xadd(
+            task_stream(robot_id),
+            task_fields(task_id, skill, plan_id, seq, epoch),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+    telemetry.task_sent(task_id, skill["skill_name"], entry_id, plan_id)
+
+    print(f"[REDIS] Sent task {task_id} ({skill['skill_name']})")
+    return task_id
+
+
+async def send_window(
+    steps: list[tuple[int, dict]],
+    plan_id: str,
+    epoch: int = 0,
+    robot_id: Optional[str] = None,
+    done: Optional[int] = None,
+) -> list[str]:
+    task_ids = [str(uuid.uuid4()) for _ in steps]
+    dispatcher = get_dispatcher()
+    for task_id in task_ids:
+        await dispatcher.expect(task_id)
+    if robot_id:
+        await dispatcher.watch(event_stream(robot_id))
+
+    async with get_async_client().pipeline(transaction=False) as pipe:
+        pipe.zadd(PROGRESS_KEY, {plan_id: steps[0][0] - 1 if done is None else done}, gt=True)
+        for task_id, (seq, skill) in zip(task_ids, steps):
+            pipe.xadd(
+                task_stream(robot_id),
+                task_fields(task_id, skill, plan_id, seq, epoch),
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
+            )
+        with telemetry.span("redis.xadd_window", plan_id=plan_id, steps=len(steps)):
+            entry_ids = (await pipe.execute())[1:]
+    for task_id, (_, skill), entry_id in zip(task_ids, steps, entry_ids):
+        telemetry.task_sent(task_id, skill["skill_name"], entry_id, plan_id)
+
+    print(f"[REDIS] Sent {len(steps)} queued task(s) for plan {plan_id}")
+    return task_ids
+
+
+async def cancel_plan(plan_id: str, epoch: int):
+    await get_async_client().xadd(
+        CONTROL_STREAM,
+        codec.encode(CONTROL_STREAM, {"type": "cancel", "plan_id": plan_id, "epoch": epoch}),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+    print(f"[REDIS] Cancelled queued steps of plan {plan_id} (epoch < {epoch})")
+
+
+async def wait_for_event(task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC) -> Optional[dict]:
+    dispatcher = get_dispatcher()
+    fut = await dispatcher.expect(task_id)
+    try:
+        return await asyncio.wait_for(asyncio.shield(fut), timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        dispatcher.forget(task_id)
+
+
+async def wait_for_outcome(
+    task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC
+) -> tuple[bool, Optional[str]]:
+    """(succeeded, reason the bridge gave for a failure)."""
+    with telemetry.span("redis.wait", task_id=task_id):
+        event = await wait_for_event(task_id, timeout)
+
+    if event is None:
+        print(f"[REDIS] Task {task_id} timed out")
+        return False, "TIMEOUT"
+
+    status = event.get("status")
+    print(f"[REDIS] Task {task_id} finished: {status}")
+    if status == "SUCCESS":
+        return True, None
+    return False, event.get("reason") or status
+
+
+async def wait_for_result(task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC) -> bool:
+    return (await wait_for_outcome(task_id, timeout))[0]
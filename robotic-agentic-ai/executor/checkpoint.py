@@ -0,0 +1,235 @@
+import asyncio
+import random
+from typing import Any, Iterator, Optional, Sequence
+
+import redis
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from redis_config import get_client
+
+CHECKPOINT_PREFIX = "executor.ckpt"
+# Checkpoints of finished or abandoned plans expire on their own.
+CHECKPOINT_TTL_SEC = 24 * 3600
+
+
+class RedisCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer that keeps the latest checkpoint of each plan
+    (thread_id) in one Redis hash.
+
+    Channel values are stored per channel and only rewritten when their
+    version changes, so the plan is written once and every transition
+    after that writes just the small fields the node returned (step,
+    retries, task ids). Only the latest checkpoint is kept: this saver is
+    for crash resume, not time travel.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, ttl: int = CHECKPOINT_TTL_SEC):
+        super().__init__()
+        # Serialized checkpoints are binary; keep responses undecoded.
+        self.client = client or get_client()
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(thread_id: str, checkpoint_ns: str) -> str:
+        return f"{CHECKPOINT_PREFIX}:{thread_id}:{checkpoint_ns}"
+
+    @staticmethod
+    def _writes_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{CHECKPOINT_PREFIX}:{thread_id}:{checkpoint_ns}:writes:{checkpoint_id}"
+
+    def _dumps(self, value: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(value)
+        return type_.encode() + b"|" + data
+
+    def _loads(self, raw: bytes) -> Any:
+        type_, _, data = raw.partition(b"|")
+        return self.serde.loads_typed((type_.decode(), data))
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = self._key(thread_id, checkpoint_ns)
+
+        head = self.client.hmget(key, "id", "checkpoint", "metadata", "parent")
+        if head[0] is None:
+            return None
+        checkpoint_id = head[0].decode()
+        wanted = get_checkpoint_id(config)
+        if wanted and wanted != checkpoint_id:
+            return None
+
+        checkpoint = self._loads(head[1])
+        channels = list(checkpoint["channel_versions"])
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(key, ["id"] + [f"b:{c}" for c in channels])
+        pipe.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        (_, *blobs), writes = pipe.execute()
+
+        channel_values = {}
+        for channel, raw in zip(channels, blobs):
+            if raw is not None and raw != b"empty|":
+                channel_values[channel] = self._loads(raw)
+
+        pending = []
+        for field in sorted(writes, key=lambda f: int(f.rsplit(b":", 1)[1])):
+            task_id, channel, value = self._loads(writes[field])
+            pending.append((task_id, channel, value))
+
+        parent = head[3].decode() if head[3] else None
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._loads(head[2]),
+            pending_writes=pending,
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent,
+                    }
+                }
+                if parent
+                else None
+            ),
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Only the latest checkpoint of the given thread is kept."""
+        if config is None or limit == 0:
+            return
+        saved = self.get_tuple(config)
+        if saved is None:
+            return
+        before_id = get_checkpoint_id(before) if before else None
+        if before_id and saved.config["configurable"]["checkpoint_id"] >= before_id:
+            return
+        if filter and not all(saved.metadata.get(k) == v for k, v in filter.items()):
+            return
+        yield saved
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent = config["configurable"].get("checkpoint_id")
+        key = self._key(thread_id, checkpoint_ns)
+
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        mapping = {
+            "id": checkpoint["id"],
+            "checkpoint": self._dumps(c),
+            "metadata": self._dumps(get_checkpoint_metadata(config, metadata)),
+            "parent": parent or "",
+        }
+        for channel in new_versions:
+            mapping[f"b:{channel}"] = (
+                self._dumps(values[channel]) if channel in values else b"empty|"
+            )
+
+        # Pending writes belong to the checkpoint they were made from; once
+        # it is superseded they are never read again. That is normally the
+        # parent, but a put from an older config replaces a different head.
+        head = self.client.hget(key, "id")
+        superseded = {parent, head.decode() if head else None} - {None, "", checkpoint["id"]}
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.ttl)
+        for old_id in superseded:
+            pipe.delete(self._writes_key(thread_id, checkpoint_ns, old_id))
+        pipe.execute()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        key = self._writes_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        pipe = self.client.pipeline(transaction=True)
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            field = f"{task_id}:{write_idx}"
+            packed = self._dumps((task_id, channel, value))
+            if write_idx >= 0:
+                pipe.hsetnx(key, field, packed)
+            else:
+                pipe.hset(key, field, packed)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete_thread(self, thread_id: str) -> None:
+        keys = list(self.client.scan_iter(match=f"{CHECKPOINT_PREFIX}:{thread_id}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for saved in await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        ):
+            yield saved
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
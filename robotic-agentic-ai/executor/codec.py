@@ -0,0 +1,108 @@
+"""
+Wire format of robot.* stream entries.
+
+An encoded entry has two fields: "c" holds the codec tag and format
+version (b"m1" = msgpack v1, b"j1" = orjson v1) and "d" holds the whole
+message as one blob. Entries written before the codec layer, with one
+string field per key and "params" as nested JSON, are still decoded, and
+"json" writes that format for bridges that have not been upgraded.
+
+Codecs are chosen per stream with ROBOT_STREAM_CODECS, e.g.
+"robot.tasks=msgpack,robot.control=json"; the default is
+ROBOT_STREAM_CODEC (msgpack).
+"""
+
+import json
+import os
+from typing import Callable, Optional, Union
+
+import orjson
+import ormsgpack
+
+WIRE_VERSION = 1
+CODEC_FIELD = b"c"
+DATA_FIELD = b"d"
+LEGACY = "json"
+# Legacy fields that hold integers; everything arrives as text.
+LEGACY_INT_FIELDS = ("seq", "epoch", "started_ms")
+
+
+class Codec:
+    def __init__(self, name: str, tag: bytes, dumps: Callable, loads: Callable):
+        self.name = name
+        self.tag = tag
+        self.header = tag + str(WIRE_VERSION).encode()
+        self.dumps = dumps
+        self.loads = loads
+
+
+CODECS = {
+    "msgpack": Codec("msgpack", b"m", ormsgpack.packb, ormsgpack.unpackb),
+    "orjson": Codec("orjson", b"j", orjson.dumps, orjson.loads),
+}
+_BY_TAG = {c.tag: c for c in CODECS.values()}
+
+
+def _parse_stream_codecs(spec: str) -> dict[str, str]:
+    codecs = {}
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        stream, _, name = item.partition("=")
+        if name not in CODECS and name != LEGACY:
+            raise ValueError(f"Unknown codec '{name}' for stream '{stream}'")
+        codecs[stream] = name
+    return codecs
+
+
+DEFAULT_CODEC = os.environ.get("ROBOT_STREAM_CODEC", "msgpack")
+STREAM_CODECS = _parse_stream_codecs(os.environ.get("ROBOT_STREAM_CODECS", ""))
+
+
+def codec_for(stream: str) -> str:
+    """Codec of `stream`; per-robot streams inherit, e.g. robot.tasks.arm_1."""
+    while stream:
+        if stream in STREAM_CODECS:
+            return STREAM_CODECS[stream]
+        stream = stream.rpartition(".")[0]
+    return DEFAULT_CODEC
+
+
+def _text(value: Union[str, bytes]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def encode(stream: str, message: dict, codec: Optional[str] = None) -> dict:
+    """Stream fields for `message` in the codec configured for `stream`."""
+    name = codec or codec_for(stream)
+    if name == LEGACY:
+        return {
+            key: json.dumps(value) if isinstance(value, dict) else ("" if value is None else value)
+            for key, value in message.items()
+        }
+    c = CODECS[name]
+    return {CODEC_FIELD: c.header, DATA_FIELD: c.dumps(message)}
+
+
+def decode(fields: dict) -> dict:
+    """
+    Message dict from stream fields written in any supported format.
+    Raises ValueError for an entry that is not a valid message.
+    """
+    data = fields.get(DATA_FIELD, fields.get("d"))
+    header = fields.get(CODEC_FIELD, fields.get("c"))
+    if data is not None and header is not None:
+        header = header if isinstance(header, bytes) else header.encode()
+        c = _BY_TAG.get(header[:1])
+        if c is None or int(header[1:] or 0) > WIRE_VERSION:
+            raise ValueError(f"Unsupported stream entry format {header!r}")
+        message = c.loads(data)
+        if not isinstance(message, dict):
+            raise ValueError(f"Stream entry holds {type(message).__name__}, not a message")
+        return message
+
+    message = {_text(k): _text(v) for k, v in fields.items()}
+    if "params" in message:
+        message["params"] = json.loads(message["params"])
+    for key in LEGACY_INT_FIELDS:
+        if message.get(key) not in (None, ""):
+            message[key] = int(message[key])
+    return message
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from verifier.skill_catalog import SkillCatalog, get_catalog
+
+
+def _footprint(skill_call: dict, catalog: SkillCatalog):
+    skill = catalog.get(skill_call["skill_name"])
+    if skill is None or skill.resources is None:
+        return None, frozenset()
+
+    args = skill_call["arguments"]
+    objects = frozenset(args[a] for a in skill.id_args if a in args)
+    return skill.resources, objects
+
+
+def build_step_dag(plan: List[dict], catalog: Optional[SkillCatalog] = None) -> list[list[int]]:
+    """
+    deps[i] lists the earlier steps that step i must wait for.
+
+    Two steps conflict when they touch the same object or need the same
+    resource (arm, gripper, camera); a step whose skill declares no
+    resources conflicts with everything. Conflicting steps keep plan order.
+    """
+    catalog = catalog or get_catalog()
+    footprints = [_footprint(step, catalog) for step in plan]
+
+    deps: list[list[int]] = []
+    for i, (res_i, obj_i) in enumerate(footprints):
+        step_deps = []
+        for j in range(i):
+            res_j, obj_j = footprints[j]
+            if res_i is None or res_j is None or res_i & res_j or obj_i & obj_j:
+                step_deps.append(j)
+        deps.append(step_deps)
+
+    return deps
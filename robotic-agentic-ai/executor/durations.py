@@ -0,0 +1,383 @@
+"""
+Learned skill durations, for step deadlines and plan ETAs.
+
+The event dispatchers record how long every successful skill ran at the
+bridge (event entry id minus started_ms) in log-spaced histograms in
+Redis, one per skill and one per skill with its exact arguments. Samples
+go to the histogram of the current WINDOW_SEC window and reads merge the
+current and the previous window, so old behaviour ages out after two
+windows.
+
+A step's deadline is a high quantile of its history with some slack; a
+skill without enough history keeps the fixed DEFAULT_TIMEOUT_SEC. Mean
+durations give a plan's predicted makespan and the ETA that the executor
+keeps in robot.plan_eta while the plan runs. The a* methods do the same
+on redis.asyncio for the async executor, and like the sync ones answer
+from the cache without a round trip.
+
+Run from robotic-agentic-ai/ to print what has been learned so far:
+    python -m executor.durations
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from typing import Iterable, Optional
+
+import redis
+
+from executor.state import SkillCall
+from redis_config import get_async_client, get_client
+
+DURATIONS_PREFIX = "robot.durations:"
+# Hash: plan_id -> JSON ETA of a running plan, see DurationModel.publish_eta.
+PLAN_ETA_KEY = "robot.plan_eta"
+
+# Bucket i > 0 holds durations up to BUCKET_MIN_SEC * BUCKET_RATIO**i, so
+# buckets are 15% wide and the last one (about 1.6 h) also takes anything
+# longer.
+BUCKET_MIN_SEC = 0.01
+BUCKET_RATIO = 1.15
+BUCKET_COUNT = 96
+WINDOW_SEC = 6 * 3600
+
+# History needed before a quantile replaces the fixed timeout.
+MIN_SAMPLES = 20
+DEADLINE_QUANTILE = 0.99
+DEADLINE_SLACK = 1.5
+# Covers queueing at the bridge and event delivery, which the samples omit.
+DEADLINE_GRACE_SEC = 2.0
+MIN_TIMEOUT_SEC = 5.0
+MAX_TIMEOUT_SEC = 3600.0
+DEFAULT_TIMEOUT_SEC = 30.0
+# Expected duration of a skill that was never observed.
+DEFAULT_DURATION_SEC = 5.0
+# Histograms are re-read at most this often per (skill, arguments).
+CACHE_TTL_SEC = 30.0
+
+
+def bucket_index(seconds: float) -> int:
+    if seconds <= BUCKET_MIN_SEC:
+        return 0
+    return min(BUCKET_COUNT - 1, int(math.log(seconds / BUCKET_MIN_SEC, BUCKET_RATIO)) + 1)
+
+
+def bucket_upper(index: int) -> float:
+    return BUCKET_MIN_SEC * BUCKET_RATIO**index
+
+
+def arguments_key(arguments: dict) -> str:
+    data = json.dumps(arguments, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def duration_sample(event: dict, entry_id) -> Optional[tuple[str, dict, float]]:
+    """(skill, arguments, seconds) of a successful event, or None."""
+    if event.get("status") != "SUCCESS" or not event.get("skill"):
+        return None
+    started_ms = event.get("started_ms")
+    if not started_ms:
+        return None
+    done_ms = int(_text(entry_id).split("-", 1)[0])
+    return event["skill"], event.get("params") or {}, max(0, done_ms - int(started_ms)) / 1000
+
+
+class DurationStats:
+    """Merged histogram of one skill, or of one skill with fixed arguments."""
+
+    __slots__ = ("counts", "n", "total")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.n = 0
+        self.total = 0.0
+
+    def add(self, fields: dict):
+        """Add one HGETALL of a histogram hash."""
+        for field, value in fields.items():
+            field, value = _text(field), int(value)
+            if field == "n":
+                self.n += value
+            elif field == "ms":
+                self.total += value / 1000
+            else:
+                self.counts[int(field)] += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        target = q * self.n
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return bucket_upper(index)
+        return 0.0
+
+
+class DurationModel:
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+        self._lock = threading.Lock()
+        # (skill, arguments key) -> (expires, by arguments, by skill)
+        self._cache: dict[tuple[str, str], tuple[float, DurationStats, DurationStats]] = {}
+        # plan_id -> (steps, expected seconds of each); see remaining().
+        self._plans: dict[str, tuple[list[SkillCall], list[float]]] = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_client()
+
+    @property
+    def async_client(self):
+        return get_async_client()
+
+    @staticmethod
+    def _keys(window: int, skill: str, args_key: str) -> tuple[str, str]:
+        skill_key = f"{DURATIONS_PREFIX}{window}:{skill}"
+        return f"{skill_key}:{args_key}", skill_key
+
+    # ---- recording ----
+
+    def add_samples(self, pipe, samples: Iterable[tuple[str, dict, float]]):
+        """
+        Queue the writes for `samples` on `pipe`. Works with sync and
+        redis.asyncio pipelines; the caller executes it.
+        """
+        window = int(time.time() // WINDOW_SEC)
+        for skill, arguments, seconds in samples:
+            bucket = str(bucket_index(seconds))
+            for key in self._keys(window, skill, arguments_key(arguments)):
+                pipe.hincrby(key, bucket, 1)
+                pipe.hincrby(key, "n", 1)
+                pipe.hincrby(key, "ms", int(seconds * 1000))
+                pipe.expire(key, 2 * WINDOW_SEC)
+
+    def record(self, samples: list[tuple[str, dict, float]]):
+        if not samples:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        self.add_samples(pipe, samples)
+        pipe.execute()
+
+    # ---- estimates ----
+
+    def _cached(self, cache_key: tuple[str, str], now: float):
+        with self._lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None and cached[0] > now:
+            return cached[1], cached[2]
+        return None
+
+    def _read_stats(self, pipe, cache_key: tuple[str, str], now: float):
+        window = int(now // WINDOW_SEC)
+        for w in (window, window - 1):
+            for key in self._keys(w, *cache_key):
+                pipe.hgetall(key)
+
+    def _store(self, cache_key: tuple[str, str], now: float, results: list):
+        by_args, by_skill = DurationStats(), DurationStats()
+        for i, fields in enumerate(results):
+            (by_args if i % 2 == 0 else by_skill).add(fields)
+        with self._lock:
+            self._cache[cache_key] = (now + CACHE_TTL_SEC, by_args, by_skill)
+        return by_args, by_skill
+
+    def stats(self, skill: str, arguments: dict) -> tuple[DurationStats, DurationStats]:
+        """History of `skill` with exactly `arguments`, and of `skill` overall."""
+        cache_key = (skill, arguments_key(arguments))
+        now = time.time()
+        cached = self._cached(cache_key, now)
+        if cached is not None:
+            return cached
+        pipe = self.client.pipeline(transaction=False)
+        self._read_stats(pipe, cache_key, now)
+        return self._store(cache_key, now, pipe.execute())
+
+    async def astats(self, skill: str, arguments: dict) -> tuple[DurationStats, DurationStats]:
+        cache_key = (skill, arguments_key(arguments))
+        now = time.time()
+        cached = self._cached(cache_key, now)
+        if cached is not None:
+            return cached
+        pipe = self.async_client.pipeline(transaction=False)
+        self._read_stats(pipe, cache_key, now)
+        return self._store(cache_key, now, await pipe.execute())
+
+    @staticmethod
+    def _expected(by_args: DurationStats, by_skill: DurationStats) -> float:
+        if by_args.n >= MIN_SAMPLES:
+            return by_args.mean
+        if by_skill.n:
+            return by_skill.mean
+        return DEFAULT_DURATION_SEC
+
+    @staticmethod
+    def _deadline(by_args: DurationStats, by_skill: DurationStats) -> float:
+        history = by_args if by_args.n >= MIN_SAMPLES else by_skill
+        if history.n < MIN_SAMPLES:
+            return DEFAULT_TIMEOUT_SEC
+        seconds = history.quantile(DEADLINE_QUANTILE) * DEADLINE_SLACK + DEADLINE_GRACE_SEC
+        return min(MAX_TIMEOUT_SEC, max(MIN_TIMEOUT_SEC, seconds))
+
+    def expected(self, step: SkillCall) -> float:
+        return self._expected(*self.stats(step["skill_name"], step["arguments"]))
+
+    def deadline(self, step: SkillCall) -> float:
+        """Seconds to wait for `step` before treating it as timed out."""
+        return self._deadline(*self.stats(step["skill_name"], step["arguments"]))
+
+    async def adeadline(self, step: SkillCall) -> float:
+        return self._deadline(*await self.astats(step["skill_name"], step["arguments"]))
+
+    def predict_makespan(self, plan: list[SkillCall]) -> float:
+        """Expected seconds to run `plan` step after step on one robot."""
+        return sum(self.expected(step) for step in plan)
+
+    async def apredict_makespan(self, plan: list[SkillCall]) -> float:
+        total = 0.0
+        for step in plan:
+            total += self._expected(*await self.astats(step["skill_name"], step["arguments"]))
+        return total
+
+    # ---- plan ETAs ----
+
+    def _known_prefix(self, plan_id: str, plan: list[SkillCall]) -> tuple[int, list[float]]:
+        """Leading steps of `plan` already estimated, and their estimates."""
+        with self._lock:
+            steps, expected = self._plans.get(plan_id, ([], []))
+        known = 0
+        for old, new in zip(steps, plan):
+            if old != new:
+                break
+            known += 1
+        return known, expected[:known]
+
+    def _remember(self, plan_id: str, plan: list[SkillCall], expected: list[float]):
+        with self._lock:
+            self._plans[plan_id] = (list(plan), expected)
+
+    def remaining(self, plan_id: str, plan: list[SkillCall], step: int) -> float:
+        """
+        Expected seconds left in `plan` from `step`. Each step is estimated
+        once per plan; only steps a stream or repair added are looked up.
+        """
+        known, expected = self._known_prefix(plan_id, plan)
+        expected += [self.expected(s) for s in plan[known:]]
+        self._remember(plan_id, plan, expected)
+        return sum(expected[step:])
+
+    async def aremaining(self, plan_id: str, plan: list[SkillCall], step: int) -> float:
+        known, expected = self._known_prefix(plan_id, plan)
+        for s in plan[known:]:
+            expected.append(self._expected(*await self.astats(s["skill_name"], s["arguments"])))
+        self._remember(plan_id, plan, expected)
+        return sum(expected[step:])
+
+    def forget_plan(self, plan_id: str):
+        with self._lock:
+            self._plans.pop(plan_id, None)
+
+    def publish_eta(
+        self,
+        plan_id: Optional[str],
+        plan: list[SkillCall],
+        step: int,
+        robot_id: Optional[str] = None,
+    ) -> Optional[dict]:
+        """
+        Store the ETA of `plan_id` as `step` starts. Best effort: a Redis
+        error is logged and returns None instead of failing the step.
+        """
+        try:
+            if not plan_id:
+                return self._eta(self.predict_makespan(plan[step:]), plan, step, robot_id)
+            eta = self._eta(self.remaining(plan_id, plan, step), plan, step, robot_id)
+            self.client.hset(PLAN_ETA_KEY, plan_id, json.dumps(eta))
+        except redis.RedisError as e:
+            print(f"[REDIS] Could not publish ETA of plan {plan_id}: {e}")
+            return None
+        return eta
+
+    async def apublish_eta(
+        self,
+        plan_id: Optional[str],
+        plan: list[SkillCall],
+        step: int,
+        robot_id: Optional[str] = None,
+    ) -> Optional[dict]:
+        try:
+            if not plan_id:
+                remaining = await self.apredict_makespan(plan[step:])
+                return self._eta(remaining, plan, step, robot_id)
+            eta = self._eta(await self.aremaining(plan_id, plan, step), plan, step, robot_id)
+            await self.async_client.hset(PLAN_ETA_KEY, plan_id, json.dumps(eta))
+        except redis.RedisError as e:
+            print(f"[REDIS] Could not publish ETA of plan {plan_id}: {e}")
+            return None
+        return eta
+
+    @staticmethod
+    def _eta(remaining: float, plan: list[SkillCall], step: int, robot_id: Optional[str]) -> dict:
+        now = time.time()
+        eta = {
+            "step": step,
+            "steps": len(plan),
+            "remaining_s": round(remaining, 3),
+            "eta_ms": int((now + remaining) * 1000),
+            "updated_ms": int(now * 1000),
+        }
+        if robot_id:
+            eta["robot_id"] = robot_id
+        return eta
+
+    def plan_eta(self, plan_id: str) -> Optional[dict]:
+        raw = self.client.hget(PLAN_ETA_KEY, plan_id)
+        return json.loads(raw) if raw else None
+
+
+duration_model = DurationModel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learned skill durations")
+    parser.add_argument("--eta", default=None, metavar="PLAN_ID", help="print a running plan's ETA")
+    args = parser.parse_args()
+
+    if args.eta:
+        print(json.dumps(duration_model.plan_eta(args.eta), indent=2))
+        return
+
+    window = int(time.time() // WINDOW_SEC)
+    skills = set()
+    for w in (window, window - 1):
+        for key in duration_model.client.scan_iter(f"{DURATIONS_PREFIX}{w}:*"):
+            parts = _text(key)[len(DURATIONS_PREFIX) :].split(":")
+            if len(parts) == 2:
+                skills.add(parts[1])
+
+    report = {}
+    for skill in sorted(skills):
+        _, history = duration_model.stats(skill, {})
+        report[skill] = {
+            "samples": history.n,
+            "mean_s": round(history.mean, 3),
+            "p50_s": round(history.quantile(0.5), 3),
+            "p99_s": round(history.quantile(DEADLINE_QUANTILE), 3),
+            "deadline_s": round(duration_model.deadline({"skill_name": skill, "arguments": {}}), 3),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,168 @@
-from typing import cast
+from typing import Callable, Optional
 
 from langgraph.graph import END, StateGraph
 
-from executor.redis_io import send_skill, wait_for_result
-from executor.state import ExecState
+import telemetry
+from executor.durations import duration_model
+from executor.redis_io import (
+    cancel_plan,
+    dispatcher,
+    finish_plan,
+    send_skill,
+    send_window,
+    wait_for_outcome,
+)
+from executor.state import ExecState, SkillCall
+from executor.streaming import close_feed, get_feed
+from world.store import apply_steps
 
 MAX_RETRIES = 2
+# New suffixes a plan may ask the planner for before it aborts.
+MAX_REPAIRS = 2
+
+# repairer(task, world_state, completed, failed_step, reason) -> new suffix
+Repairer = Callable[[str, dict, list[SkillCall], SkillCall, Optional[str]], list[SkillCall]]
+
+
+def pull_next_step(state: ExecState) -> tuple[list, Optional[dict]]:
+    """
+    Plan to send from, or the finishing update when there is nothing left.
+
+    A streamed plan grows while it runs, so past the end of the known plan
+    this blocks on the plan feed for the next step.
+    """
+    plan = state["plan"]
+    if state["step"] < len(plan):
+        return plan, None
+
+    feed = get_feed(state.get("plan_id"))
+    next_skill = feed.next_step() if feed is not None else None
+
+    if next_skill is None:
+        if feed is not None and feed.error:
+            return plan, {
+                "last_ok": False,
+                "current_task_id": None,
+                "error": feed.error,
+            }
+        return plan, {
+            "last_ok": True,
+            "current_task_id": None,
+        }
+
+    return plan + [next_skill], None
+
+
+def window_to_send(state: ExecState, plan: list) -> tuple[dict, list]:
+    """Already queued steps and the (seq, skill) pairs still to queue."""
+    queued = dict(state.get("queued") or {})
+    step = state["step"]
+    window = state.get("window") or 1
+    upcoming = [
+        (i, plan[i])
+        for i in range(step, min(step + window, len(plan)))
+        if str(i) not in queued
+    ]
+    return queued, upcoming
+
+
+def settle_step(state: ExecState, ok: bool) -> tuple[dict, int, list[str]]:
+    """
+    Queue and epoch after the current step finished, plus the task ids
+    queued behind it that must be cancelled.
+
+    The bridge stops the plan at a failed step, so a retry needs a new
+    epoch and anything queued behind the failure is cancelled.
+    """
+    queued = dict(state.get("queued") or {})
+    queued.pop(str(state["step"]), None)
+    epoch = state.get("epoch", 0)
 
+    if ok:
+        return queued, epoch, []
+    return {}, epoch + 1, list(queued.values())
 
-def send_step(state: ExecState) -> ExecState:
-    if state["step"] >= len(state["plan"]):
+
+def plan_update(state: ExecState, plan: list) -> dict:
+    """
+    The plan only goes into a node's update when a streamed step extended
+    it, so a checkpointer stores it once instead of on every transition.
+    """
+    return {"plan": plan} if len(plan) != len(state["plan"]) else {}
+
+
+def send_step(state: ExecState) -> dict:
+    plan, finished = pull_next_step(state)
+    if finished is not None:
+        return finished
+
+    step = state["step"]
+    epoch = state.get("epoch", 0)
+
+    if (state.get("window") or 1) <= 1:
+        task_id = send_skill(
+            plan[step], state.get("plan_id"), step, epoch, state.get("robot_id")
+        )
+        duration_model.publish_eta(state.get("plan_id"), plan, step, state.get("robot_id"))
         return {
-            **state,
-            "last_ok": True,
-            "current_task_id": None,
+            **plan_update(state, plan),
+            "current_task_id": task_id,
         }
 
-    skill = state["plan"][state["step"]]
-    task_id = send_skill(skill)
+    # Pipelined mode: keep up to `window` steps queued at the bridge.
+    queued, upcoming = window_to_send(state, plan)
+    if upcoming:
+        task_ids = send_window(
+            upcoming, state["plan_id"], epoch, state.get("robot_id"), done=step - 1
+        )
+        for (i, _), task_id in zip(upcoming, task_ids):
+            queued[str(i)] = task_id
+    duration_model.publish_eta(state["plan_id"], plan, step, state.get("robot_id"))
 
     return {
-        **state,
-        "current_task_id": task_id,
+        **plan_update(state, plan),
+        "queued": queued,
+        "current_task_id": queued[str(step)],
     }
 
 
 def after_send(state: ExecState):
     if state["current_task_id"] is None:
+        if state.get("error"):
+            return "abort"
         return "update"
     return "wait"
 
 
-def wait_step(state: ExecState) -> ExecState:
+def wait_step(state: ExecState) -> dict:
     task_id = state["current_task_id"]
     assert task_id is not None
 
-    ok = wait_for_result(task_id)
+    # Learned from this skill's past runs; the fixed default until there are enough.
+    ok, reason = wait_for_outcome(task_id, duration_model.deadline(state["plan"][state["step"]]))
+
+    queued, epoch, cancelled = settle_step(state, ok)
+    if cancelled:
+        cancel_plan(state["plan_id"], epoch)
+        for queued_id in cancelled:
+            dispatcher.forget(queued_id)
 
     return {
-        **state,
         "last_ok": ok,
         "current_task_id": None,
+        "queued": queued,
+        "epoch": epoch,
+        **({} if ok else {"failure": reason}),
     }
 
 
-def update_state(state: ExecState) -> ExecState:
+def update_state(state: ExecState) -> dict:
     if state["last_ok"]:
         return {
-            **state,
             "step": state["step"] + 1,
             "retries": 0,
         }
     return {
-        **state,
         "retries": state["retries"] + 1,
     }
 
@@ -64,34 +174,100 @@ def route(state: ExecState):
         return "send"
 
     if state["retries"] >= MAX_RETRIES:
+        if state.get("task") and state.get("world_state") is not None:
+            if state.get("repairs", 0) < MAX_REPAIRS:
+                return "repair"
         return "abort"
 
     return "send"
 
 
-def success_node(state: ExecState) -> ExecState:
-    s = dict(state)
-    s["outcome"] = "SUCCESS"
-    print("[EXECUTOR] Execution completed successfully.")
-    return cast(ExecState, s)
+def make_repair_node(repairer: Repairer):
+    """
+    Node that replaces the failed step and everything after it with a
+    suffix from `repairer`. Steps before the failed one already succeeded
+    and are never sent again.
+    """
+
+    def repair_step(state: ExecState) -> dict:
+        step = state["step"]
+        completed, failed = state["plan"][:step], state["plan"][step]
+        repairs = state.get("repairs", 0) + 1
+        print(
+            f"[EXECUTOR] Step {step} ({failed['skill_name']}) failed: "
+            f"{state.get('failure')}; requesting a repaired plan"
+        )
+        try:
+            world_state = apply_steps(state["world_state"], completed)
+            suffix = repairer(state["task"], world_state, completed, failed, state.get("failure"))
+        except Exception as e:
+            return {"repairs": repairs, "error": f"Plan repair failed: {e}"}
+        if not suffix:
+            return {"repairs": repairs, "error": "Planner found no way to finish the task"}
+
+        # A streamed plan must not keep growing the replaced suffix.
+        close_feed(state.get("plan_id"))
+        print(f"[EXECUTOR] Repaired plan: {len(completed)} done, {len(suffix)} to go")
+        return {
+            "plan": completed + suffix,
+            "repairs": repairs,
+            "retries": 0,
+            "failure": None,
+        }
 
+    return repair_step
 
-def abort_node(state: ExecState) -> ExecState:
-    s = dict(state)
-    s["outcome"] = "FAILED"
-    print("[EXECUTOR] Aborting execution due to repeated failures.")
-    return cast(ExecState, s)
 
+def after_repair(state: ExecState):
+    return "abort" if state.get("error") else "send"
 
-def build_executor():
+
+def success_node(state: ExecState) -> dict:
+    close_feed(state.get("plan_id"))
+    finish_plan(state.get("plan_id"))
+    print("[EXECUTOR] Execution completed successfully.")
+    return {"outcome": "SUCCESS"}
+
+
+def abort_node(state: ExecState) -> dict:
+    close_feed(state.get("plan_id"))
+    finish_plan(state.get("plan_id"))
+    if state.get("error"):
+        print(f"[EXECUTOR] Aborting execution: {state['error']}")
+    else:
+        print("[EXECUTOR] Aborting execution due to repeated failures.")
+    return {"outcome": "FAILED"}
+
+
+def run_config(plan_len: int, plan_id: Optional[str] = None) -> dict:
+    """
+    Invoke config whose recursion limit fits a plan with every retry and
+    repair used. With a checkpointer, pass plan_id: it is the thread the
+    plan resumes on.
+    """
+    config = {
+        "recursion_limit": 3 * (plan_len + 1) * (MAX_RETRIES + 1) * (MAX_REPAIRS + 1) + 10
+    }
+    if plan_id is not None:
+        config["configurable"] = {"thread_id": plan_id}
+    return config
+
+
+def build_graph(
+    send_node=send_step, wait_node=wait_step, repairer: Optional[Repairer] = None
+) -> StateGraph:
+    """Without a repairer, a step that keeps failing aborts the plan."""
     g = StateGraph(ExecState)
 
-    g.add_node("send", send_step)
+    g.add_node("send", telemetry.traced_node("send", send_node))
 
-    g.add_node("wait", wait_step)
-    g.add_node("update", update_state)
-    g.add_node("success", success_node)
-    g.add_node("abort", abort_node)
+    g.add_node("wait", telemetry.traced_node("wait", wait_node))
+    g.add_node("update", telemetry.traced_node("update", update_state))
+    g.add_node("success", telemetry.traced_node("success", success_node))
+    g.add_node("abort", telemetry.traced_node("abort", abort_node))
+    if repairer is not None:
+        g.add_node("repair", telemetry.traced_node("repair", make_repair_node(repairer)))
+        g.add_conditional_edges("repair", after_repair, {"send": "send", "abort": "abort"})
 
     g.set_entry_point("send")
 
@@ -101,6 +277,7 @@ def build_executor():
         {
             "wait": "wait",
             "update": "update",
+            "abort": "abort",
         },
     )
     g.add_edge("wait", "update")
@@ -111,6 +288,7 @@ def build_executor():
         {
             "send": "send",
             "success": "success",
+            "repair": "repair" if repairer is not None else "abort",
             "abort": "abort",
         },
     )
@@ -118,4 +296,39 @@ def build_executor():
     g.add_edge("success", END)
     g.add_edge("abort", END)
 
-    return g.compile()
+    return g
+
+
+def build_executor(checkpointer=None, repairer: Optional[Repairer] = None):
+    return build_graph(repairer=repairer).compile(checkpointer=checkpointer)
+
+
+def resume_plan(executor, plan_id: str) -> Optional[ExecState]:
+    """
+    Continue a checkpointed plan after an executor crash, or None when
+    nothing was checkpointed for plan_id.
+
+    Steps up to the last acknowledged one are never sent again. A step
+    that was in flight when the executor died may or may not have run, so
+    its epoch is cancelled at the bridge and it is sent again.
+    """
+    snapshot = executor.get_state(run_config(0, plan_id))
+    if not snapshot.values:
+        return None
+
+    state = snapshot.values
+    config = run_config(len(state["plan"]), plan_id)
+    if not snapshot.next:
+        return state
+
+    if "wait" in snapshot.next:
+        epoch = state.get("epoch", 0) + 1
+        cancel_plan(plan_id, epoch)
+        executor.update_state(
+            config,
+            {"current_task_id": None, "queued": {}, "epoch": epoch},
+            as_node="update",
+        )
+
+    print(f"[EXECUTOR] Resuming plan {plan_id} at step {state['step']}")
+    return executor.invoke(None, config)
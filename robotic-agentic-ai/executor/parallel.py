@@ -0,0 +1,173 @@
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait as wait_futures
+
+from langgraph.graph import END, StateGraph
+
+import telemetry
+from executor.durations import duration_model
+from executor.graph import MAX_RETRIES, abort_node, success_node
+from executor.redis_io import cancel_plan, dispatcher, send_skill
+from executor.state import ParallelExecState
+
+
+def dispatch_ready(state: ParallelExecState) -> dict:
+    status = list(state["status"])
+    in_flight = dict(state["in_flight"])
+    sent_at = dict(state["sent_at"])
+
+    for idx, deps in enumerate(state["deps"]):
+        if status[idx] != "PENDING":
+            continue
+        if all(status[d] == "DONE" for d in deps):
+            # No seq: independent steps may run in any order, but plan_id
+            # and epoch let the bridge drop them once the plan is aborted.
+            task_id = send_skill(
+                state["plan"][idx],
+                state.get("plan_id"),
+                epoch=state.get("epoch", 0),
+                robot_id=state.get("robot_id"),
+            )
+            status[idx] = "RUNNING"
+            in_flight[task_id] = idx
+            sent_at[task_id] = time.time()
+
+    return {
+        "status": status,
+        "in_flight": in_flight,
+        "sent_at": sent_at,
+    }
+
+
+def after_dispatch(state: ParallelExecState):
+    if state["in_flight"]:
+        return "wait"
+    if all(s == "DONE" for s in state["status"]):
+        return "success"
+    return "abort"
+
+
+def step_deadlines(state: ParallelExecState) -> dict[str, float]:
+    """
+    When each in-flight step times out. The robot may work through the
+    in-flight steps one at a time, in the order they were sent, so a
+    step's timer also covers the expected durations of the steps ahead of
+    it. sent_at moves to the last time a step ahead of it finished.
+    """
+    deadlines = {}
+    queued = 0.0
+    for task_id, idx in state["in_flight"].items():
+        step = state["plan"][idx]
+        deadlines[task_id] = state["sent_at"][task_id] + queued + duration_model.deadline(step)
+        queued += duration_model.expected(step)
+    return deadlines
+
+
+def wait_any(state: ParallelExecState) -> dict:
+    """Block until at least one in-flight step finishes or times out."""
+    futures = {dispatcher.expect(task_id): task_id for task_id in state["in_flight"]}
+    deadlines = step_deadlines(state)
+    timeout = max(0.0, min(deadlines.values()) - time.time())
+
+    done, _ = wait_futures(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+    status = list(state["status"])
+    step_retries = list(state["step_retries"])
+    in_flight = dict(state["in_flight"])
+    sent_at = dict(state["sent_at"])
+    error = state.get("error")
+    epoch = state.get("epoch", 0)
+    completed = 0
+
+    now = time.time()
+    finished = {futures[f]: f.result() for f in done if not f.cancelled()}
+    for task_id, deadline in deadlines.items():
+        if task_id not in finished and now >= deadline:
+            print(f"[REDIS] Task {task_id} timed out")
+            finished[task_id] = {"status": "TIMEOUT", "reason": "timeout"}
+
+    order = list(in_flight)
+    for task_id, event in finished.items():
+        dispatcher.forget(task_id)
+        idx = in_flight.pop(task_id)
+        sent_at.pop(task_id, None)
+        # Steps queued behind this one could only start now.
+        for behind in order[order.index(task_id) + 1 :]:
+            if behind in sent_at:
+                sent_at[behind] = max(sent_at[behind], now)
+
+        if event.get("status") == "SUCCESS":
+            print(f"[EXECUTOR] Step {idx} ({state['plan'][idx]['skill_name']}) done")
+            status[idx] = "DONE"
+            completed += 1
+            continue
+
+        step_retries[idx] += 1
+        print(f"[EXECUTOR] Step {idx} failed ({event.get('reason') or event.get('status')})")
+        if step_retries[idx] >= MAX_RETRIES:
+            status[idx] = "FAILED"
+            error = error or f"Step {idx} failed after {step_retries[idx]} attempts"
+        else:
+            status[idx] = "PENDING"
+
+    if error:
+        # Abandon the remaining steps; their results are no longer awaited.
+        for task_id in in_flight:
+            dispatcher.forget(task_id)
+        if in_flight and state.get("plan_id"):
+            epoch += 1
+            cancel_plan(state["plan_id"], epoch)
+
+    return {
+        "status": status,
+        "step_retries": step_retries,
+        "in_flight": in_flight,
+        "sent_at": sent_at,
+        "step": state["step"] + completed,
+        "last_ok": error is None,
+        "error": error,
+        "epoch": epoch,
+    }
+
+
+def route_parallel(state: ParallelExecState):
+    if state.get("error"):
+        return "abort"
+    if all(s == "DONE" for s in state["status"]):
+        return "success"
+    return "dispatch"
+
+
+def build_parallel_executor():
+    g = StateGraph(ParallelExecState)
+
+    g.add_node("dispatch", telemetry.traced_node("dispatch", dispatch_ready))
+    g.add_node("wait", telemetry.traced_node("wait", wait_any))
+    g.add_node("success", telemetry.traced_node("success", success_node))
+    g.add_node("abort", telemetry.traced_node("abort", abort_node))
+
+    g.set_entry_point("dispatch")
+
+    g.add_conditional_edges(
+        "dispatch",
+        after_dispatch,
+        {
+            "wait": "wait",
+            "success": "success",
+            "abort": "abort",
+        },
+    )
+    g.add_conditional_edges(
+        "wait",
+        route_parallel,
+        {
+            "dispatch": "dispatch",
+            "success": "success",
+            "abort": "abort",
+        },
+    )
+
+    g.add_edge("success", END)
+    g.add_edge("abort", END)
+
+    return g.compile()
@@ -1,61 +1,313 @@
-import json
+import os
+import threading
 import time
 import uuid
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Optional
 
 import redis
 
-r = redis.Redis(decode_responses=True)
+import telemetry
+from executor import codec
+from executor.durations import (
+    DEFAULT_TIMEOUT_SEC,
+    PLAN_ETA_KEY,
+    duration_model,
+    duration_sample,
+)
+from redis_config import REDIS_URL, get_client
 
 TASK_STREAM = "robot.tasks"
 EVENT_STREAM = "robot.events"
-EVENT_GROUP = "langgraph"
-EVENT_CONSUMER = "lg_1"
+CONTROL_STREAM = "robot.control"
+# Sorted set: plan_id -> highest seq known to be done. Multi-worker bridges
+# use it to keep a plan's queued steps in order.
+PROGRESS_KEY = "robot.plan_progress"
 
+# Hard cap on stream length (approximate trimming on every XADD). The
+# archiver in retention/ normally trims well below this after archiving;
+# the cap only bounds Redis memory if the archiver is not running.
+STREAM_MAXLEN = int(os.environ.get("ROBOT_STREAM_MAXLEN", "100000"))
 
-import json
-import uuid
+EVENT_BATCH = 128
+EVENT_BLOCK_MS = 1000
+# Pause before reading again after the event reader hit a Redis error.
+READER_BACKOFF_SEC = 1.0
 
-import redis
 
-r = redis.Redis(decode_responses=True)
+def task_stream(robot_id: Optional[str] = None) -> str:
+    """Task stream of one robot in a fleet, or the shared one."""
+    return f"{TASK_STREAM}.{robot_id}" if robot_id else TASK_STREAM
+
+
+def event_stream(robot_id: Optional[str] = None) -> str:
+    return f"{EVENT_STREAM}.{robot_id}" if robot_id else EVENT_STREAM
+
+
+class EventDispatcher:
+    """
+    Single reader of the event streams for the whole process.
+
+    Every waiter registers its task_id before the task is sent; the reader
+    drains events in batches and resolves the matching future. Events for
+    task_ids this process never registered are left alone, so several
+    executors (in one or many processes) can share the stream. Per-robot
+    event streams are added with watch() and read in the same XREAD.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, stream: str = EVENT_STREAM):
+        self._client = client
+        self.stream = stream
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # stream -> last entry id read
+        self._last_ids: dict[str, str] = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        # Resolved on first use so importing this module opens nothing.
+        return self._client or get_client()
+
+    def watch(self, stream: str):
+        """Also read `stream`, from its current end. Call before sending."""
+        with self._lock:
+            if stream in self._last_ids:
+                return
+        latest = self.client.xrevrange(stream, count=1)
+        with self._lock:
+            self._last_ids.setdefault(stream, latest[0][0] if latest else "0-0")
+
+    def start(self):
+        self.watch(self.stream)
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="event-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def expect(self, task_id: str) -> Future:
+        self.start()
+        with self._lock:
+            fut = self._pending.get(task_id)
+            if fut is None:
+                fut = Future()
+                self._pending[task_id] = fut
+        return fut
+
+    def subscribe(self, task_id: str, callback: Callable[[dict], None]):
+        fut = self.expect(task_id)
+
+        def _done(f: Future):
+            self.forget(task_id)
+            if not f.cancelled():
+                callback(f.result())
+
+        fut.add_done_callback(_done)
+
+    def forget(self, task_id: str):
+        with self._lock:
+            fut = self._pending.pop(task_id, None)
+        if fut is not None and not fut.done():
+            fut.cancel()
+        telemetry.task_forgotten(task_id)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                streams = dict(self._last_ids)
+            try:
+                messages = self.client.xread(
+                    streams,
+                    block=EVENT_BLOCK_MS,
+                    count=EVENT_BATCH,
+                )
+            except redis.RedisError as e:
+                # Any error here would otherwise end the one reader thread
+                # every waiter in the process depends on.
+                print(f"[REDIS] Event reader error: {e}")
+                time.sleep(READER_BACKOFF_SEC)
+                continue
+
+            samples = []
+            for stream, entries in messages or []:
+                stream = stream.decode() if isinstance(stream, bytes) else stream
+                for msg_id, fields in entries:
+                    with self._lock:
+                        self._last_ids[stream] = msg_id
+                    try:
+                        event = codec.decode(fields)
+                    except ValueError as e:
+                        print(f"[REDIS] Skipping malformed event {msg_id!r} on {stream}: {e}")
+                        continue
+                    if self._dispatch(msg_id, event):
+                        sample = duration_sample(event, msg_id)
+                        if sample is not None:
+                            samples.append(sample)
+            # Only our own tasks, so each one is recorded once fleet-wide.
+            try:
+                duration_model.record(samples)
+            except redis.RedisError as e:
+                print(f"[REDIS] Could not record skill durations: {e}")
 
+    def _dispatch(self, msg_id: str, event: dict) -> bool:
+        """Resolve the waiter of `event`; False if it is not ours."""
+        task_id = event.get("task_id")
+        with self._lock:
+            fut = self._pending.get(task_id) if task_id else None
+        if fut is None or fut.done():
+            return False
+        telemetry.task_finished(event, msg_id)
+        fut.set_result(event)
+        return True
 
-def send_skill(skill: dict) -> str:
+
+dispatcher = EventDispatcher()
+
+
+def task_fields(task_id: str, skill: dict, plan_id=None, seq=None, epoch=0) -> dict:
+    """Encoded TASK_STREAM entry for one skill call."""
+    message = {
+        "task_id": task_id,
+        "skill": skill["skill_name"],
+        "params": skill["arguments"],
+    }
+    if plan_id is not None:
+        message["plan_id"] = plan_id
+        message["seq"] = seq
+        message["epoch"] = epoch
+    return codec.encode(TASK_STREAM, message)
+
+
+def send_skill(
+    skill: dict,
+    plan_id: Optional[str] = None,
+    seq: Optional[int] = None,
+    epoch: int = 0,
+    robot_id: Optional[str] = None,
+) -> str:
     task_id = str(uuid.uuid4())
 
-    r.xadd(
-        "robot.tasks",
-        {
-            "task_id": task_id,
-            "skill": skill["skill_name"],
-            "params": json.dumps(skill["arguments"]),
-        },
-    )
+    # Register before publishing so a fast bridge reply cannot be missed.
+    dispatcher.expect(task_id)
+    if robot_id:
+        dispatcher.watch(event_stream(robot_id))
+
+    with telemetry.span("redis.xadd", skill["skill_name"], plan_id=plan_id, task_id=task_id):
+        entry_id = get_client().xadd(
+            task_stream(robot_id),
+            task_fields(task_id, skill, plan_id, seq, epoch),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+    telemetry.task_sent(task_id, skill["skill_name"], entry_id, plan_id)
 
     print(f"[REDIS] Sent task {task_id} ({skill['skill_name']})")
     return task_id
 
 
-def wait_for_result(task_id: str, timeout: int = 30) -> bool:
-    start = time.time()
+def send_window(
+    steps: list[tuple[int, dict]],
+    plan_id: str,
+    epoch: int = 0,
+    robot_id: Optional[str] = None,
+    done: Optional[int] = None,
+) -> list[str]:
+    """
+    Queue several upcoming steps of one plan in a single pipeline.
 
-    while time.time() - start < timeout:
-        messages = r.xreadgroup(
-            EVENT_GROUP,
-            EVENT_CONSUMER,
-            {EVENT_STREAM: ">"},
-            block=5000,
-            count=1,
+    The bridge runs a plan's steps in seq order and stops at the first
+    failure; cancel_plan() discards whatever is still queued. `done` is
+    the last seq known to have finished, by default the one before
+    steps[0]; pass it when steps queued by an earlier call may still wait.
+    """
+    task_ids = [str(uuid.uuid4()) for _ in steps]
+    for task_id in task_ids:
+        dispatcher.expect(task_id)
+    if robot_id:
+        dispatcher.watch(event_stream(robot_id))
+
+    pipe = get_client().pipeline(transaction=False)
+    # GT never moves progress back.
+    pipe.zadd(PROGRESS_KEY, {plan_id: steps[0][0] - 1 if done is None else done}, gt=True)
+    for task_id, (seq, skill) in zip(task_ids, steps):
+        pipe.xadd(
+            task_stream(robot_id),
+            task_fields(task_id, skill, plan_id, seq, epoch),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
         )
+    with telemetry.span("redis.xadd_window", plan_id=plan_id, steps=len(steps)):
+        entry_ids = pipe.execute()[1:]
+    for task_id, (_, skill), entry_id in zip(task_ids, steps, entry_ids):
+        telemetry.task_sent(task_id, skill["skill_name"], entry_id, plan_id)
+
+    print(f"[REDIS] Sent {len(steps)} queued task(s) for plan {plan_id}")
+    return task_ids
+
+
+def cancel_plan(plan_id: str, epoch: int):
+    """Tell the bridge to drop queued steps of `plan_id` older than `epoch`."""
+    get_client().xadd(
+        CONTROL_STREAM,
+        codec.encode(CONTROL_STREAM, {"type": "cancel", "plan_id": plan_id, "epoch": epoch}),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+    print(f"[REDIS] Cancelled queued steps of plan {plan_id} (epoch < {epoch})")
+
+
+def finish_plan(plan_id: Optional[str]):
+    if plan_id:
+        duration_model.forget_plan(plan_id)
+        pipe = get_client().pipeline(transaction=False)
+        pipe.zrem(PROGRESS_KEY, plan_id)
+        pipe.hdel(PLAN_ETA_KEY, plan_id)
+        pipe.execute()
+
+
+def wait_for_event(task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC) -> Optional[dict]:
+    fut = dispatcher.expect(task_id)
+    try:
+        return fut.result(timeout=timeout)
+    except FutureTimeout:
+        return None
+    finally:
+        dispatcher.forget(task_id)
+
+
+def wait_for_outcome(
+    task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC
+) -> tuple[bool, Optional[str]]:
+    """(succeeded, reason the bridge gave for a failure)."""
+    with telemetry.span("redis.wait", task_id=task_id):
+        event = wait_for_event(task_id, timeout)
+
+    if event is None:
+        print(f"[REDIS] Task {task_id} timed out")
+        return False, "TIMEOUT"
 
-        for _, entries in messages:
-            for msg_id, event in entries:
-                r.xack(EVENT_STREAM, EVENT_GROUP, msg_id)
+    status = event.get("status")
+    print(f"[REDIS] Task {task_id} finished: {status}")
+    if status == "SUCCESS":
+        return True, None
+    return False, event.get("reason") or status
 
-                if event.get("task_id") == task_id:
-                    status = event.get("status")
-                    print(f"[REDIS] Task {task_id} finished: {status}")
-                    return status == "SUCCESS"
 
-    print(f"[REDIS] Task {task_id} timed out")
-    return False
+def wait_for_result(task_id: str, timeout: float = DEFAULT_TIMEOUT_SEC) -> bool:
+    return wait_for_outcome(task_id, timeout)[0]
@@ -1,4 +1,5 @@
-from typing import List, Optional, TypedDict
+import uuid
+from typing import List, Optional, TypedDict, cast
 
 
 class SkillCall(TypedDict):
@@ -13,3 +14,73 @@ class ExecState(TypedDict):
     last_ok: bool
     current_task_id: Optional[str]
     outcome: Optional[str]
+    plan_id: Optional[str]
+    error: Optional[str]
+    # Pipelined dispatch: how many steps ahead to queue, which steps are
+    # already queued (seq -> task_id) and the current cancellation epoch.
+    window: int
+    queued: dict[str, str]
+    epoch: int
+    # Fleet mode: robot whose task/event streams this plan uses.
+    robot_id: Optional[str]
+    # Plan repair: the instruction and world state the plan was made for,
+    # the bridge's reason for the last failure and repairs used so far.
+    task: Optional[str]
+    world_state: Optional[dict]
+    failure: Optional[str]
+    repairs: int
+
+
+def new_exec_state(
+    plan: List[dict],
+    plan_id: Optional[str] = None,
+    window: int = 1,
+    robot_id: Optional[str] = None,
+    task: Optional[str] = None,
+    world_state: Optional[dict] = None,
+) -> ExecState:
+    return cast(
+        ExecState,
+        {
+            "plan": plan,
+            "step": 0,
+            "retries": 0,
+            "last_ok": None,
+            "outcome": None,
+            "current_task_id": None,
+            "plan_id": plan_id or str(uuid.uuid4()),
+            "error": None,
+            "window": window,
+            "queued": {},
+            "epoch": 0,
+            "robot_id": robot_id,
+            "task": task,
+            "world_state": world_state,
+            "failure": None,
+            "repairs": 0,
+        },
+    )
+
+
+class ParallelExecState(ExecState):
+    deps: List[List[int]]
+    status: List[str]
+    step_retries: List[int]
+    in_flight: dict[str, int]
+    sent_at: dict[str, float]
+
+
+def new_parallel_state(
+    plan: List[dict], deps: List[List[int]], plan_id: Optional[str] = None
+) -> ParallelExecState:
+    state = dict(new_exec_state(plan, plan_id))
+    state.update(
+        {
+            "deps": deps,
+            "status": ["PENDING"] * len(plan),
+            "step_retries": [0] * len(plan),
+            "in_flight": {},
+            "sent_at": {},
+        }
+    )
+    return cast(ParallelExecState, state)
@@ -0,0 +1,78 @@
+import queue
+import threading
+from typing import Iterable, Iterator, Optional
+
+from executor.state import SkillCall
+
+STEP_TIMEOUT_SEC = 300
+
+_DONE = object()
+
+_feeds: dict[str, "PlanFeed"] = {}
+_feeds_lock = threading.Lock()
+
+
+class PlanFeed:
+    """
+    Pulls steps from a (possibly slow) step iterator on a background thread
+    so the executor can run step N while the planner is still producing
+    step N+1.
+    """
+
+    def __init__(self, steps: Iterable[SkillCall]):
+        self._steps: Iterator[SkillCall] = iter(steps)
+        self._queue: queue.Queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self.error: Optional[str] = None
+        self._thread = threading.Thread(target=self._pump, name="plan-feed", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        try:
+            for step in self._steps:
+                if self._cancelled.is_set():
+                    break
+                self._queue.put(step)
+        except Exception as e:
+            self.error = str(e)
+            print(f"[EXECUTOR] Plan stream aborted: {e}")
+        finally:
+            close = getattr(self._steps, "close", None)
+            if close is not None:
+                close()
+            self._queue.put(_DONE)
+
+    def next_step(self, timeout: float = STEP_TIMEOUT_SEC) -> Optional[SkillCall]:
+        """Next step, or None once the stream is exhausted, failed or cancelled."""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            self.error = "Timed out waiting for the planner"
+            self.cancel()
+            return None
+        if item is _DONE:
+            self._queue.put(_DONE)
+            return None
+        return item
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+def register_feed(plan_id: str, feed: PlanFeed):
+    with _feeds_lock:
+        _feeds[plan_id] = feed
+
+
+def get_feed(plan_id: Optional[str]) -> Optional[PlanFeed]:
+    if plan_id is None:
+        return None
+    with _feeds_lock:
+        return _feeds.get(plan_id)
+
+
+def close_feed(plan_id: Optional[str]):
+    with _feeds_lock:
+        feed = _feeds.pop(plan_id, None) if plan_id else None
+    if feed is not None:
+        feed.cancel()
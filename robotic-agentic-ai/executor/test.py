@@ -1,70 +1,221 @@
-import json
+import os
 import random
+import threading
 import time
+from typing import Callable, Optional
 
 import redis
 
-r = redis.Redis(decode_responses=True)
+from executor import codec
+from redis_config import get_client
+
 
 TASK_STREAM = "robot.tasks"
 EVENT_STREAM = "robot.events"
+CONTROL_STREAM = "robot.control"
+PROGRESS_KEY = "robot.plan_progress"
 
 TASK_GROUP = "ros_bridge"
 CONSUMER = "dummy_bridge_1"
 
 EXECUTION_TIME_SEC = 2
 FAIL_PROBABILITY = 0.3  # 30% failure rate
+PREFETCH = 10
+STREAM_MAXLEN = int(os.environ.get("ROBOT_STREAM_MAXLEN", "100000"))
+# Several bridges keep a plan's steps in seq order through PROGRESS_KEY,
+# the same way the reference bridge does.
+ORDER_TIMEOUT_SEC = 120
+ORDER_POLL_SEC = 0.02
 
 
-def execute_fake_skill(task):
+class DummyBridge:
     """
-    Simulate robot execution.
+    Stand-in for the ROS 2 bridge: consumes robot.tasks in the ros_bridge
+    group, "executes" each skill and reports the outcome on robot.events.
     """
-    skill = task["skill"]
-    params = json.loads(task["params"])
-
-    print(f"[DUMMY BRIDGE] Executing skill={skill}, params={params}")
-
-    time.sleep(EXECUTION_TIME_SEC)
-
-    # Deterministic failure hook (optional)
-    if skill == "fail":
-        return False, "FORCED_FAILURE"
-
-    # Random failure
-    if random.random() < FAIL_PROBABILITY:
-        return False, "SIMULATED_FAILURE"
-
-    return True, None
-
-
-print("[DUMMY BRIDGE] Started")
-
-while True:
-    messages = r.xreadgroup(
-        TASK_GROUP, CONSUMER, {TASK_STREAM: ">"}, count=1, block=5000
-    )
 
-    for _, entries in messages:
-        for msg_id, task in entries:
-            task_id = task["task_id"]
-
-            success, reason = execute_fake_skill(task)
-
-            # ACK task
-            r.xack(TASK_STREAM, TASK_GROUP, msg_id)
-
-            # Emit result event
-            r.xadd(
+    def __init__(
+        self,
+        client: redis.Redis,
+        consumer: str = CONSUMER,
+        exec_time: Callable[[str], float] = lambda skill: EXECUTION_TIME_SEC,
+        fail_probability: float = FAIL_PROBABILITY,
+        verbose: bool = True,
+    ):
+        self.r = client
+        self.consumer = consumer
+        self.exec_time = exec_time
+        self.fail_probability = fail_probability
+        self.verbose = verbose
+        self.executed = 0
+        # plan_id -> lowest epoch still allowed to run. Steps of older
+        # epochs were queued ahead of a failure (or cancelled by the
+        # executor) and are dropped.
+        self.min_epoch: dict[str, int] = {}
+
+    def log(self, msg: str):
+        if self.verbose:
+            print(f"[DUMMY BRIDGE] {msg}")
+
+    def execute_fake_skill(self, task):
+        """
+        Simulate robot execution.
+        """
+        skill = task["skill"]
+        params = task["params"]
+
+        self.log(f"Executing skill={skill}, params={params}")
+
+        time.sleep(self.exec_time(skill))
+
+        # Deterministic failure hook (optional)
+        if skill == "fail":
+            return False, "FORCED_FAILURE"
+
+        # Random failure
+        if random.random() < self.fail_probability:
+            return False, "SIMULATED_FAILURE"
+
+        return True, None
+
+    def poll_control(self, last_id):
+        messages = self.r.xread({CONTROL_STREAM: last_id}, count=100)
+        for _, entries in messages or []:
+            for msg_id, fields in entries:
+                last_id = msg_id
+                try:
+                    msg = codec.decode(fields)
+                except ValueError as e:
+                    self.log(f"Skipping malformed control {msg_id!r}: {e}")
+                    continue
+                if msg.get("type") == "cancel":
+                    plan_id = msg["plan_id"]
+                    self.min_epoch[plan_id] = max(
+                        self.min_epoch.get(plan_id, 0), int(msg["epoch"])
+                    )
+        return last_id
+
+    def decode_task(self, msg_id, fields) -> Optional[dict]:
+        """Task of an entry, or None; malformed ones are acked and dropped."""
+        try:
+            return codec.decode(fields)
+        except ValueError as e:
+            print(f"[DUMMY BRIDGE] Dropping malformed task {msg_id!r}: {e}")
+        self.r.xack(TASK_STREAM, TASK_GROUP, msg_id)
+        return None
+
+    def is_cancelled(self, task):
+        plan_id = task.get("plan_id")
+        if not plan_id:
+            return False
+        return int(task.get("epoch", 0)) < self.min_epoch.get(plan_id, 0)
+
+    def wait_for_turn(self, task, control_id):
+        """(None when the task may run, else why it must not; last control id)."""
+        plan_id = task.get("plan_id")
+        if not plan_id or task.get("seq") in (None, ""):
+            return None, control_id
+
+        seq = int(task["seq"])
+        deadline = time.monotonic() + ORDER_TIMEOUT_SEC
+        while True:
+            control_id = self.poll_control(control_id)
+            if self.is_cancelled(task):
+                return "CANCELLED", control_id
+            done = self.r.zscore(PROGRESS_KEY, plan_id)
+            if done is None or int(done) >= seq - 1:
+                return None, control_id
+            if time.monotonic() > deadline:
+                return "ORDER_TIMEOUT", control_id
+            time.sleep(ORDER_POLL_SEC)
+
+    def handle(self, msg_id, task, control_id="0-0"):
+        """Run one task and return the last control id seen."""
+        task_id = task["task_id"]
+
+        blocked, control_id = self.wait_for_turn(task, control_id)
+        if blocked is None and self.is_cancelled(task):
+            blocked = "CANCELLED"
+        if blocked is not None:
+            status = "CANCELLED" if blocked == "CANCELLED" else "FAILED"
+            self.r.xack(TASK_STREAM, TASK_GROUP, msg_id)
+            self.r.xadd(
                 EVENT_STREAM,
-                {
-                    "task_id": task_id,
-                    "status": "SUCCESS" if success else "FAILED",
-                    "reason": reason or "",
-                },
+                codec.encode(
+                    EVENT_STREAM, {"task_id": task_id, "status": status, "reason": blocked}
+                ),
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
             )
-
-            print(
-                f"[DUMMY BRIDGE] Task {task_id} -> "
-                f"{'SUCCESS' if success else 'FAILED'}"
+            self.log(f"Task {task_id} -> {status}")
+            return control_id
+
+        started_ms = int(time.time() * 1000)
+        success, reason = self.execute_fake_skill(task)
+        self.executed += 1
+
+        # A failed plan step stops the rest of that epoch, on every bridge.
+        # Steps without a seq (the parallel executor's) are independent.
+        plan_id = task.get("plan_id")
+        ordered = plan_id and task.get("seq") not in (None, "")
+        if not success and ordered:
+            epoch = int(task.get("epoch", 0)) + 1
+            self.min_epoch[plan_id] = max(self.min_epoch.get(plan_id, 0), epoch)
+            cancel = {"type": "cancel", "plan_id": plan_id, "epoch": epoch}
+            self.r.xadd(
+                CONTROL_STREAM,
+                codec.encode(CONTROL_STREAM, cancel),
+                maxlen=STREAM_MAXLEN,
+                approximate=True,
             )
+        elif success and ordered:
+            self.r.zadd(PROGRESS_KEY, {plan_id: int(task["seq"])}, gt=True)
+
+        # ACK task
+        self.r.xack(TASK_STREAM, TASK_GROUP, msg_id)
+
+        # Emit result event
+        event = {
+            "task_id": task_id,
+            "status": "SUCCESS" if success else "FAILED",
+            "reason": reason or "",
+            "started_ms": started_ms,
+        }
+        if success:
+            event["skill"] = task["skill"]
+            event["params"] = task["params"]
+        self.r.xadd(
+            EVENT_STREAM,
+            codec.encode(EVENT_STREAM, event),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+
+        self.log(f"Task {task_id} -> {'SUCCESS' if success else 'FAILED'}")
+        return control_id
+
+    def run(self, stop: Optional[threading.Event] = None, block_ms: int = 5000):
+        self.log("Started")
+
+        latest = self.r.xrevrange(CONTROL_STREAM, count=1)
+        control_id = latest[0][0] if latest else "0-0"
+
+        while stop is None or not stop.is_set():
+            messages = self.r.xreadgroup(
+                TASK_GROUP,
+                self.consumer,
+                {TASK_STREAM: ">"},
+                count=PREFETCH,
+                block=block_ms,
+            )
+
+            for _, entries in messages:
+                for msg_id, fields in entries:
+                    control_id = self.poll_control(control_id)
+                    task = self.decode_task(msg_id, fields)
+                    if task is not None:
+                        control_id = self.handle(msg_id, task, control_id)
+
+
+if __name__ == "__main__":
+    DummyBridge(get_client()).run()
@@ -0,0 +1,91 @@
+import json
+import time
+from typing import Iterable, Optional
+
+import redis
+
+# Hash: robot_id -> JSON capabilities.
+REGISTRY_KEY = "fleet.robots"
+# Sorted set: robot_id -> unix time of the last heartbeat.
+HEARTBEAT_KEY = "fleet.heartbeat"
+HEARTBEAT_EVERY_SEC = 5
+HEARTBEAT_TTL_SEC = 15
+
+
+class RobotInfo:
+    """
+    What one robot can do. skills/workspaces of None mean "any"; slots is
+    how many plans the robot can safely run at once, whatever the number
+    of workers its bridge uses.
+    """
+
+    def __init__(
+        self,
+        robot_id: str,
+        skills: Optional[Iterable[str]] = None,
+        workspaces: Optional[Iterable[str]] = None,
+        slots: int = 1,
+    ):
+        self.robot_id = robot_id
+        self.skills = frozenset(skills) if skills is not None else None
+        self.workspaces = frozenset(workspaces) if workspaces is not None else None
+        self.slots = max(1, slots)
+
+    def can_run(self, skills: Iterable[str], workspaces: Iterable[str] = ()) -> bool:
+        if self.skills is not None and not self.skills.issuperset(skills):
+            return False
+        if self.workspaces is not None and not self.workspaces.issuperset(workspaces):
+            return False
+        return True
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "skills": sorted(self.skills) if self.skills is not None else None,
+                "workspaces": sorted(self.workspaces) if self.workspaces is not None else None,
+                "slots": self.slots,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, robot_id: str, data: str) -> "RobotInfo":
+        spec = json.loads(data)
+        return cls(robot_id, spec.get("skills"), spec.get("workspaces"), spec.get("slots", 1))
+
+
+class RobotRegistry:
+    """Robot capabilities and liveness, shared through Redis."""
+
+    def __init__(self, client: redis.Redis):
+        self.r = client
+
+    def register(self, info: RobotInfo):
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(REGISTRY_KEY, info.robot_id, info.to_json())
+        pipe.zadd(HEARTBEAT_KEY, {info.robot_id: time.time()})
+        pipe.execute()
+        print(f"[FLEET] Registered robot {info.robot_id}")
+
+    def heartbeat(self, robot_id: str):
+        self.r.zadd(HEARTBEAT_KEY, {robot_id: time.time()})
+
+    def deregister(self, robot_id: str):
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hdel(REGISTRY_KEY, robot_id)
+        pipe.zrem(HEARTBEAT_KEY, robot_id)
+        pipe.execute()
+
+    def robots(self, alive_only: bool = True) -> list[RobotInfo]:
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hgetall(REGISTRY_KEY)
+        pipe.zrangebyscore(HEARTBEAT_KEY, time.time() - HEARTBEAT_TTL_SEC, "+inf")
+        specs, alive = pipe.execute()
+
+        alive = {a.decode() if isinstance(a, bytes) else a for a in alive}
+        robots = []
+        for robot_id, data in sorted(specs.items()):
+            robot_id = robot_id.decode() if isinstance(robot_id, bytes) else robot_id
+            if alive_only and robot_id not in alive:
+                continue
+            robots.append(RobotInfo.from_json(robot_id, data))
+        return robots
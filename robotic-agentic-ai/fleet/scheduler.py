@@ -0,0 +1,258 @@
+"""
+Fleet scheduler: places queued plans on capable, idle robots.
+
+Each robot has its own task and event streams (robot.tasks.<id>,
+robot.events.<id>) served by its own bridge, which registers the robot's
+skills, workspaces and slots in the RobotRegistry. Plans wait in a FIFO
+queue; a plan goes to the alive robot with a free slot, support for every
+skill and workspace it needs and the least predicted work left (from the
+learned skill durations in executor/durations.py). Later plans may
+overtake one that has no free robot yet.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Optional
+
+import redis
+
+import telemetry
+from executor.durations import duration_model
+from executor.graph import build_executor, run_config
+from executor.redis_io import task_stream
+from executor.state import ExecState, SkillCall, new_exec_state
+from fleet.registry import RobotInfo, RobotRegistry
+from redis_config import get_client
+from verifier.skill_catalog import world_object_ids
+
+TASK_GROUP = "ros_bridge"
+# A plan no alive robot can run fails after this long.
+PLACEMENT_TIMEOUT_SEC = 60
+SCHEDULE_EVERY_SEC = 0.05
+# Pause before reading the registry again after it failed.
+REGISTRY_RETRY_SEC = 1.0
+
+
+def plan_requirements(plan: list[SkillCall], world_state: Optional[dict] = None):
+    """Skills a plan uses and workspaces of the objects it touches."""
+    skills = {step["skill_name"] for step in plan}
+    workspaces = set()
+    if world_state:
+        ids = world_object_ids(world_state)
+        touched = {v for step in plan for v in step["arguments"].values() if v in ids}
+        for value in world_state.values():
+            if not isinstance(value, list):
+                continue
+            for obj in value:
+                if not isinstance(obj, dict) or not obj.get("workspace"):
+                    continue
+                if touched & {v for k, v in obj.items() if k.endswith("_id")}:
+                    workspaces.add(obj["workspace"])
+    return skills, workspaces
+
+
+class QueuedPlan:
+    __slots__ = ("plan", "skills", "workspaces", "makespan", "future", "queued_at")
+
+    def __init__(self, plan: list[SkillCall], world_state: Optional[dict]):
+        self.plan = plan
+        self.skills, self.workspaces = plan_requirements(plan, world_state)
+        self.makespan = duration_model.predict_makespan(plan)
+        self.future: Future = Future()
+        self.queued_at = time.monotonic()
+
+
+class FleetScheduler:
+    def __init__(
+        self,
+        registry: Optional[RobotRegistry] = None,
+        executor=None,
+        window: int = 1,
+        client: Optional[redis.Redis] = None,
+    ):
+        self.client = client or get_client(decode_responses=True)
+        self.registry = registry or RobotRegistry(self.client)
+        self.executor = executor or build_executor()
+        self.window = window
+
+        self._queue: deque[QueuedPlan] = deque()
+        self._cond = threading.Condition()
+        self._running: Counter = Counter()
+        self._started_at: dict[str, list[float]] = {}
+        # robot_id -> predicted finish (monotonic) of each running plan
+        self._finish_at: dict[str, list[float]] = {}
+        self._busy_sec: Counter = Counter()
+        self._completed: Counter = Counter()
+        self._failed: Counter = Counter()
+        self._slots: dict[str, int] = {}
+        self._since = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._since = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="fleet-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, plan: list[SkillCall], world_state: Optional[dict] = None) -> Future:
+        """Queue a validated plan; the future resolves to its final ExecState."""
+        queued = QueuedPlan(plan, world_state)
+        with self._cond:
+            self._queue.append(queued)
+            self._cond.notify_all()
+        self.start()
+        return queued.future
+
+    def remaining_work(self, robot_id: str) -> float:
+        """Predicted seconds until the robot's running plans are done."""
+        now = time.monotonic()
+        return sum(max(0.0, t - now) for t in self._finish_at.get(robot_id, []))
+
+    def _load(self, robot: RobotInfo) -> float:
+        return self.remaining_work(robot.robot_id) / robot.slots
+
+    def place(self, queued: QueuedPlan, robots: list[RobotInfo]) -> Optional[RobotInfo]:
+        """Capable robot with a free slot and the least work left, or None."""
+        free = [
+            robot
+            for robot in robots
+            if robot.can_run(queued.skills, queued.workspaces)
+            and self._running[robot.robot_id] < robot.slots
+        ]
+        if not free:
+            return None
+        return min(
+            free,
+            key=lambda robot: (
+                self._load(robot),
+                self._running[robot.robot_id] / robot.slots,
+                self._completed[robot.robot_id],
+            ),
+        )
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                robots = self.registry.robots()
+            except (redis.RedisError, ValueError) as e:
+                print(f"[FLEET] Could not read the robot registry: {e}")
+                self._expire_queued(e)
+                self._stop.wait(REGISTRY_RETRY_SEC)
+                continue
+            with self._cond:
+                for robot in robots:
+                    self._slots[robot.robot_id] = robot.slots
+                for queued in list(self._queue):
+                    robot = self.place(queued, robots)
+                    if robot is not None:
+                        self._queue.remove(queued)
+                        started = time.monotonic()
+                        self._running[robot.robot_id] += 1
+                        self._started_at.setdefault(robot.robot_id, []).append(started)
+                        self._finish_at.setdefault(robot.robot_id, []).append(
+                            started + queued.makespan
+                        )
+                        threading.Thread(
+                            target=self._run, args=(queued, robot.robot_id, started), daemon=True
+                        ).start()
+                    elif time.monotonic() - queued.queued_at > PLACEMENT_TIMEOUT_SEC and not any(
+                        r.can_run(queued.skills, queued.workspaces) for r in robots
+                    ):
+                        self._queue.remove(queued)
+                        queued.future.set_exception(
+                            ValueError(
+                                f"No robot supports skills {sorted(queued.skills)} "
+                                f"in workspaces {sorted(queued.workspaces)}"
+                            )
+                        )
+                self._cond.wait(SCHEDULE_EVERY_SEC)
+
+    def _expire_queued(self, error: Exception):
+        """Fail plans that waited longer than PLACEMENT_TIMEOUT_SEC with `error`."""
+        now = time.monotonic()
+        with self._cond:
+            expired = [q for q in self._queue if now - q.queued_at > PLACEMENT_TIMEOUT_SEC]
+            for queued in expired:
+                self._queue.remove(queued)
+        for queued in expired:
+            queued.future.set_exception(error)
+
+    def _run(self, queued: QueuedPlan, robot_id: str, started: float):
+        print(f"[FLEET] Plan of {len(queued.plan)} steps -> robot {robot_id}")
+        final: Optional[ExecState] = None
+        error: Optional[Exception] = None
+        try:
+            state = new_exec_state(queued.plan, window=self.window, robot_id=robot_id)
+            final = self.executor.invoke(state, run_config(len(queued.plan), state["plan_id"]))
+        except Exception as e:
+            error = e
+
+        with self._cond:
+            self._running[robot_id] -= 1
+            self._started_at[robot_id].remove(started)
+            self._finish_at[robot_id].remove(started + queued.makespan)
+            self._busy_sec[robot_id] += time.monotonic() - started
+            if final is not None and final.get("outcome") == "SUCCESS":
+                self._completed[robot_id] += 1
+            else:
+                self._failed[robot_id] += 1
+            self._cond.notify_all()
+
+        if error is not None:
+            queued.future.set_exception(error)
+        else:
+            queued.future.set_result(final)
+
+    def queue_depth(self, robot_id: str) -> int:
+        """Tasks in the robot's stream that its bridge has not acknowledged."""
+        try:
+            groups = self.client.xinfo_groups(task_stream(robot_id))
+        except redis.ResponseError:
+            return 0
+        for group in groups:
+            if group["name"] == TASK_GROUP:
+                return int(group.get("pending") or 0) + int(group.get("lag") or 0)
+        return 0
+
+    def stats(self) -> dict:
+        """Per-robot load, also published as gauges on /metrics."""
+        now = time.monotonic()
+        elapsed = max(now - self._since, 1e-9)
+        with self._cond:
+            robots = sorted(set(self._slots) | set(self._running))
+            waiting = len(self._queue)
+            snapshot = {
+                robot_id: {
+                    "running": self._running[robot_id],
+                    "completed": self._completed[robot_id],
+                    "failed": self._failed[robot_id],
+                    "busy_s": self._busy_sec[robot_id]
+                    + sum(now - t for t in self._started_at.get(robot_id, [])),
+                    "slots": self._slots.get(robot_id, 1),
+                    "remaining_s": self.remaining_work(robot_id),
+                }
+                for robot_id in robots
+            }
+
+        for robot_id, s in snapshot.items():
+            s["queue_depth"] = self.queue_depth(robot_id)
+            s["utilization"] = s["busy_s"] / (elapsed * s["slots"])
+            telemetry.set_gauge("fleet_queue_depth", s["queue_depth"], robot=robot_id)
+            telemetry.set_gauge("fleet_utilization", s["utilization"], robot=robot_id)
+            telemetry.set_gauge("fleet_running_plans", s["running"], robot=robot_id)
+            telemetry.set_gauge("fleet_remaining_seconds", s["remaining_s"], robot=robot_id)
+        telemetry.set_gauge("fleet_waiting_plans", waiting)
+        return {"waiting": waiting, "robots": snapshot}
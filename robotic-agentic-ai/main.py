@@ -1,41 +1,96 @@
 import json
-from typing import cast
+import sys
+import uuid
 
-from executor.graph import build_executor
-from executor.state import ExecState
-from planner.planner import plan
+import telemetry
+from executor.async_graph import execute_plans
+from executor.dag import build_step_dag
+from executor.checkpoint import RedisCheckpointSaver
+from executor.graph import build_executor, resume_plan, run_config
+from executor.parallel import build_parallel_executor
+from executor.state import new_exec_state, new_parallel_state
+from executor.streaming import PlanFeed, register_feed
+from planner.planner import Planner, get_planner, repair_plan
 from verifier.skill_validator import check_skills_validity
+from world.store import load_world_state
 
 
-def load_world_state():
-    with open("planner/world_state.json") as f:
-        return json.load(f)
+# Steps queued ahead at the bridge in --pipeline mode.
+DISPATCH_WINDOW = 4
+# Upper bound used for the graph recursion limit of streamed plans.
+MAX_STREAMED_STEPS = 100
+
+
+def run_streaming(task: str, world_state: dict):
+    """Start executing step 0 while the planner is still generating the rest."""
+    plan_id = str(uuid.uuid4())
+    planner = get_planner()
+    register_feed(plan_id, PlanFeed(planner.plan_stream(task, world_state)))
+
+    executor = build_executor(repairer=planner.repair)
+    final_state = executor.invoke(
+        new_exec_state([], plan_id, task=task, world_state=world_state),
+        run_config(MAX_STREAMED_STEPS),
+    )
+
+    if not final_state["plan"] and not final_state.get("error"):
+        print("[PLANNER] Task is infeasible; nothing was executed.")
+    return final_state
 
 
 def main():
 
-    world_state = load_world_state()
+    if "--metrics" in sys.argv:
+        telemetry.start_metrics_server()
+
+    checkpointer = None
+    if "--checkpoint" in sys.argv or "--resume" in sys.argv:
+        checkpointer = RedisCheckpointSaver()
+
+    if "--resume" in sys.argv:
+        plan_id = sys.argv[sys.argv.index("--resume") + 1]
+        if resume_plan(build_executor(checkpointer, repair_plan), plan_id) is None:
+            print(f"[EXECUTOR] No checkpoint for plan {plan_id}")
+        return
+
+    world_state = load_world_state("--live-world" in sys.argv)
     tests=["pick and place the tube_1 from ground and place it on a table "]
-    action_plan = plan(tests[0], world_state)
+
+    if "--stream" in sys.argv:
+        run_streaming(tests[0], world_state)
+        return
+
+    planner = Planner(hedge=True) if "--hedge" in sys.argv else get_planner()
+    action_plan = planner.plan(tests[0], world_state)
     print(json.dumps(action_plan, indent=2))
-    action_plan = check_skills_validity(action_plan)
+    action_plan = check_skills_validity(action_plan, world_state)
     print("\n\n\nValidated Action Plan:")
     print(json.dumps(action_plan, indent=2))
-    
-    initial_state = cast(
-        ExecState,
-        {
-            "plan": action_plan,
-            "step": 0,
-            "retries": 0,
-            "last_ok": None,
-            "outcome": None,
-            "current_task_id": None,
-        },
+
+    if "--parallel" in sys.argv:
+        initial_state = new_parallel_state(action_plan, build_step_dag(action_plan))
+        build_parallel_executor().invoke(initial_state, run_config(len(action_plan)))
+        return
+
+    window = DISPATCH_WINDOW if "--pipeline" in sys.argv else 1
+
+    if "--async" in sys.argv:
+        execute_plans([action_plan], window)
+        return
+
+    initial_state = new_exec_state(
+        action_plan, window=window, task=tests[0], world_state=world_state
+    )
+    executor = build_executor(checkpointer, repairer=planner.repair)
+    if checkpointer is not None:
+        print(f"[EXECUTOR] Checkpointing plan {initial_state['plan_id']}")
+
+    executor.invoke(
+        initial_state, run_config(len(action_plan), initial_state["plan_id"])
     )
-    executor = build_executor()
 
-    executor.invoke(initial_state)
+    if "--metrics" in sys.argv:
+        print(json.dumps(telemetry.snapshot(), indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+Hedged planning: the same prompt goes to several model backends at once,
+and the first response that parses and passes check_skills_validity wins.
+The other requests are cancelled, which closes their HTTP streams.
+
+Per-backend latency and win/valid rates are kept in Redis so short-lived
+processes still learn from earlier runs. Each request hedges across the
+`fanout` backends with the best expected latency per valid plan; backends
+with too few samples are tried first so their stats stay current.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+import httpx
+import redis
+from langchain_ollama import ChatOllama
+
+import telemetry
+from executor.state import SkillCall
+from verifier.skill_validator import check_skills_validity
+
+STATS_PREFIX = "planner.hedge"
+HEDGE_FANOUT = 2
+HEDGE_TIMEOUT_SEC = 300
+# Backends with fewer attempts than this are always hedged.
+MIN_SAMPLES = 5
+# Weight of the newest latency in the moving average.
+LATENCY_ALPHA = 0.2
+
+
+class Backend:
+    """One named chat model; `params` also keys the plan cache."""
+
+    def __init__(self, name: str, params: dict, model=None):
+        self.name = name
+        self.params = params
+        self.model = model
+
+    @classmethod
+    def ollama(cls, name: str, params: dict, keep_alive: str, num_ctx: int, limits: httpx.Limits):
+        model = ChatOllama(
+            **params,
+            keep_alive=keep_alive,
+            num_ctx=num_ctx,
+            client_kwargs={"limits": limits},
+        )
+        return cls(name, params, model)
+
+
+class BackendStats:
+    __slots__ = ("attempts", "wins", "valid", "errors", "latency")
+
+    def __init__(self, attempts=0, wins=0, valid=0, errors=0, latency=None):
+        self.attempts = attempts
+        self.wins = wins
+        self.valid = valid
+        self.errors = errors
+        self.latency = latency
+
+    def score(self) -> float:
+        """Expected seconds per valid plan; lower is better."""
+        if self.latency is None:
+            return 0.0
+        valid_rate = (self.valid + 1) / (self.attempts + 2)
+        return self.latency / valid_rate
+
+    def as_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "wins": self.wins,
+            "valid": self.valid,
+            "errors": self.errors,
+            "latency_s": self.latency,
+            "win_rate": self.wins / self.attempts if self.attempts else 0.0,
+        }
+
+
+def parse_plan(text: str) -> list[SkillCall]:
+    plan = json.loads(text.strip())
+    if not isinstance(plan, list):
+        raise ValueError(f"Expected a JSON list of skill calls, got {type(plan).__name__}")
+    return plan
+
+
+class HedgedPlanner:
+    """
+    Races backends on one private event loop, so the async model clients
+    and their connection pools are reused across calls from any thread.
+    """
+
+    def __init__(
+        self,
+        backends: list[Backend],
+        client: Optional[redis.Redis] = None,
+        fanout: int = HEDGE_FANOUT,
+        timeout: float = HEDGE_TIMEOUT_SEC,
+    ):
+        if not backends:
+            raise ValueError("Hedged planning needs at least one backend")
+        if len({b.name for b in backends}) != len(backends):
+            raise ValueError("Backend names must be unique")
+        self.backends = {b.name: b for b in backends}
+        self.client = client
+        self.fanout = fanout
+        self.timeout = timeout
+        self.stats = {name: BackendStats() for name in self.backends}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def cache_params(self) -> dict:
+        return {"hedge": {name: b.params for name, b in sorted(self.backends.items())}}
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="hedged-planner", daemon=True
+                ).start()
+            return self._loop
+
+    # ---- stats ----
+
+    def load_stats(self):
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for name in self.backends:
+                pipe.hgetall(f"{STATS_PREFIX}:{name}")
+            rows = pipe.execute()
+        except redis.RedisError as e:
+            print(f"[PLANNER] Hedge stats lookup failed: {e}")
+            return
+        with self._lock:
+            for name, row in zip(self.backends, rows):
+                row = {(k.decode() if isinstance(k, bytes) else k): v for k, v in row.items()}
+                self.stats[name] = BackendStats(
+                    int(row.get("attempts", 0)),
+                    int(row.get("wins", 0)),
+                    int(row.get("valid", 0)),
+                    int(row.get("errors", 0)),
+                    float(row["latency"]) if "latency" in row else None,
+                )
+
+    def _record(self, name: str, seconds: Optional[float], valid: bool, won: bool, error: bool):
+        with self._lock:
+            s = self.stats[name]
+            s.attempts += 1
+            s.wins += won
+            s.valid += valid
+            s.errors += error
+            if seconds is not None:
+                s.latency = (
+                    seconds
+                    if s.latency is None
+                    else (1 - LATENCY_ALPHA) * s.latency + LATENCY_ALPHA * seconds
+                )
+            latency = s.latency
+            win_rate = s.wins / s.attempts
+
+        if seconds is not None:
+            telemetry.observe("span", "llm.hedge", seconds, backend=name, valid=valid, won=won)
+        telemetry.set_gauge("planner_hedge_win_rate", win_rate, backend=name)
+        if self.client is None:
+            return
+        try:
+            key = f"{STATS_PREFIX}:{name}"
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hincrby(key, "attempts", 1)
+            for field, flag in (("wins", won), ("valid", valid), ("errors", error)):
+                if flag:
+                    pipe.hincrby(key, field, 1)
+            if latency is not None:
+                pipe.hset(key, "latency", latency)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[PLANNER] Hedge stats update failed: {e}")
+
+    def choose(self) -> list[str]:
+        """Backends to race: unsampled ones plus the best scorers, up to fanout."""
+        with self._lock:
+            ranked = sorted(self.backends, key=lambda n: self.stats[n].score())
+            cold = [n for n in ranked if self.stats[n].attempts < MIN_SAMPLES]
+        chosen = cold[: self.fanout]
+        chosen += [n for n in ranked if n not in chosen][: max(0, self.fanout - len(chosen))]
+        return chosen
+
+    # ---- racing ----
+
+    async def _attempt(self, name: str, messages, world_state: dict):
+        start = time.perf_counter()
+        res = await self.backends[name].model.ainvoke(messages)
+        plan = parse_plan(str(res.content))
+        if plan:
+            check_skills_validity(plan, world_state)
+        return name, plan, time.perf_counter() - start
+
+    async def _race(self, names: list[str], messages, world_state: dict):
+        tasks = {
+            asyncio.ensure_future(self._attempt(name, messages, world_state)): name
+            for name in names
+        }
+        started = time.perf_counter()
+        infeasible: Optional[str] = None
+        errors: list[str] = []
+        winner = None
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    errors.append(f"timed out after {self.timeout}s")
+                    break
+                for task in done:
+                    name = tasks[task]
+                    try:
+                        _, plan, seconds = task.result()
+                    except Exception as e:
+                        self._record(name, time.perf_counter() - started, False, False, True)
+                        errors.append(f"{name}: {e}")
+                        print(f"[PLANNER] Backend {name} gave no valid plan: {e}")
+                        continue
+                    if not plan:
+                        # An infeasibility verdict only wins if nobody finds a plan.
+                        self._record(name, seconds, True, False, False)
+                        infeasible = infeasible or name
+                    elif winner is None:
+                        self._record(name, seconds, True, True, False)
+                        winner = (name, plan, seconds)
+                    else:
+                        self._record(name, seconds, True, False, False)
+        finally:
+            for task in pending:
+                task.cancel()
+                # A lost race counts as an invalid attempt at least this slow.
+                self._record(tasks[task], time.perf_counter() - started, False, False, False)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is not None:
+            return winner
+        if infeasible is not None:
+            return infeasible, [], time.perf_counter() - started
+        raise ValueError("No backend produced a valid plan:\n" + "\n".join(errors))
+
+    def plan(self, messages, world_state: dict) -> list[SkillCall]:
+        """Validated plan from the fastest backend, [] if all say infeasible."""
+        self.load_stats()
+        names = self.choose()
+        print(f"[PLANNER] Hedging across {', '.join(names)}")
+        future = asyncio.run_coroutine_threadsafe(
+            self._race(names, messages, world_state), self._event_loop()
+        )
+        name, plan, seconds = future.result()
+        print(f"[PLANNER] {name} won in {seconds:.2f}s with {len(plan)} steps")
+        return plan
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: s.as_dict() for name, s in self.stats.items()}
+
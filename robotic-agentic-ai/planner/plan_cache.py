@@ -0,0 +1,116 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+
+from executor.state import SkillCall
+
+CACHE_PREFIX = "planner.plan_cache"
+CACHE_TTL_SEC = 7 * 24 * 3600
+LRU_SIZE = 256
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_task(task: str) -> str:
+    return " ".join(task.lower().split())
+
+
+def hash_json(obj) -> str:
+    return _digest(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode())
+
+
+def plan_key(task: str, catalog_hash: str, world_hash: str, model_params: dict) -> str:
+    parts = [normalize_task(task), catalog_hash, world_hash, hash_json(model_params)]
+    return _digest("\x1f".join(parts).encode())
+
+
+class PlanCache:
+    """
+    Two-level cache of validated plans: an in-process LRU in front of a
+    Redis hash per (catalog, world state) generation. Changing either hash
+    moves lookups to a new Redis key, and the stale one expires via TTL.
+    """
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        maxsize: int = LRU_SIZE,
+        ttl: int = CACHE_TTL_SEC,
+    ):
+        self.client = client
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: OrderedDict[str, list[SkillCall]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _redis_key(catalog_hash: str, world_hash: str) -> str:
+        return f"{CACHE_PREFIX}:{catalog_hash[:16]}:{world_hash[:16]}"
+
+    def get(self, key: str, catalog_hash: str, world_hash: str) -> Optional[list[SkillCall]]:
+        """A copy of the cached plan, so callers may change it freely."""
+        with self._lock:
+            cached = self._lru.get(key)
+            if cached is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(cached)
+
+        raw = None
+        if self.client is not None:
+            try:
+                raw = self.client.hget(self._redis_key(catalog_hash, world_hash), key)
+            except redis.RedisError as e:
+                print(f"[PLAN CACHE] Redis lookup failed: {e}")
+
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.redis_hits += 1
+
+        plan = json.loads(raw)
+        self._remember(key, plan)
+        return plan
+
+    def put(self, key: str, catalog_hash: str, world_hash: str, plan: list[SkillCall]):
+        """Store a plan. Callers must only pass plans that passed validation."""
+        self._remember(key, plan)
+
+        if self.client is None:
+            return
+        rkey = self._redis_key(catalog_hash, world_hash)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(rkey, key, json.dumps(plan))
+            pipe.expire(rkey, self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[PLAN CACHE] Redis store failed: {e}")
+
+    def _remember(self, key: str, plan: list[SkillCall]):
+        plan = copy.deepcopy(plan)
+        with self._lock:
+            self._lru[key] = plan
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "size": len(self._lru),
+            }
@@ -1,6 +1,11 @@
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
 
-import yaml
+import httpx
+import ollama
 # from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage
 # from langchain_google_genai import ChatGoogleGenerativeAI
@@ -8,72 +13,392 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_ollama import ChatOllama
 # from langchain_openai import ChatOpenAI
 
+import telemetry
 from executor.state import SkillCall
-from planner.prompt import PLANNER_PROMPT
+from planner.hedge import Backend, HedgedPlanner, parse_plan
+from planner.plan_cache import PlanCache, hash_json, plan_key
+from planner.projection import estimate_tokens, project
+from planner.prompt import build_repair_prompt, build_request_suffix, build_static_prefix
+from planner.stream_parser import IncrementalPlanParser
+from planner.symbolic import symbolic_plan
+from redis_config import get_client
+from verifier.skill_catalog import SkillCatalog, get_catalog
+from verifier.skill_validator import check_skill_call, check_skills_validity
 
 # load_dotenv()
 
+MODEL_PARAMS = {
+    "model": "gpt-oss:20b",
+    "base_url": "http://10.11.51.217:11434",
+    "temperature": 0,
+    "reasoning": True,
+    "reasoning_effort": "high",
+}
+
+# How long Ollama keeps the model resident after the last request.
+KEEP_ALIVE = "30m"
+# Fixed context size; changing it per request forces a model reload and
+# throws away the cached prompt prefix.
+NUM_CTX = 16384
+MAX_CONCURRENCY = 4
+
+# Send only task-relevant skills and objects to the model.
+PROJECT_PROMPTS = False
+# Plan routine instructions symbolically and only ask the model otherwise.
+SYMBOLIC_FAST_PATH = True
+# Race the same prompt across these backends and keep the first valid plan.
+# Any Ollama-served model can stand in for a hosted one.
+HEDGED_PLANNING = False
+HEDGE_BACKENDS = {
+    "gpt-oss-high": MODEL_PARAMS,
+    "gpt-oss-low": {**MODEL_PARAMS, "reasoning_effort": "low"},
+    "qwen-local": {
+        "model": "qwen2.5:7b-instruct",
+        "base_url": "http://localhost:11434",
+        "temperature": 0,
+    },
+}
+
+plan_cache = PlanCache(get_client(decode_responses=True))
+
 
 def load_skills():
-    with open("planner/skills.yaml") as f:
-        return yaml.safe_load(f)
-
-
-def plan(task: str, world_state: dict) -> list[SkillCall]:
-    skills = load_skills()
-
-    model = ChatOllama(
-        model="gpt-oss:20b",
-        base_url="http://10.11.51.217:11434",
-        temperature=0,
-        reasoning=True,
-        reasoning_effort="high",
-    )
-
-    # model = ChatGoogleGenerativeAI(
-    #     model="gemini-2.5-flash",
-    #     temperature=1.0,
-    #     max_tokens=None,
-    #     timeout=None,
-    #     max_retries=2,
-    # )
-
-    # model = ChatGroq(
-    #     model="openai/gpt-oss-20b",
-    #     temperature=0,
-    #     max_tokens=None,
-    #     timeout=None,
-    #     max_retries=2,
-    #     reasoning_effort="medium",
-    # )
-
-    # model = ChatOpenAI(
-    #     model="gpt-5-nano-2025-08-07",
-    #     stream_usage=True,
-    #     temperature=None,
-    #     # max_tokens=None,
-    #     timeout=None,
-    #     reasoning={"effort": "medium", "summary": "detailed"},
-    #     max_retries=2,
-    #     # api_key="...",  # If you prefer to pass api key in directly
-    #     # base_url="...",
-    #     # organization="...",
-    #     # other params...
-    # )
-
-    formatted_prompt = PLANNER_PROMPT.format(
-        skills=json.dumps(skills, indent=0),
-        task=task,
-        world_state=json.dumps(world_state, indent=0),
-    )
-
-    messages = [
-        SystemMessage(content=formatted_prompt),
-        HumanMessage(content=f"Please generate the plan for the task: {task}"),
-    ]
-
-    res = model.invoke(messages)
-    print(res + "\n\n\n\n")
-    response_text = str(res.content).strip()
-
-    return json.loads(response_text)
+    return get_catalog().raw
+
+
+class Planner:
+    """
+    Long-lived planner that owns one pooled Ollama client and the parsed
+    skill catalog, so repeated instructions skip connection setup and
+    model cold starts.
+    """
+
+    def __init__(
+        self,
+        model_params: Optional[dict] = None,
+        keep_alive: str = KEEP_ALIVE,
+        max_concurrency: int = MAX_CONCURRENCY,
+        preload: bool = True,
+        cache: Optional[PlanCache] = plan_cache,
+        catalog: Optional[SkillCatalog] = None,
+        project_prompts: bool = PROJECT_PROMPTS,
+        symbolic: bool = SYMBOLIC_FAST_PATH,
+        hedge: bool = HEDGED_PLANNING,
+        hedge_backends: Optional[dict[str, dict]] = None,
+    ):
+        self.model_params = dict(model_params or MODEL_PARAMS)
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.catalog = catalog or get_catalog()
+        self.project_prompts = project_prompts
+        self.symbolic = symbolic
+        self._prefix: tuple[str, str] = ("", "")
+
+        # One httpx pool shared by every request from this planner.
+        limits = httpx.Limits(
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_concurrency,
+        )
+        self.model = ChatOllama(
+            **self.model_params,
+            keep_alive=keep_alive,
+            num_ctx=NUM_CTX,
+            client_kwargs={"limits": limits},
+        )
+
+        self.hedger: Optional[HedgedPlanner] = None
+        if hedge:
+            self.hedger = HedgedPlanner(
+                [
+                    Backend.ollama(name, params, keep_alive, NUM_CTX, limits)
+                    for name, params in (hedge_backends or HEDGE_BACKENDS).items()
+                ],
+                cache.client if cache is not None else None,
+            )
+
+        # model = ChatGoogleGenerativeAI(
+        #     model="gemini-2.5-flash",
+        #     temperature=1.0,
+        #     max_tokens=None,
+        #     timeout=None,
+        #     max_retries=2,
+        # )
+
+        # model = ChatGroq(
+        #     model="openai/gpt-oss-20b",
+        #     temperature=0,
+        #     max_tokens=None,
+        #     timeout=None,
+        #     max_retries=2,
+        #     reasoning_effort="medium",
+        # )
+
+        # model = ChatOpenAI(
+        #     model="gpt-5-nano-2025-08-07",
+        #     stream_usage=True,
+        #     temperature=None,
+        #     # max_tokens=None,
+        #     timeout=None,
+        #     reasoning={"effort": "medium", "summary": "detailed"},
+        #     max_retries=2,
+        #     # api_key="...",  # If you prefer to pass api key in directly
+        #     # base_url="...",
+        #     # organization="...",
+        #     # other params...
+        # )
+
+        if preload:
+            self.preload()
+
+    def preload(self):
+        """Ask Ollama to load the model now and keep it resident."""
+        try:
+            ollama.Client(host=self.model_params["base_url"]).generate(
+                model=self.model_params["model"],
+                prompt="",
+                keep_alive=self.keep_alive,
+            )
+        except (httpx.HTTPError, ollama.ResponseError, ConnectionError) as e:
+            # ollama raises the builtin ConnectionError when the server is
+            # down; the symbolic fast path and the plan cache still work.
+            print(f"[PLANNER] Model preload failed: {e}")
+
+    @property
+    def skills(self) -> dict:
+        return self.catalog.prompt_skills()
+
+    @property
+    def catalog_hash(self) -> str:
+        self.catalog.refresh()
+        return self.catalog.hash
+
+    def static_prefix(self) -> str:
+        """Rules and catalog, rebuilt only when the catalog changes."""
+        catalog_hash = self.catalog_hash
+        if self._prefix[0] != catalog_hash:
+            skills_json = json.dumps(self.skills, indent=0)
+            self._prefix = (catalog_hash, build_static_prefix(skills_json))
+        return self._prefix[1]
+
+    @property
+    def cache_params(self) -> dict:
+        """Model settings that plan cache keys depend on."""
+        return self.hedger.cache_params if self.hedger is not None else self.model_params
+
+    def _messages(self, task: str, world_state: dict, projected: bool = False):
+        if projected:
+            # Only the world state is projected; the catalog lives in the
+            # cached prefix, where it is effectively free after first use.
+            projected_world = project(task, world_state, self.catalog).world_state
+            before = estimate_tokens(json.dumps(world_state, indent=0))
+            after = estimate_tokens(json.dumps(projected_world, indent=0))
+            print(f"[PLANNER] World state projection: ~{before} -> ~{after} tokens")
+            world_state = projected_world
+
+        return [
+            SystemMessage(content=self.static_prefix()),
+            HumanMessage(
+                content=build_request_suffix(json.dumps(world_state, indent=0), task)
+            ),
+        ]
+
+    def _invoke(self, task: str, world_state: dict, projected: bool) -> list[SkillCall]:
+        with telemetry.span("llm", projected=projected):
+            res = self.model.invoke(self._messages(task, world_state, projected))
+
+        usage = getattr(res, "usage_metadata", None)
+        if usage:
+            print(f"[PLANNER] Prompt tokens: {usage.get('input_tokens')}")
+
+        response_text = str(res.content).strip()
+        return json.loads(response_text)
+
+    def _model_plan(self, task: str, world_state: dict, projected: bool) -> list[SkillCall]:
+        if self.hedger is None:
+            return self._invoke(task, world_state, projected)
+        with telemetry.span("llm", projected=projected, hedged=True):
+            return self.hedger.plan(self._messages(task, world_state, projected), world_state)
+
+    def _stream(
+        self, task: str, world_state: dict, projected: bool, steps: list[SkillCall]
+    ) -> Iterator[SkillCall]:
+        parser = IncrementalPlanParser()
+        start = time.perf_counter()
+
+        for chunk in self.model.stream(self._messages(task, world_state, projected)):
+            for skill_call in parser.feed(str(chunk.content)):
+                check_skill_call(len(steps), skill_call, world_state)
+                if not steps:
+                    telemetry.observe("span", "llm.first_step", time.perf_counter() - start)
+                steps.append(skill_call)
+                print(f"[PLANNER] Streamed step {len(steps) - 1}: {skill_call['skill_name']}")
+                yield skill_call
+
+        parser.finish()
+        telemetry.observe("span", "llm.stream", time.perf_counter() - start, steps=len(steps))
+
+    def plan(self, task: str, world_state: dict, use_cache: bool = True) -> list[SkillCall]:
+        with telemetry.span("plan", task=task):
+            return self._plan(task, world_state, use_cache)
+
+    def _symbolic(self, task: str, world_state: dict) -> Optional[list[SkillCall]]:
+        if not self.symbolic:
+            return None
+        return symbolic_plan(task, world_state, self.catalog)
+
+    def _plan(self, task: str, world_state: dict, use_cache: bool) -> list[SkillCall]:
+        result = self._symbolic(task, world_state)
+        if result is not None:
+            return result
+
+        catalog_hash = self.catalog_hash
+        world_hash = hash_json(world_state)
+        key = plan_key(task, catalog_hash, world_hash, self.cache_params)
+
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(key, catalog_hash, world_hash)
+            if cached is not None:
+                print(f"[PLANNER] Plan cache hit {self.cache.stats()}")
+                return cached
+
+        result = self._model_plan(task, world_state, self.project_prompts)
+
+        if not result and self.project_prompts:
+            print("[PLANNER] Projected prompt gave no plan; retrying with full state")
+            result = self._model_plan(task, world_state, False)
+
+        if use_cache:
+            self._cache_valid(key, catalog_hash, world_hash, result, world_state)
+        return result
+
+    def _cache_valid(
+        self, key: str, catalog_hash: str, world_hash: str, plan: list, world_state: dict
+    ):
+        # Only plans that pass validation are cached; [] means "infeasible".
+        if self.cache is None or not plan:
+            return
+        try:
+            check_skills_validity(plan, world_state)
+        except ValueError as e:
+            print(f"[PLANNER] Not caching invalid plan: {e}")
+        else:
+            self.cache.put(key, catalog_hash, world_hash, plan)
+
+    def plan_stream(
+        self, task: str, world_state: dict, use_cache: bool = True
+    ) -> Iterator[SkillCall]:
+        """
+        Yield validated steps while the model is still generating.
+
+        Raises ValueError as soon as a step fails validation; steps already
+        yielded stay valid, and the caller is expected to stop executing.
+        """
+        symbolic = self._symbolic(task, world_state)
+        if symbolic is not None:
+            yield from symbolic
+            return
+
+        catalog_hash = self.catalog_hash
+        world_hash = hash_json(world_state)
+        key = plan_key(task, catalog_hash, world_hash, self.cache_params)
+
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(key, catalog_hash, world_hash)
+            if cached is not None:
+                print(f"[PLANNER] Plan cache hit {self.cache.stats()}")
+                yield from cached
+                return
+
+        steps: list[SkillCall] = []
+        yield from self._stream(task, world_state, self.project_prompts, steps)
+
+        if not steps and self.project_prompts:
+            print("[PLANNER] Projected prompt gave no plan; retrying with full state")
+            yield from self._stream(task, world_state, False, steps)
+
+        # Streaming always uses self.model; with hedging on, the key names
+        # the hedged backends, so only plan() fills it.
+        if use_cache and self.hedger is None:
+            self._cache_valid(key, catalog_hash, world_hash, steps, world_state)
+
+    def repair(
+        self,
+        task: str,
+        world_state: dict,
+        completed: list[SkillCall],
+        failed: SkillCall,
+        reason: Optional[str],
+    ) -> list[SkillCall]:
+        """
+        Validated steps that finish `task` after `failed` did not succeed;
+        `world_state` already reflects `completed`. [] if it cannot be done.
+        """
+        # Keep what the task and the failed step mention.
+        focus = " ".join([task, *map(str, failed["arguments"].values())])
+        projection = project(focus, world_state, self.catalog)
+        skill_names = [s["name"] for s in projection.skills["skills"]] + [failed["skill_name"]]
+
+        compact = {"separators": (",", ":")}
+        prompt = build_repair_prompt(
+            json.dumps(self.catalog.prompt_skills(skill_names), **compact),
+            json.dumps(projection.world_state, **compact),
+            task,
+            json.dumps(completed, **compact),
+            json.dumps(failed, **compact),
+            reason or "unknown",
+        )
+        full = estimate_tokens(self.static_prefix()) + estimate_tokens(
+            json.dumps(world_state, indent=0)
+        )
+        print(f"[PLANNER] Repair prompt ~{estimate_tokens(prompt)} tokens (full plan ~{full})")
+
+        messages = [HumanMessage(content=prompt)]
+        with telemetry.span("plan.repair", task=task, completed=len(completed)):
+            if self.hedger is not None:
+                return self.hedger.plan(messages, world_state)
+            res = self.model.invoke(messages)
+        try:
+            suffix = parse_plan(str(res.content))
+        except ValueError as e:
+            raise ValueError(f"Repair response is not a plan: {e}") from e
+        if suffix:
+            check_skills_validity(suffix, world_state)
+        return suffix
+
+    def plan_many(
+        self, tasks: list[str], world_state: dict, use_cache: bool = True
+    ) -> list[list[SkillCall]]:
+        """Plan several instructions concurrently against the same server."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = [
+                pool.submit(self.plan, task, world_state, use_cache) for task in tasks
+            ]
+            return [f.result() for f in futures]
+
+
+_default_planner: Optional[Planner] = None
+_default_lock = threading.Lock()
+
+
+def get_planner() -> Planner:
+    global _default_planner
+    with _default_lock:
+        if _default_planner is None:
+            _default_planner = Planner()
+        return _default_planner
+
+
+def plan(task: str, world_state: dict, use_cache: bool = True) -> list[SkillCall]:
+    return get_planner().plan(task, world_state, use_cache)
+
+
+def repair_plan(
+    task: str,
+    world_state: dict,
+    completed: list[SkillCall],
+    failed: SkillCall,
+    reason: Optional[str],
+) -> list[SkillCall]:
+    """Repairer for build_executor(): a new suffix from the default planner."""
+    return get_planner().repair(task, world_state, completed, failed, reason)
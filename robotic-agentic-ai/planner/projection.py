@@ -0,0 +1,132 @@
+import json
+import re
+from typing import Optional
+
+from verifier.skill_catalog import SkillCatalog
+
+# Colors the task may ask for that no object in the scene has yet
+# (e.g. "create green"); those need every colored source kept.
+KNOWN_COLORS = frozenset(
+    {
+        "red", "green", "blue", "yellow", "orange", "purple", "violet",
+        "pink", "brown", "black", "white", "grey", "gray", "cyan", "magenta",
+    }
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _words(task: str) -> set[str]:
+    words = set(re.findall(r"[a-z0-9_]+", task.lower()))
+    # Naive singularization so "tubes" matches type "test_tube".
+    return words | {w[:-1] for w in words if len(w) > 3 and w.endswith("s")}
+
+
+def _object_id(obj: dict) -> Optional[str]:
+    for key, value in obj.items():
+        if key.endswith("_id") and isinstance(value, str):
+            return value
+    return None
+
+
+def _can_receive(obj: dict) -> bool:
+    fill = obj.get("fill_percentage")
+    if isinstance(fill, (int, float)):
+        return fill < 100
+    return obj.get("status") == "empty"
+
+
+def select_skills(task: str, catalog: SkillCatalog) -> list[str]:
+    words = _words(task)
+    selected = {name for name, skill in catalog.skills.items() if skill.keywords & words}
+    if not selected:
+        return list(catalog.skills)
+
+    # Argument-free skills are tiny and often needed as glue (go_home).
+    selected |= {name for name, skill in catalog.skills.items() if not skill.args}
+
+    stack = list(selected)
+    while stack:
+        skill = catalog.get(stack.pop())
+        for dep in skill.requires if skill is not None else ():
+            if dep not in selected:
+                selected.add(dep)
+                stack.append(dep)
+
+    return [name for name in catalog.skills if name in selected]
+
+
+def project_world_state(task: str, world_state: dict, skill_names: list[str], catalog: SkillCatalog) -> dict:
+    words = _words(task)
+    receives = any(
+        "target_id" in catalog.get(name).arg_set for name in skill_names if catalog.get(name)
+    )
+
+    projected = {}
+    for key, value in world_state.items():
+        if not (isinstance(value, list) and all(isinstance(o, dict) for o in value)):
+            projected[key] = value
+            continue
+
+        scene_colors = {o.get("color") for o in value}
+        if (words & KNOWN_COLORS) - scene_colors:
+            # A color that must be produced: any colored source may be needed.
+            projected[key] = value
+            continue
+
+        kept = [
+            obj
+            for obj in value
+            if _object_id(obj) in words or (receives and _can_receive(obj))
+        ]
+
+        # "the blue tube" / "the empty beaker": type narrowed by color or status.
+        by_type: dict[str, list[dict]] = {}
+        for obj in value:
+            for word in set(str(obj.get("type", "")).lower().split("_")) - {"test"}:
+                by_type.setdefault(word, []).append(obj)
+        for word in words & by_type.keys():
+            matches = by_type[word]
+            for attr in ("color", "status"):
+                narrowed = [o for o in matches if o.get(attr) in words]
+                if narrowed:
+                    matches = narrowed
+            kept.extend(matches)
+
+        kept.extend(o for o in value if o.get("color") in words)
+        projected[key] = [o for o in value if any(o is k for k in kept)]
+
+    return projected
+
+
+class Projection:
+    def __init__(self, skills: dict, world_state: dict, before_tokens: int, after_tokens: int):
+        self.skills = skills
+        self.world_state = world_state
+        self.before_tokens = before_tokens
+        self.after_tokens = after_tokens
+
+    @property
+    def reduced(self) -> bool:
+        return self.after_tokens < self.before_tokens
+
+
+def project(task: str, world_state: dict, catalog: SkillCatalog) -> Projection:
+    """Keep only the skills and objects relevant to `task`."""
+    full_skills = catalog.prompt_skills()
+    before = estimate_tokens(json.dumps(full_skills, indent=0) + json.dumps(world_state, indent=0))
+
+    skill_names = select_skills(task, catalog)
+    projected_world = project_world_state(task, world_state, skill_names, catalog)
+
+    # Nothing matched: the projection would only hide information.
+    if not any(
+        isinstance(v, list) and v for k, v in projected_world.items() if k in world_state
+    ):
+        projected_world = world_state
+
+    skills = catalog.prompt_skills(skill_names)
+    after = estimate_tokens(json.dumps(skills, indent=0) + json.dumps(projected_world, indent=0))
+    return Projection(skills, projected_world, before, after)
@@ -1,4 +1,8 @@
-PLANNER_PROMPT = """ROLE (CRITICAL):
+# Cache-friendly layout: everything that is identical across requests comes
+# first so the model server can reuse the KV cache for that prefix. Only the
+# world state and the task change per request, and they go last.
+
+PLANNER_RULES = """ROLE (CRITICAL):
 You are a Deterministic Symbolic Robotic Task Planner operating in a safety-critical robotics system.
 
 You ONLY translate a task into a symbolic, ordered execution plan.
@@ -95,38 +99,19 @@ Failure output rules:
 
 ---
 
-AVAILABLE SKILLS:
-{skills}
-
----
-
-WORLD STATE (READ-ONLY, AUTHORITATIVE):
-- Use object IDs exactly as written
-- Assume nothing beyond what is explicitly stated
-- Do NOT modify or disturb the environment
-
-{world_state}
-
----
-
-TASK:
-{task}
-
----
-
 OUTPUT FORMAT (STRICT):
 
 Return a VALID JSON ARRAY.
-[{{<element1>}}, {{<element2>}}, ...]
+[{<element1>}, {<element2>}, ...]
 
 Each element MUST match exactly:
 
-{{
+{
   "skill_name": "<exact_skill_name>",
-  "arguments": {{
+  "arguments": {
     "<arg_name>": "<object_id_or_literal>"
-  }}
-}}
+  }
+}
 
 Formatting rules:
 - JSON only
@@ -139,4 +124,66 @@ Formatting rules:
 FINAL CHECK (INTERNAL, SILENT):
 Verify all constraints.
 If a deterministic plan cannot be produced, return [].
+
+---
+
 """
+
+WORLD_STATE_SECTION = """WORLD STATE (READ-ONLY, AUTHORITATIVE):
+- Use object IDs exactly as written
+- Assume nothing beyond what is explicitly stated
+- Do NOT modify or disturb the environment
+
+"""
+
+
+def build_static_prefix(skills_json: str) -> str:
+    """Rules plus catalog; byte-identical for a given catalog."""
+    return f"{PLANNER_RULES}AVAILABLE SKILLS:\n{skills_json}\n"
+
+
+def build_request_suffix(world_state_json: str, task: str) -> str:
+    return (
+        f"{WORLD_STATE_SECTION}{world_state_json}\n\n---\n\n"
+        f"TASK:\n{task}\n\n"
+        f"Please generate the plan for the task: {task}"
+    )
+
+
+# Repair prompts skip the full rules and catalog: the model only has to
+# finish a plan that is already underway, so a short brief, the skills the
+# task needs and the affected objects are enough.
+REPAIR_RULES = """ROLE: You repair a symbolic robot plan that failed during execution.
+
+COMPLETED steps already ran; WORLD STATE already reflects their effects.
+The FAILED step did not succeed for the given REASON. Return ONLY the
+remaining steps that achieve the TASK from the current WORLD STATE.
+
+RULES:
+- Use only skills from AVAILABLE SKILLS, with exactly their argument names.
+- Use only object IDs from WORLD STATE. Invent nothing.
+- Do not repeat completed steps unless the task needs them again.
+- If the REASON suggests the failed step will fail again, work around it.
+- If the task can no longer be completed, return [].
+
+OUTPUT: a JSON array of {"skill_name": ..., "arguments": {...}} objects.
+JSON only, no markdown, no extra text.
+"""
+
+
+def build_repair_prompt(
+    skills_json: str,
+    world_state_json: str,
+    task: str,
+    completed_json: str,
+    failed_json: str,
+    reason: str,
+) -> str:
+    return (
+        f"{REPAIR_RULES}\nAVAILABLE SKILLS:\n{skills_json}\n\n"
+        f"WORLD STATE:\n{world_state_json}\n\n"
+        f"TASK:\n{task}\n\n"
+        f"COMPLETED:\n{completed_json}\n\n"
+        f"FAILED:\n{failed_json}\n"
+        f"REASON: {reason}\n"
+    )
@@ -0,0 +1,66 @@
+import json
+from typing import Iterator
+
+
+class IncrementalPlanParser:
+    """
+    Incrementally parses a streamed JSON array of SkillCall objects and
+    yields each element as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.closed = False
+
+    def feed(self, text: str) -> Iterator[dict]:
+        for ch in text:
+            if self.closed:
+                if not ch.isspace():
+                    raise ValueError("Unexpected text after end of plan array")
+                continue
+
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                elif not ch.isspace():
+                    raise ValueError(f"Plan must be a JSON array, got {ch!r}")
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self.closed = True
+                elif not (ch.isspace() or ch == ","):
+                    raise ValueError(f"Unexpected {ch!r} between plan steps")
+                continue
+
+            self._buf.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    yield json.loads("".join(self._buf))
+                    self._buf = []
+
+    def finish(self):
+        if not self.closed:
+            raise ValueError("Plan stream ended before the JSON array was closed")
@@ -0,0 +1,342 @@
+"""
+Deterministic fast path for routine instructions.
+
+A small rule-based parser turns instructions such as "pick and place
+tube_1", "pour tube_1 into beaker_2", "mix tube_1 and tube_3 in beaker_2"
+or "verify beaker_2 is green" into goal facts. A* over the preconditions
+and effects declared in skills.yaml then finds the shortest plan. Anything
+the parser does not fully understand returns None so the caller can fall
+back to the LLM planner.
+"""
+
+import heapq
+import itertools
+import re
+import time
+from typing import Iterable, Optional
+
+import telemetry
+from executor.state import SkillCall
+from planner.projection import KNOWN_COLORS
+from verifier.skill_catalog import CompiledSkill, SkillCatalog, get_catalog, world_object_ids
+
+# Ground fact, e.g. ("holding", ("tube_1",)) or ("gripper_empty", ()).
+Fact = tuple[str, tuple[str, ...]]
+
+MAX_EXPANSIONS = 20_000
+
+VERBS = {
+    "pick": "pick",
+    "grasp": "pick",
+    "grab": "pick",
+    "lift": "pick",
+    "hold": "pick",
+    "place": "place",
+    "put": "place",
+    "move": "place",
+    "release": "place",
+    "drop": "place",
+    "pour": "pour",
+    "transfer": "pour",
+    "mix": "mix",
+    "combine": "mix",
+    "stir": "stir",
+    "rotate": "stir",
+    "swirl": "stir",
+    "shake": "stir",
+    "verify": "verify",
+    "check": "verify",
+    "home": "home",
+    "go": "home",
+    "return": "home",
+}
+# Words that may appear in a clause without changing its meaning.
+FILLER = frozenset(
+    {
+        "a", "an", "the", "it", "them", "up", "from", "on", "onto", "to", "into",
+        "in", "and", "of", "with", "is", "that", "color", "colour", "please",
+        "back", "table", "ground", "floor", "bench", "contents",
+        "liquid", "its", "has", "then", "both",
+    }
+)
+CLAUSE_SPLIT = re.compile(r"\s*(?:[,;.]|\bthen\b)\s*")
+# Prepositions that mark the source or the target of a pour.
+SOURCE_WORDS = frozenset({"from"})
+TARGET_WORDS = frozenset({"into", "to", "onto", "in"})
+PRONOUNS = frozenset({"it", "them"})
+
+
+def initial_facts(world_state: dict) -> frozenset[Fact]:
+    """Symbolic state the skill preconditions are checked against."""
+    facts: set[Fact] = set()
+    for value in world_state.values():
+        if not isinstance(value, list):
+            continue
+        for obj in value:
+            if not isinstance(obj, dict):
+                continue
+            obj_id = next(
+                (v for k, v in obj.items() if k.endswith("_id") and isinstance(v, str)),
+                None,
+            )
+            if obj_id is None:
+                continue
+            fill = obj.get("fill_percentage")
+            filled = fill > 0 if isinstance(fill, (int, float)) else obj.get("status") == "filled"
+            facts.add(("filled" if filled else "empty", (obj_id,)))
+            if isinstance(fill, (int, float)) and fill >= 100:
+                facts.add(("full", (obj_id,)))
+
+    if world_state.get("gripper_state") == "open":
+        facts.add(("gripper_empty", ()))
+    held = world_state.get("held_object")
+    if isinstance(held, str):
+        facts.add(("holding", (held,)))
+    return frozenset(facts)
+
+
+def _normalize(task: str, object_ids: Iterable[str]) -> str:
+    text = task.lower()
+    # "tube 1" -> "tube_1" when that is an object in the scene.
+    for obj_id in object_ids:
+        spaced = obj_id.replace("_", " ")
+        if spaced != obj_id:
+            text = re.sub(rf"\b{re.escape(spaced)}\b", obj_id, text)
+    return text
+
+
+def _split_clauses(text: str) -> list[str]:
+    clauses = []
+    for part in CLAUSE_SPLIT.split(text):
+        # "pick X and pour ..." is two clauses; "mix X and Y" is one.
+        verbs = "|".join(VERBS)
+        clauses.extend(p for p in re.split(rf"\band\s+(?=(?:{verbs})\b)", part) if p.strip())
+    return clauses
+
+
+def object_marks(words: list[str], objs: list[str]) -> Optional[list[Optional[str]]]:
+    """
+    "source", "target" or None per object, from the prepositions between it
+    and the previous object; None overall if both kinds mark one object.
+    """
+    marks = []
+    start = 0
+    for obj in objs:
+        end = words.index(obj, start)
+        between = set(words[start:end])
+        is_source, is_target = bool(between & SOURCE_WORDS), bool(between & TARGET_WORDS)
+        if is_source and is_target:
+            return None
+        marks.append("source" if is_source else "target" if is_target else None)
+        start = end + 1
+    return marks
+
+
+def pour_roles(words: list[str], objs: list[str]) -> Optional[tuple[str, str]]:
+    """
+    (source, target) of a two-object pour clause, from the preposition
+    in front of each object: "pour X into Y" and "pour into Y from X".
+    Any other wording returns None.
+    """
+    marks = object_marks(words, objs)
+    if marks == [None, "target"]:
+        return objs[0], objs[1]
+    if marks == ["target", "source"]:
+        return objs[1], objs[0]
+    return None
+
+
+def parse_goal(
+    task: str, world_state: dict, object_ids: Iterable[str]
+) -> Optional[list[list[Fact]]]:
+    """
+    Ordered goal segments, one per clause, or None when any clause is not
+    understood.
+    """
+    object_ids = sorted(object_ids, key=len, reverse=True)
+    id_set = set(object_ids)
+    colors = KNOWN_COLORS | {
+        o.get("color")
+        for v in world_state.values()
+        if isinstance(v, list)
+        for o in v
+        if isinstance(o, dict)
+    }
+
+    segments: list[list[Fact]] = []
+    last_obj: Optional[str] = None
+    carried_verb: Optional[str] = None
+
+    for clause in _split_clauses(_normalize(task, object_ids)):
+        words = re.findall(r"[a-z0-9_]+", clause)
+        verbs = [VERBS[w] for w in words if w in VERBS]
+        objs = [w for w in words if w in id_set]
+        clause_colors = [w for w in words if w in colors]
+        if PRONOUNS & set(words):
+            if objs or not last_obj:
+                # "put it into beaker_2": the pronoun and the other object
+                # play different roles, which only the model can tell apart.
+                return None
+            objs = [last_obj]
+
+        unknown = [
+            w for w in words
+            if w not in VERBS and w not in id_set and w not in colors and w not in FILLER
+        ]
+        if unknown or not verbs:
+            return None
+
+        if carried_verb:
+            verbs = [carried_verb] + verbs
+            carried_verb = None
+        if not objs and verbs[-1] != "home":
+            # "pick and place the tube_1": the verb applies to the next clause.
+            carried_verb = verbs[0]
+            continue
+
+        kinds = set(verbs)
+        goal: list[Fact]
+        if kinds <= {"pick", "place"} and len(objs) == 1:
+            if objs[0] in words and object_marks(words, objs) != [None]:
+                # "place into beaker_2" names a destination, not the object moved.
+                return None
+            obj = objs[0]
+            goal = [("placed", (obj,))] if "place" in kinds else [("holding", (obj,))]
+        elif kinds == {"pour"} and len(objs) == 2:
+            roles = pour_roles(words, objs)
+            if roles is None:
+                return None
+            goal = [("poured", roles)]
+        elif kinds == {"mix"} and len(objs) >= 3 and re.search(rf"\b(?:in|into)\s+{objs[-1]}\b", clause):
+            target = objs[-1]
+            goal = [("poured", (src, target)) for src in objs[:-1]] + [("mixed", (target,))]
+        elif kinds <= {"mix", "stir"} and len(objs) == 1:
+            goal = [("mixed", (objs[0],))]
+        elif kinds == {"verify"} and len(objs) == 1 and len(clause_colors) == 1:
+            goal = [("verified", (objs[0], clause_colors[0]))]
+        elif kinds == {"home"} and not objs:
+            goal = [("at_home", ())]
+        else:
+            return None
+
+        segments.append(goal)
+        if objs:
+            last_obj = objs[-1]
+
+    if carried_verb or not segments:
+        return None
+    return segments
+
+
+def _ground(skill: CompiledSkill, binding: dict[str, str], literals) -> tuple[list[Fact], list[Fact]]:
+    pos, neg = [], []
+    for positive, predicate, names in literals:
+        fact = (predicate, tuple(binding[n] for n in names))
+        (pos if positive else neg).append(fact)
+    return pos, neg
+
+
+class GroundAction:
+    __slots__ = ("call", "pre_pos", "pre_neg", "add", "delete")
+
+    def __init__(self, skill: CompiledSkill, binding: dict[str, str]):
+        self.call: SkillCall = {"skill_name": skill.name, "arguments": dict(binding)}
+        self.pre_pos, self.pre_neg = _ground(skill, binding, skill.preconditions)
+        self.add, self.delete = _ground(skill, binding, skill.effects)
+
+    def applicable(self, state: frozenset[Fact]) -> bool:
+        return all(f in state for f in self.pre_pos) and not any(f in state for f in self.pre_neg)
+
+    def apply(self, state: frozenset[Fact]) -> frozenset[Fact]:
+        return (state - frozenset(self.delete)) | frozenset(self.add)
+
+
+def ground_actions(
+    catalog: SkillCatalog, objects: list[str], constants: list[str]
+) -> list[GroundAction]:
+    """Every skill with declared effects, bound to the task's objects."""
+    actions = []
+    for skill in catalog.skills.values():
+        if not skill.effects:
+            continue
+        domains = [objects if a in skill.id_args else constants for a in skill.args]
+        for values in itertools.product(*domains):
+            ids = [v for a, v in zip(skill.args, values) if a in skill.id_args]
+            if len(set(ids)) != len(ids):
+                continue
+            actions.append(GroundAction(skill, dict(zip(skill.args, values))))
+    return actions
+
+
+def search(
+    start: frozenset[Fact], goal: list[Fact], actions: list[GroundAction]
+) -> Optional[tuple[list[SkillCall], frozenset[Fact]]]:
+    """A* with the number of unmet goal facts as heuristic."""
+    goal_set = frozenset(goal)
+    counter = itertools.count()
+    frontier = [(len(goal_set - start), next(counter), start, [])]
+    best = {start: 0}
+
+    for _ in range(MAX_EXPANSIONS):
+        if not frontier:
+            return None
+        _, _, state, steps = heapq.heappop(frontier)
+        if goal_set <= state:
+            return steps, state
+        for action in actions:
+            if not action.applicable(state):
+                continue
+            nxt = action.apply(state)
+            cost = len(steps) + 1
+            if best.get(nxt, cost + 1) <= cost:
+                continue
+            best[nxt] = cost
+            heapq.heappush(
+                frontier,
+                (cost + len(goal_set - nxt), next(counter), nxt, steps + [action.call]),
+            )
+    return None
+
+
+def symbolic_plan(
+    task: str, world_state: dict, catalog: Optional[SkillCatalog] = None
+) -> Optional[list[SkillCall]]:
+    """
+    Plan `task` without the LLM, or None when the goal cannot be parsed or
+    no plan is found. Clauses are achieved in the order they are stated, and
+    the gripper is left empty unless the task asks to hold something.
+    """
+    catalog = catalog or get_catalog()
+    catalog.refresh()
+    start_time = time.perf_counter()
+
+    state = initial_facts(world_state)
+    object_ids = sorted(world_object_ids(world_state))
+    segments = parse_goal(task, world_state, object_ids)
+    if segments is None:
+        return None
+
+    mentioned = sorted({a for seg in segments for _, args in seg for a in args if a in object_ids})
+    constants = sorted({a for seg in segments for _, args in seg for a in args if a not in object_ids})
+    held = [args[0] for predicate, args in state if predicate == "holding"]
+    actions = ground_actions(catalog, sorted(set(mentioned + held)), constants)
+
+    if not any(predicate == "holding" for predicate, _ in segments[-1]):
+        segments[-1] = segments[-1] + [("gripper_empty", ())]
+
+    plan: list[SkillCall] = []
+    for goal in segments:
+        found = search(state, goal, actions)
+        if found is None:
+            return None
+        steps, state = found
+        plan.extend(steps)
+
+    if not plan:
+        # [] means "infeasible" to callers; let the LLM explain instead.
+        return None
+
+    elapsed = time.perf_counter() - start_time
+    telemetry.observe("span", "plan.symbolic", elapsed, steps=len(plan))
+    print(f"[PLANNER] Symbolic plan with {len(plan)} steps in {elapsed * 1000:.1f} ms")
+    return plan
@@ -1,17 +1,85 @@
+"""
+Shared Redis clients.
+
+Modules get their clients here instead of creating them at import time.
+Nothing connects until the first command, and every caller with the same
+URL and response mode shares one client and its connection pool
+(redis-py resets the pool in forked bridge workers).
+
+Run as a script to create the stream consumer groups:
+    python redis_config.py
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+
 import redis
 
-r = redis.Redis(decode_responses=True)
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+_clients: dict[tuple[str, bool], redis.Redis] = {}
+# event loop -> url -> client. A redis.asyncio client only works on the
+# loop it was first used on, so every loop gets its own.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _url(url: Optional[str]) -> str:
+    # Read at first use, so a caller may still set REDIS_URL after import.
+    return url or os.environ.get("REDIS_URL", REDIS_URL)
+
+
+def get_client(decode_responses: bool = False, url: Optional[str] = None) -> redis.Redis:
+    """
+    Shared client for `url`. Stream payloads are binary (executor/codec.py),
+    so only plain-text users such as the plan cache ask for decoded responses.
+    """
+    url = _url(url)
+    key = (url, decode_responses)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = redis.Redis.from_url(url, decode_responses=decode_responses)
+        return client
+
+
+def get_async_client(url: Optional[str] = None):
+    """Shared redis.asyncio client for `url` on the running event loop."""
+    import redis.asyncio as aioredis
+
+    url = _url(url)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(url)
+        if client is None:
+            client = clients[url] = aioredis.Redis.from_url(url)
+        return client
+
+
+async def close_async_clients():
+    """Close the running loop's clients; call before the loop is closed."""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
 
 
 def create_group(stream, group):
     try:
-        r.xgroup_create(stream, group, id="0", mkstream=True)
+        get_client().xgroup_create(stream, group, id="0", mkstream=True)
     except redis.ResponseError as e:
         if "BUSYGROUP" not in str(e):
             raise
 
 
-create_group("robot.tasks", "ros_bridge")
-create_group("robot.events", "langgraph")
+if __name__ == "__main__":
+    create_group("robot.tasks", "ros_bridge")
+    create_group("robot.events", "langgraph")
 
-print("Streams ready")
+    print("Streams ready")
@@ -0,0 +1,306 @@
+"""
+Stream retention with compressed archive segments.
+
+Run from robotic-agentic-ai/:
+    python -m retention.archiver --max-len 50000 --max-age 3600 --every 30
+
+Entries beyond the length or age budget of each robot stream (the shared
+ones and every per-robot robot.tasks.<id> / robot.events.<id>) are copied
+into zstd-compressed JSONL segment files, indexed in SQLite by time and
+task_id, and only then trimmed from Redis with XTRIM MINID. Entries still
+pending in an active consumer group are never trimmed. Entries the codec
+cannot read are archived as their raw fields, base64-encoded under "raw".
+"""
+
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import redis
+import zstandard
+
+from executor import codec
+from redis_config import get_client
+
+
+STREAMS = ("robot.tasks", "robot.events", "robot.control")
+# Per-robot streams of a fleet, e.g. robot.tasks.arm_1.
+ROBOT_STREAM_PREFIXES = ("robot.tasks.", "robot.events.")
+ARCHIVE_DIR = "stream_archive"
+INDEX_FILE = "index.sqlite3"
+SEGMENT_MAX_ENTRIES = 10_000
+ZSTD_LEVEL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    stream TEXT NOT NULL,
+    path TEXT NOT NULL,
+    first_id TEXT NOT NULL,
+    last_id TEXT NOT NULL,
+    first_ms INTEGER NOT NULL,
+    last_ms INTEGER NOT NULL,
+    entries INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_time ON segments (stream, first_ms, last_ms);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_task_id ON tasks (task_id);
+CREATE TABLE IF NOT EXISTS progress (
+    stream TEXT PRIMARY KEY,
+    last_id TEXT NOT NULL
+);
+"""
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def entry_ms(entry_id) -> int:
+    return int(_text(entry_id).split("-", 1)[0])
+
+
+def id_tuple(entry_id) -> tuple[int, int]:
+    ms, _, seq = _text(entry_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+def encode_raw(fields: dict) -> dict[str, str]:
+    def b64(value) -> str:
+        value = value if isinstance(value, bytes) else str(value).encode()
+        return base64.b64encode(value).decode()
+
+    return {b64(k): b64(v) for k, v in fields.items()}
+
+
+def decode_raw(raw: dict[str, str]) -> dict[bytes, bytes]:
+    """Stream fields of an entry archived with encode_raw()."""
+    return {base64.b64decode(k): base64.b64decode(v) for k, v in raw.items()}
+
+
+def archive_record(stream: str, entry_id: str, fields: dict) -> dict:
+    """{"id", "msg"} for a readable entry, else {"id", "raw"}."""
+    try:
+        return {"id": entry_id, "msg": codec.decode(fields)}
+    except ValueError as e:
+        print(f"[ARCHIVER] {stream}: archiving undecodable entry {entry_id} as raw fields: {e}")
+        return {"id": entry_id, "raw": encode_raw(fields)}
+
+
+def next_id(entry_id) -> str:
+    ms, seq = id_tuple(entry_id)
+    return f"{ms}-{seq + 1}"
+
+
+def is_robot_stream(stream: str) -> bool:
+    """True for the live robot streams, which replays must never write to."""
+    return stream in STREAMS or stream.startswith(ROBOT_STREAM_PREFIXES)
+
+
+def robot_streams(client: redis.Redis) -> list[str]:
+    """The shared streams plus every per-robot stream that exists."""
+    per_robot = set()
+    for prefix in ROBOT_STREAM_PREFIXES:
+        for key in client.scan_iter(match=f"{prefix}*", _type="stream"):
+            per_robot.add(_text(key))
+    return list(STREAMS) + sorted(per_robot)
+
+
+class RetentionPolicy:
+    def __init__(self, max_len: Optional[int] = 50_000, max_age_sec: Optional[float] = None):
+        self.max_len = max_len
+        self.max_age_sec = max_age_sec
+
+
+def open_index(archive_dir: str = ARCHIVE_DIR) -> sqlite3.Connection:
+    os.makedirs(archive_dir, exist_ok=True)
+    db = sqlite3.connect(os.path.join(archive_dir, INDEX_FILE))
+    db.executescript(SCHEMA)
+    return db
+
+
+def trim_floor(client: redis.Redis, stream: str) -> Optional[str]:
+    """
+    Oldest entry id some active consumer group still needs, or None.
+
+    Groups without consumers (e.g. left over from older deployments) are
+    ignored so they cannot pin the stream forever.
+    """
+    try:
+        groups = client.xinfo_groups(stream)
+    except redis.ResponseError:
+        return None
+
+    floor = None
+    for group in groups:
+        if not group.get("consumers"):
+            continue
+        candidates = []
+        if group.get("pending"):
+            summary = client.xpending(stream, group["name"])
+            candidates.append(_text(summary["min"]))
+        last = group.get("last-delivered-id")
+        if last:
+            candidates.append(next_id(last))
+        for c in candidates:
+            if floor is None or id_tuple(c) < id_tuple(floor):
+                floor = c
+    return floor
+
+
+def write_segment(archive_dir: str, stream: str, records: list[dict]) -> str:
+    seg_dir = os.path.join(archive_dir, stream)
+    os.makedirs(seg_dir, exist_ok=True)
+    first_id, last_id = records[0]["id"], records[-1]["id"]
+    path = os.path.join(seg_dir, f"{first_id}_{last_id}.jsonl.zst")
+
+    payload = "".join(
+        json.dumps(record, separators=(",", ":")) + "\n" for record in records
+    ).encode()
+    with open(path, "wb") as f:
+        f.write(zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload))
+    return path
+
+
+def read_segment(path: str) -> list[dict]:
+    """
+    Archived entries as {"id": ..., "msg": decoded message}, or with "raw"
+    instead of "msg" for entries that could not be decoded.
+    """
+    with open(path, "rb") as f:
+        data = zstandard.ZstdDecompressor().decompress(f.read())
+    entries = [json.loads(line) for line in data.decode().splitlines() if line]
+    for entry in entries:
+        if "fields" in entry:
+            # Segments written before the codec layer kept raw string fields.
+            entry["msg"] = codec.decode(entry.pop("fields"))
+    return entries
+
+
+def archive_stream(
+    client: redis.Redis,
+    db: sqlite3.Connection,
+    stream: str,
+    policy: RetentionPolicy,
+    archive_dir: str = ARCHIVE_DIR,
+) -> int:
+    """Archive and trim entries of `stream` outside the policy. Returns count."""
+    row = db.execute("SELECT last_id FROM progress WHERE stream = ?", (stream,)).fetchone()
+    if row:
+        # Drop anything archived but not trimmed (e.g. after a crash), so
+        # XLEN counts only entries that are not archived yet.
+        client.xtrim(stream, minid=next_id(row[0]), approximate=False)
+    start = f"({row[0]}" if row else "-"
+
+    length = client.xlen(stream)
+    excess = max(0, length - policy.max_len) if policy.max_len is not None else 0
+    cutoff = None
+    if policy.max_age_sec is not None:
+        cutoff = (int((time.time() - policy.max_age_sec) * 1000), 0)
+    floor = trim_floor(client, stream)
+    floor_t = id_tuple(floor) if floor else None
+
+    archived = 0
+    last_id = None
+    while True:
+        batch = client.xrange(stream, min=start, max="+", count=SEGMENT_MAX_ENTRIES)
+        selected = []
+        for entry_id, fields in batch:
+            entry_id = _text(entry_id)
+            t = id_tuple(entry_id)
+            if floor_t is not None and t >= floor_t:
+                break
+            too_old = cutoff is not None and t < cutoff
+            if not (too_old or archived + len(selected) < excess):
+                break
+            selected.append(archive_record(stream, entry_id, fields))
+        if not selected:
+            break
+
+        path = write_segment(archive_dir, stream, selected)
+        last_id = selected[-1]["id"]
+        with db:
+            db.execute(
+                "INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    stream,
+                    path,
+                    selected[0]["id"],
+                    last_id,
+                    entry_ms(selected[0]["id"]),
+                    entry_ms(last_id),
+                    len(selected),
+                ),
+            )
+            db.executemany(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?)",
+                [
+                    (record["msg"]["task_id"], stream, record["id"], path)
+                    for record in selected
+                    if record.get("msg", {}).get("task_id")
+                ],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?)", (stream, last_id)
+            )
+        archived += len(selected)
+        start = f"({last_id}"
+        if len(selected) < len(batch) or len(batch) < SEGMENT_MAX_ENTRIES:
+            break
+
+    if last_id is not None:
+        # Exact, so the stream holds no archived entries and the next
+        # pass's XLEN matches what is still to be archived.
+        client.xtrim(stream, minid=next_id(last_id), approximate=False)
+        print(f"[ARCHIVER] {stream}: archived {archived} entries up to {last_id}")
+
+    return archived
+
+
+def archive_once(
+    client: redis.Redis,
+    policy: RetentionPolicy,
+    streams: Optional[list[str]] = None,
+    archive_dir: str = ARCHIVE_DIR,
+) -> dict[str, int]:
+    if streams is None:
+        streams = robot_streams(client)
+    db = open_index(archive_dir)
+    try:
+        return {s: archive_stream(client, db, s, policy, archive_dir) for s in streams}
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and trim robot streams")
+    parser.add_argument("--max-len", type=int, default=50_000)
+    parser.add_argument("--max-age", type=float, default=None, help="seconds")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--every", type=float, default=None, help="repeat every N seconds")
+    args = parser.parse_args()
+
+    client = get_client()
+    policy = RetentionPolicy(args.max_len, args.max_age)
+
+    while True:
+        if args.every is None:
+            archive_once(client, policy, archive_dir=args.archive_dir)
+            return
+        try:
+            archive_once(client, policy, archive_dir=args.archive_dir)
+        except redis.RedisError as e:
+            print(f"[ARCHIVER] Pass failed, retrying in {args.every}s: {e}")
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
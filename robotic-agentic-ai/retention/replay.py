@@ -0,0 +1,164 @@
+"""
+Replay archived stream entries into a scratch stream.
+
+Run from robotic-agentic-ai/:
+    python -m retention.replay robot.tasks --since 2026-10-01T12:00 --until 2026-10-01T13:00 \
+        --target scratch.tasks --timing
+
+    python -m retention.replay robot.events --task-id 5d1c... --target scratch.events
+
+Entries get fresh ids in the target stream. With --timing the original
+inter-arrival gaps are reproduced (scaled by --speed), which makes an archive
+window usable as a benchmark workload.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+import redis
+
+from executor import codec
+from retention.archiver import (
+    ARCHIVE_DIR,
+    decode_raw,
+    entry_ms,
+    is_robot_stream,
+    open_index,
+    read_segment,
+)
+from redis_config import get_client
+
+REPLAY_BATCH = 500
+
+
+def to_ms(value: str) -> int:
+    """Epoch milliseconds, or an ISO-8601 timestamp."""
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def archived_window(
+    db: sqlite3.Connection, stream: str, since_ms: int, until_ms: int
+) -> Iterator[dict]:
+    """Archived entries of `stream` with since_ms <= entry time <= until_ms, in order."""
+    rows = db.execute(
+        "SELECT path FROM segments WHERE stream = ? AND last_ms >= ? AND first_ms <= ? "
+        "ORDER BY first_ms",
+        (stream, since_ms, until_ms),
+    ).fetchall()
+    for (path,) in rows:
+        for entry in read_segment(path):
+            if since_ms <= entry_ms(entry["id"]) <= until_ms:
+                yield entry
+
+
+def archived_task(db: sqlite3.Connection, stream: str, task_id: str) -> Iterator[dict]:
+    """Archived entries of `stream` that carry `task_id`."""
+    rows = db.execute(
+        "SELECT DISTINCT path FROM tasks WHERE stream = ? AND task_id = ?",
+        (stream, task_id),
+    ).fetchall()
+    for (path,) in rows:
+        for entry in read_segment(path):
+            if entry.get("msg", {}).get("task_id") == task_id:
+                yield entry
+
+
+def replay(
+    client: redis.Redis,
+    entries: Iterator[dict],
+    target: str,
+    timing: bool = False,
+    speed: float = 1.0,
+    maxlen: Optional[int] = None,
+    codec_name: Optional[str] = None,
+) -> int:
+    """
+    XADD `entries` to `target`; returns how many were written. Messages are
+    encoded with `codec_name`, or the codec configured for `target`; entries
+    archived raw are written back with their original fields.
+    """
+    sent = 0
+    first_ms = None
+    started = time.monotonic()
+    pipe = client.pipeline(transaction=False)
+
+    for entry in entries:
+        if timing:
+            ms = entry_ms(entry["id"])
+            if first_ms is None:
+                first_ms = ms
+            delay = (ms - first_ms) / 1000 / speed - (time.monotonic() - started)
+            if delay > 0:
+                pipe.execute()
+                time.sleep(delay)
+        if "raw" in entry:
+            fields = decode_raw(entry["raw"])
+        else:
+            fields = codec.encode(target, entry["msg"], codec_name)
+        pipe.xadd(
+            target,
+            fields,
+            maxlen=maxlen,
+            approximate=maxlen is not None,
+        )
+        sent += 1
+        if sent % REPLAY_BATCH == 0:
+            pipe.execute()
+
+    pipe.execute()
+    return sent
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("stream", help="archived stream, e.g. robot.tasks")
+    parser.add_argument("--target", required=True, help="scratch stream to write to")
+    parser.add_argument("--since", default="0", help="epoch ms or ISO timestamp")
+    parser.add_argument("--until", default=None, help="epoch ms or ISO timestamp")
+    parser.add_argument("--task-id", default=None)
+    parser.add_argument("--timing", action="store_true", help="preserve original spacing")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--maxlen", type=int, default=None)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+
+
+def run(args: argparse.Namespace):
+    if is_robot_stream(args.target):
+        raise ValueError(f"Refusing to replay into live stream {args.target}")
+    if not os.path.exists(args.archive_dir):
+        raise ValueError(f"No archive at {args.archive_dir}")
+
+    db = open_index(args.archive_dir)
+    if args.task_id:
+        entries = archived_task(db, args.stream, args.task_id)
+    else:
+        until = to_ms(args.until) if args.until else int(time.time() * 1000)
+        entries = archived_window(db, args.stream, to_ms(args.since), until)
+
+    client = get_client()
+    sent = replay(
+        client,
+        entries,
+        args.target,
+        args.timing,
+        args.speed,
+        args.maxlen,
+        codec.codec_for(args.stream),
+    )
+    db.close()
+    print(f"[REPLAY] {sent} entries from {args.stream} -> {args.target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived robot stream entries")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
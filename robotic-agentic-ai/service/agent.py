@@ -0,0 +1,390 @@
+"""
+Resident planner/executor service.
+
+Reads instructions from agent.instructions in the agent_service consumer
+group, plans and executes them on a bounded pool of workers, and reports
+every status change to agent.results. The compiled graph, skill catalog,
+model client and Redis connections are created once and reused, so an
+instruction only pays for planning and execution.
+
+Run from robotic-agentic-ai/:
+    python -m service.agent --workers 4 --live-world --checkpoint
+    python -m service.agent --submit "pick and place tube_1"
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import redis
+
+import telemetry
+from executor import codec
+from executor.checkpoint import RedisCheckpointSaver
+from executor.durations import duration_model
+from executor.graph import build_executor, resume_plan, run_config
+from executor.redis_io import STREAM_MAXLEN, dispatcher
+from executor.state import new_exec_state
+from planner.planner import Planner, get_planner
+from redis_config import REDIS_URL, get_client
+from verifier.skill_validator import check_skills_validity
+from world.store import WorldStore
+
+INSTRUCTION_STREAM = "agent.instructions"
+RESULT_STREAM = "agent.results"
+SERVICE_GROUP = "agent_service"
+WORLD_STATE_PATH = "planner/world_state.json"
+
+MAX_CONCURRENT_PLANS = 4
+BLOCK_MS = 1000
+# Plans run for minutes, so only instructions idle this long are taken
+# over from a dead service; live ones are touched every CLAIM_EVERY_SEC.
+CLAIM_IDLE_MS = 10 * 60_000
+CLAIM_EVERY_SEC = 30
+# Pause before retrying after Redis fails under the reader loop.
+ERROR_BACKOFF_SEC = 1.0
+
+# Status values published on RESULT_STREAM.
+PLANNING = "PLANNING"
+PLANNED = "PLANNED"
+RESUMED = "RESUMED"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+INFEASIBLE = "INFEASIBLE"
+REJECTED = "REJECTED"
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def ensure_group(client: redis.Redis):
+    try:
+        client.xgroup_create(INSTRUCTION_STREAM, SERVICE_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def submit_instruction(
+    client: redis.Redis,
+    task: str,
+    robot_id: Optional[str] = None,
+    window: Optional[int] = None,
+) -> str:
+    """Queue `task`; the returned entry id is its instruction_id on agent.results."""
+    message = {"task": task}
+    if robot_id:
+        message["robot_id"] = robot_id
+    if window:
+        message["window"] = window
+    entry_id = client.xadd(
+        INSTRUCTION_STREAM,
+        codec.encode(INSTRUCTION_STREAM, message),
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+    return _text(entry_id)
+
+
+class AgentService:
+    """
+    The reader only takes as many instructions as there are free workers,
+    so a burst waits in the stream (visible as consumer-group lag) instead
+    of piling up in memory.
+    """
+
+    def __init__(
+        self,
+        client: Optional[redis.Redis] = None,
+        planner: Optional[Planner] = None,
+        workers: int = MAX_CONCURRENT_PLANS,
+        window: int = 1,
+        world: Optional[WorldStore] = None,
+        checkpointer: Optional[RedisCheckpointSaver] = None,
+        consumer: Optional[str] = None,
+    ):
+        self.r = client or get_client()
+        self.planner = planner or get_planner()
+        self.workers = workers
+        self.window = window
+        self.world = world
+        self.checkpointer = checkpointer
+        self.consumer = consumer or f"agent-{socket.gethostname()}-{os.getpid()}"
+        self.executor = build_executor(checkpointer, repairer=self.planner.repair)
+
+        self._static_world: Optional[dict] = None
+        self._slots = threading.BoundedSemaphore(workers)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="agent-plan")
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+        self.completed = 0
+
+    def warm_up(self):
+        """Pay every one-time cost before the first instruction arrives."""
+        self.r.ping()
+        ensure_group(self.r)
+        self.planner.static_prefix()
+        self.world_state()
+        dispatcher.start()
+        print(f"[AGENT] Ready as {self.consumer} with {self.workers} workers")
+
+    def world_state(self) -> dict:
+        if self.world is not None:
+            world_state = self.world.snapshot()
+            if world_state:
+                return world_state
+        if self._static_world is None:
+            with open(WORLD_STATE_PATH) as f:
+                self._static_world = json.load(f)
+        return self._static_world
+
+    # ---- results ----
+
+    @staticmethod
+    def _result(instruction_id: str, plan_id: str, status: str, detail: str = "", **extra) -> dict:
+        message = {
+            "instruction_id": instruction_id,
+            "plan_id": plan_id,
+            "status": status,
+            "detail": detail or "",
+            **extra,
+        }
+        return codec.encode(RESULT_STREAM, message)
+
+    def publish(self, instruction_id: str, plan_id: str, status: str, **extra):
+        self.r.xadd(
+            RESULT_STREAM,
+            self._result(instruction_id, plan_id, status, **extra),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    def finish(self, instruction_id: str, plan_id: str, status: str, detail: str = ""):
+        """Final status and XACK in one round trip."""
+        pipe = self.r.pipeline(transaction=True)
+        pipe.xadd(
+            RESULT_STREAM,
+            self._result(instruction_id, plan_id, status, detail),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+        pipe.xack(INSTRUCTION_STREAM, SERVICE_GROUP, instruction_id)
+        pipe.execute()
+        print(f"[AGENT] Instruction {instruction_id} -> {status}")
+
+    # ---- one instruction ----
+
+    def handle(self, instruction_id: str, instruction: dict):
+        # Deterministic, so a taken-over instruction resumes its checkpoint.
+        plan_id = f"instr-{instruction_id}"
+        try:
+            self._execute(instruction_id, plan_id, instruction)
+        except Exception as e:
+            self.finish(instruction_id, plan_id, FAILED, f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(instruction_id)
+                self.completed += 1
+                telemetry.set_gauge("agent_running_plans", len(self._in_flight))
+            self._slots.release()
+
+    def _execute(self, instruction_id: str, plan_id: str, instruction: dict):
+        if self.checkpointer is not None:
+            final = resume_plan(self.executor, plan_id)
+            if final is not None:
+                self.publish(instruction_id, plan_id, RESUMED, steps=len(final["plan"]))
+                self._finish_run(instruction_id, plan_id, final)
+                return
+
+        task = instruction.get("task")
+        if not task:
+            self.finish(instruction_id, plan_id, REJECTED, "Instruction has no task")
+            return
+
+        self.publish(instruction_id, plan_id, PLANNING, task=task)
+        world_state = self.world_state()
+        try:
+            plan = self.planner.plan(task, world_state)
+            if plan:
+                check_skills_validity(plan, world_state)
+        except ValueError as e:
+            self.finish(instruction_id, plan_id, REJECTED, str(e))
+            return
+        if not plan:
+            self.finish(instruction_id, plan_id, INFEASIBLE, "Planner returned no plan")
+            return
+
+        makespan = duration_model.predict_makespan(plan)
+        self.publish(
+            instruction_id, plan_id, PLANNED, steps=len(plan), makespan_s=round(makespan, 1)
+        )
+        state = new_exec_state(
+            plan,
+            plan_id,
+            window=int(instruction.get("window") or self.window),
+            robot_id=instruction.get("robot_id"),
+            task=task,
+            world_state=world_state,
+        )
+        final = self.executor.invoke(state, run_config(len(plan), plan_id))
+        self._finish_run(instruction_id, plan_id, final)
+
+    def _finish_run(self, instruction_id: str, plan_id: str, final: dict):
+        status = SUCCEEDED if final.get("outcome") == "SUCCESS" else FAILED
+        self.finish(instruction_id, plan_id, status, final.get("error") or final.get("failure") or "")
+
+    # ---- reading ----
+
+    def _dispatch(self, entry_id, fields):
+        """Hand one claimed instruction (holding one slot) to a worker."""
+        instruction_id = _text(entry_id)
+        if not fields:
+            # Trimmed from the stream before anyone ran it.
+            self._reject(instruction_id, "Instruction was trimmed")
+            return
+        try:
+            instruction = codec.decode(fields)
+        except ValueError as e:
+            self._reject(instruction_id, f"Malformed instruction: {e}")
+            return
+        with self._lock:
+            self._in_flight.add(instruction_id)
+            telemetry.set_gauge("agent_running_plans", len(self._in_flight))
+        self._pool.submit(self.handle, instruction_id, instruction)
+
+    def _reject(self, instruction_id: str, detail: str):
+        """Finish an instruction no worker will run, and free its slot."""
+        try:
+            self.finish(instruction_id, "", REJECTED, detail)
+        finally:
+            self._slots.release()
+
+    def _acquire(self, timeout: float) -> int:
+        """Free worker slots taken, waiting up to `timeout` for the first."""
+        if not self._slots.acquire(timeout=timeout):
+            return 0
+        taken = 1
+        while taken < self.workers and self._slots.acquire(blocking=False):
+            taken += 1
+        return taken
+
+    def _release(self, n: int):
+        for _ in range(n):
+            self._slots.release()
+
+    def housekeeping(self):
+        """Keep our own instructions from looking idle, take over dead ones."""
+        with self._lock:
+            mine = list(self._in_flight)
+        if mine:
+            self.r.xclaim(
+                INSTRUCTION_STREAM, SERVICE_GROUP, self.consumer, 0, mine, justid=True
+            )
+
+        free = self._acquire(0)
+        dispatched = 0
+        try:
+            claimed = []
+            if free:
+                result = self.r.xautoclaim(
+                    INSTRUCTION_STREAM,
+                    SERVICE_GROUP,
+                    self.consumer,
+                    CLAIM_IDLE_MS,
+                    start_id="0-0",
+                    count=free,
+                )
+                claimed = result[1]
+            for entry_id, fields in claimed:
+                print(f"[AGENT] Taking over instruction {_text(entry_id)}")
+                dispatched += 1
+                self._dispatch(entry_id, fields)
+        finally:
+            self._release(free - dispatched)
+
+        for group in self.r.xinfo_groups(INSTRUCTION_STREAM):
+            if _text(group["name"]) == SERVICE_GROUP:
+                telemetry.set_gauge("agent_backlog", int(group.get("lag") or 0))
+
+    def _read(self):
+        # Backpressure: only read what the free workers can take.
+        free = self._acquire(BLOCK_MS / 1000)
+        if not free:
+            return
+        dispatched = 0
+        try:
+            messages = self.r.xreadgroup(
+                SERVICE_GROUP,
+                self.consumer,
+                {INSTRUCTION_STREAM: ">"},
+                count=free,
+                block=BLOCK_MS,
+            )
+            for _, entries in messages or []:
+                for entry_id, fields in entries:
+                    dispatched += 1
+                    self._dispatch(entry_id, fields)
+        finally:
+            self._release(free - dispatched)
+
+    def run(self, stop: Optional[threading.Event] = None):
+        self.warm_up()
+        next_housekeeping = 0.0
+        try:
+            while stop is None or not stop.is_set():
+                try:
+                    if time.monotonic() >= next_housekeeping:
+                        self.housekeeping()
+                        next_housekeeping = time.monotonic() + CLAIM_EVERY_SEC
+                    self._read()
+                except redis.RedisError as e:
+                    # Entries read but not finished stay pending and are
+                    # taken over by housekeeping once they go idle.
+                    print(f"[AGENT] Redis error, retrying: {e}")
+                    time.sleep(ERROR_BACKOFF_SEC)
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident planner/executor service")
+    parser.add_argument("--url", default=REDIS_URL)
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_PLANS)
+    parser.add_argument("--window", type=int, default=1, help="steps queued ahead per plan")
+    parser.add_argument("--live-world", action="store_true", help="plan against the world store")
+    parser.add_argument("--checkpoint", action="store_true", help="resume plans after a crash")
+    parser.add_argument("--metrics", action="store_true")
+    parser.add_argument("--submit", default=None, metavar="TASK", help="queue TASK and exit")
+    args = parser.parse_args()
+
+    # Before anything connects, so redis_io, the event dispatcher and the
+    # duration model use the same server as this service's own client.
+    os.environ["REDIS_URL"] = args.url
+    client = get_client()
+    if args.submit:
+        print(submit_instruction(client, args.submit, window=args.window))
+        return
+
+    if args.metrics:
+        telemetry.start_metrics_server()
+    service = AgentService(
+        client,
+        workers=args.workers,
+        window=args.window,
+        world=WorldStore(client) if args.live_world else None,
+        checkpointer=RedisCheckpointSaver(client) if args.checkpoint else None,
+    )
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Local latency instrumentation for planning and plan execution.
+
+Spans are keyed by plan_id / task_id and aggregated into per-(span, skill)
+histograms. Set ROBOT_TRACE_FILE to also append every span to a JSONL file,
+and call start_metrics_server() to expose Prometheus text on /metrics.
+
+Task latency is split using Redis stream entry ids, which are millisecond
+timestamps: the task entry id marks enqueue, the bridge reports when it
+started (started_ms), and the event entry id marks completion.
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Upper bounds in seconds; Redis round trips up to long robot motions.
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+_lock = threading.Lock()
+_trace_path: Optional[str] = os.environ.get("ROBOT_TRACE_FILE")
+_trace_file = None
+_sent: dict[str, dict] = {}
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the matching bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * ((rank - seen) / n)
+            seen += n
+        return BUCKETS[-1]
+
+
+# (metric, label value, skill) -> Histogram
+_histograms: dict[tuple[str, str, str], Histogram] = {}
+# (name, sorted label items) -> last value
+_gauges: dict[tuple[str, tuple], float] = {}
+
+
+def configure(trace_path: Optional[str]):
+    global _trace_path, _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+        _trace_path = trace_path
+
+
+def _write(record: dict):
+    global _trace_file
+    if _trace_path is None:
+        return
+    line = json.dumps(record, separators=(",", ":"))
+    with _lock:
+        if _trace_file is None:
+            _trace_file = open(_trace_path, "a", buffering=1)
+        _trace_file.write(line + "\n")
+
+
+def observe(
+    metric: str,
+    label: str,
+    seconds: float,
+    skill: str = "",
+    **attrs,
+):
+    with _lock:
+        hist = _histograms.get((metric, label, skill))
+        if hist is None:
+            hist = _histograms[(metric, label, skill)] = Histogram()
+        hist.observe(seconds)
+
+    _write(
+        {
+            "ts": time.time(),
+            "metric": metric,
+            "name": label,
+            "skill": skill,
+            "seconds": seconds,
+            **{k: v for k, v in attrs.items() if v is not None},
+        }
+    )
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Point-in-time value exported as robot_<name> on /metrics."""
+    with _lock:
+        _gauges[(name, tuple(sorted(labels.items())))] = value
+
+
+@contextmanager
+def span(name: str, skill: str = "", **attrs):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("span", name, time.perf_counter() - start, skill, **attrs)
+
+
+def traced_node(name: str, fn):
+    """Wrap a LangGraph node (sync or async) in a span keyed by plan_id."""
+    # Only graph builders call this; keep inspect off the validate path.
+    import inspect
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            with span(f"node.{name}", plan_id=state.get("plan_id"), step=state.get("step")):
+                return await fn(state)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        with span(f"node.{name}", plan_id=state.get("plan_id"), step=state.get("step")):
+            return fn(state)
+
+    return wrapper
+
+
+def _entry_ms(entry_id) -> int:
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    return int(str(entry_id).split("-", 1)[0])
+
+
+def task_sent(task_id: str, skill: str, entry_id, plan_id: Optional[str] = None):
+    with _lock:
+        _sent[task_id] = {"skill": skill, "entry_ms": _entry_ms(entry_id), "plan_id": plan_id}
+
+
+def task_finished(event: dict, entry_id):
+    """Split a finished task into queue, execute and deliver phases."""
+    task_id = event.get("task_id")
+    with _lock:
+        sent = _sent.pop(task_id, None)
+    if sent is None:
+        return
+
+    skill = sent["skill"]
+    attrs = {"task_id": task_id, "plan_id": sent["plan_id"], "status": event.get("status")}
+    done_ms = _entry_ms(entry_id)
+    now_ms = time.time() * 1000
+
+    started_ms = event.get("started_ms")
+    if started_ms:
+        started_ms = int(started_ms)
+        observe("task_phase", "queue", max(0, started_ms - sent["entry_ms"]) / 1000, skill, **attrs)
+        observe("task_phase", "execute", max(0, done_ms - started_ms) / 1000, skill, **attrs)
+    observe("task_phase", "total", max(0, done_ms - sent["entry_ms"]) / 1000, skill, **attrs)
+    observe("task_phase", "deliver", max(0.0, now_ms - done_ms) / 1000, skill, **attrs)
+
+
+def task_forgotten(task_id: str):
+    with _lock:
+        _sent.pop(task_id, None)
+
+
+def snapshot() -> list[dict]:
+    """p50/p99 per (metric, name, skill)."""
+    with _lock:
+        items = list(_histograms.items())
+    return [
+        {
+            "metric": metric,
+            "name": label,
+            "skill": skill,
+            "count": hist.count,
+            "mean": hist.total / hist.count if hist.count else 0.0,
+            "p50": hist.quantile(0.5),
+            "p99": hist.quantile(0.99),
+        }
+        for (metric, label, skill), hist in sorted(items)
+    ]
+
+
+def prometheus_text() -> str:
+    lines = []
+    with _lock:
+        items = sorted(_histograms.items())
+    for metric in sorted({key[0] for key, _ in items}):
+        name = f"robot_{metric}_seconds"
+        label_key = "phase" if metric == "task_phase" else "span"
+        lines.append(f"# TYPE {name} histogram")
+        for (m, label, skill), hist in items:
+            if m != metric:
+                continue
+            labels = f'{label_key}="{label}",skill="{skill}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, hist.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.total}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+    with _lock:
+        gauges = sorted(_gauges.items())
+    for gauge in sorted({name for (name, _), _ in gauges}):
+        lines.append(f"# TYPE robot_{gauge} gauge")
+        for (name, labels), value in gauges:
+            if name == gauge:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"robot_{gauge}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1"):
+    # http.server is most of this module's import time and only the
+    # long-running processes serve metrics.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[TELEMETRY] Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
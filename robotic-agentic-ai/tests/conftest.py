@@ -0,0 +1,42 @@
+import json
+import os
+import weakref
+
+import pytest
+import redis.asyncio as aioredis
+
+import redis_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # Skill catalog and scene paths are relative to robotic-agentic-ai/.
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture
+def world_state():
+    with open(os.path.join(ROOT, "planner/world_state.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """In-memory Redis behind redis_config.get_client()."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    url = redis_config._url(None)
+    clients = {
+        (url, decode): fakeredis.FakeRedis(server=server, decode_responses=decode)
+        for decode in (False, True)
+    }
+    monkeypatch.setattr(redis_config, "_clients", clients)
+    monkeypatch.setattr(redis_config, "_async_clients", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(
+        aioredis.Redis,
+        "from_url",
+        staticmethod(lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server, **kwargs)),
+    )
+    return clients[(url, False)]
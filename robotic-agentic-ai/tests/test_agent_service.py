@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+
+import redis
+
+import redis_config
+from executor import codec
+from executor.redis_io import dispatcher
+from service import agent
+
+
+class StubPlanner:
+    def static_prefix(self):
+        return ""
+
+    def plan(self, task, world_state):
+        return []
+
+    def repair(self, *args, **kwargs):
+        return None
+
+
+def results(client):
+    return [codec.decode(fields) for _, fields in client.xrange(agent.RESULT_STREAM)]
+
+
+def run_service(service, until, timeout=5):
+    stop = threading.Event()
+    thread = threading.Thread(target=service.run, args=(stop,), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        thread.join(5)
+        dispatcher.stop()
+
+
+def test_malformed_instruction_is_rejected(fake_redis):
+    service = agent.AgentService(fake_redis, StubPlanner(), workers=2)
+    agent.ensure_group(fake_redis)
+    fake_redis.xadd(agent.INSTRUCTION_STREAM, {b"c": b"m1", b"d": b"\xc1"})
+    fake_redis.xadd(agent.INSTRUCTION_STREAM, codec.encode(agent.INSTRUCTION_STREAM, {}))
+
+    run_service(service, lambda: len(results(fake_redis)) >= 2)
+
+    statuses = [(r["status"], r["detail"].split(":")[0]) for r in results(fake_redis)]
+    assert statuses == [
+        (agent.REJECTED, "Malformed instruction"),
+        (agent.REJECTED, "Instruction has no task"),
+    ]
+    assert fake_redis.xpending(agent.INSTRUCTION_STREAM, agent.SERVICE_GROUP)["pending"] == 0
+
+
+def test_redis_errors_do_not_stop_the_service(fake_redis, monkeypatch):
+    monkeypatch.setattr(agent, "ERROR_BACKOFF_SEC", 0.01)
+    service = agent.AgentService(fake_redis, StubPlanner(), workers=2)
+    housekeeping = service.housekeeping
+    failures = []
+
+    def flaky_housekeeping():
+        if len(failures) < 2:
+            failures.append(1)
+            raise redis.ConnectionError("connection reset")
+        housekeeping()
+
+    monkeypatch.setattr(service, "housekeeping", flaky_housekeeping)
+    agent.submit_instruction(fake_redis, "")
+
+    run_service(service, lambda: results(fake_redis))
+
+    assert len(failures) == 2
+    assert [r["status"] for r in results(fake_redis)] == [agent.REJECTED]
+    # Every worker slot is free again.
+    assert service._acquire(0) == 2
+
+
+def test_url_reaches_every_client(fake_redis, monkeypatch):
+    url = "redis://redis.example:6380/2"
+    monkeypatch.setenv("REDIS_URL", redis_config.REDIS_URL)
+    monkeypatch.setattr(sys, "argv", ["agent", "--url", url, "--submit", "pick tube_1"])
+    submitted = []
+    monkeypatch.setattr(
+        agent, "submit_instruction", lambda client, *args, **kwargs: submitted.append(client)
+    )
+
+    agent.main()
+
+    assert os.environ["REDIS_URL"] == url
+    assert redis_config.get_client() is submitted[0]
+    assert submitted[0].connection_pool.connection_kwargs["port"] == 6380
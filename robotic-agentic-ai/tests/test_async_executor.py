@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import redis
+
+from executor import async_redis_io as aio
+from executor.async_graph import execute_plans
+from executor.redis_io import EVENT_STREAM
+from executor.test import TASK_GROUP, TASK_STREAM, DummyBridge
+from redis_config import create_group
+
+PLAN = [
+    {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}},
+    {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}},
+]
+
+
+def fast_sleep(sleep):
+    async def _sleep(seconds, *args):
+        await sleep(min(seconds, 0.01), *args)
+
+    return _sleep
+
+
+def test_execute_plans_twice_in_one_process(fake_redis):
+    create_group(TASK_STREAM, TASK_GROUP)
+    bridge = DummyBridge(fake_redis, exec_time=lambda skill: 0, fail_probability=0, verbose=False)
+    stop = threading.Event()
+    thread = threading.Thread(target=bridge.run, args=(stop, 50), daemon=True)
+    thread.start()
+    try:
+        # Each call runs on a new event loop.
+        for _ in range(2):
+            (final,) = execute_plans([PLAN])
+            assert final["outcome"] == "SUCCESS"
+    finally:
+        stop.set()
+        thread.join(5)
+    assert bridge.executed == 4
+    assert not aio._dispatchers
+
+
+def test_async_reader_survives_redis_errors(fake_redis, monkeypatch):
+    monkeypatch.setattr(aio.asyncio, "sleep", fast_sleep(asyncio.sleep))
+
+    async def scenario():
+        dispatcher = aio.get_dispatcher()
+        client = dispatcher.client
+        xread = client.xread
+        failures = []
+
+        async def flaky_xread(*args, **kwargs):
+            if len(failures) < 2:
+                failures.append(1)
+                raise redis.ResponseError("NOGROUP stream was deleted")
+            return await xread(*args, **kwargs)
+
+        client.xread = flaky_xread
+        fut = await dispatcher.expect("task-1")
+        await client.xadd(EVENT_STREAM, {"task_id": "task-1", "status": "SUCCESS"})
+        try:
+            return await asyncio.wait_for(fut, 5), len(failures)
+        finally:
+            await aio.shutdown()
+
+    event, failures = asyncio.run(scenario())
+    assert event["status"] == "SUCCESS" and failures == 2
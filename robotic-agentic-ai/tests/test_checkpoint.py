@@ -0,0 +1,128 @@
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from executor import codec, graph
+from executor.checkpoint import RedisCheckpointSaver
+from executor.graph import build_executor, resume_plan, run_config
+from executor.redis_io import TASK_STREAM, dispatcher
+from executor.state import new_exec_state
+
+PLAN = [
+    {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}},
+    {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}},
+]
+THREAD = {"configurable": {"thread_id": "plan-1", "checkpoint_ns": ""}}
+
+
+def checkpoint(checkpoint_id, values, versions):
+    c = empty_checkpoint()
+    c.update(id=checkpoint_id, channel_values=values, channel_versions=versions)
+    return c
+
+
+def save(saver, config, checkpoint_id, values, versions, new_versions=None):
+    c = checkpoint(checkpoint_id, values, versions)
+    return saver.put(config, c, {"step": 0}, new_versions or versions)
+
+
+def test_put_and_get_tuple_round_trip(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis)
+    config = save(saver, THREAD, "1", {"plan": PLAN, "step": 0}, {"plan": 1, "step": 1})
+
+    saved = saver.get_tuple(config)
+    assert saved.checkpoint["channel_values"] == {"plan": PLAN, "step": 0}
+    assert saved.metadata["step"] == 0
+    assert saved.parent_config is None
+    stale = {"configurable": {**config["configurable"], "checkpoint_id": "0"}}
+    assert saver.get_tuple(stale) is None
+
+
+def test_only_new_channel_versions_are_rewritten(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis)
+    first = save(saver, THREAD, "1", {"plan": PLAN, "step": 0}, {"plan": 1, "step": 1})
+    # Would be overwritten if put() rewrote every channel.
+    key = RedisCheckpointSaver._key("plan-1", "")
+    fake_redis.hset(key, "b:plan", saver._dumps(PLAN[:1]))
+
+    second = save(
+        saver, first, "2", {"plan": PLAN, "step": 1}, {"plan": 1, "step": 2}, {"step": 2}
+    )
+
+    saved = saver.get_tuple(second)
+    assert saved.checkpoint["channel_values"] == {"plan": PLAN[:1], "step": 1}
+    assert saved.parent_config["configurable"]["checkpoint_id"] == "1"
+
+
+def test_keys_expire(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis, ttl=60)
+    config = save(saver, THREAD, "1", {"step": 0}, {"step": 1})
+    saver.put_writes(config, [("step", 1)], "task-1")
+
+    for key in fake_redis.keys("executor.ckpt:*"):
+        assert 0 < fake_redis.ttl(key) <= 60
+
+
+def test_pending_writes_are_kept_until_the_checkpoint_advances(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis)
+    first = save(saver, THREAD, "1", {"step": 0}, {"step": 1})
+    saver.put_writes(first, [("step", 1), ("retries", 0)], "task-1")
+
+    assert saver.get_tuple(first).pending_writes == [
+        ("task-1", "step", 1),
+        ("task-1", "retries", 0),
+    ]
+
+    second = save(saver, first, "2", {"step": 1}, {"step": 2})
+    assert saver.get_tuple(second).pending_writes == []
+    assert fake_redis.keys("executor.ckpt:*:writes:*") == []
+
+
+def test_superseded_head_writes_are_deleted(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis)
+    first = save(saver, THREAD, "1", {"step": 0}, {"step": 1})
+    second = save(saver, first, "2", {"step": 1}, {"step": 2})
+    saver.put_writes(second, [("step", 2)], "task-2")
+
+    # A put from the older config replaces checkpoint 2, not its parent.
+    save(saver, first, "3", {"step": 1}, {"step": 3})
+    assert fake_redis.keys("executor.ckpt:*:writes:*") == []
+
+
+def test_list_yields_only_the_latest_checkpoint(fake_redis):
+    saver = RedisCheckpointSaver(fake_redis)
+    first = save(saver, THREAD, "1", {"step": 0}, {"step": 1})
+    save(saver, first, "2", {"step": 1}, {"step": 2})
+
+    assert [s.config["configurable"]["checkpoint_id"] for s in saver.list(THREAD)] == ["2"]
+    assert list(saver.list(THREAD, limit=0)) == []
+    assert list(saver.list(THREAD, filter={"step": 5})) == []
+    before = {"configurable": {"checkpoint_id": "2"}}
+    assert list(saver.list(THREAD, before=before)) == []
+
+
+def test_resume_plan_after_a_crash(fake_redis, monkeypatch):
+    outcomes = iter([(True, None), RuntimeError("executor killed")])
+
+    def crashing_wait(task_id, timeout):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(graph, "wait_for_outcome", crashing_wait)
+    executor = build_executor(checkpointer=RedisCheckpointSaver(fake_redis))
+    try:
+        with pytest.raises(RuntimeError):
+            executor.invoke(new_exec_state(PLAN, "plan-1"), run_config(len(PLAN), "plan-1"))
+
+        monkeypatch.setattr(graph, "wait_for_outcome", lambda task_id, timeout: (True, None))
+        final = resume_plan(executor, "plan-1")
+    finally:
+        # send_skill started the shared event reader on this test's Redis.
+        dispatcher.stop()
+
+    assert final["outcome"] == "SUCCESS"
+    assert final["step"] == len(PLAN)
+    tasks = [codec.decode(fields) for _, fields in fake_redis.xrange(TASK_STREAM)]
+    # Step 0 was acknowledged before the crash; step 1 was in flight.
+    assert [(t["seq"], t["epoch"]) for t in tasks] == [(0, 0), (1, 0), (1, 1)]
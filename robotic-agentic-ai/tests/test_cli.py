@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import cli
+from bench.import_budget import SAMPLE_PLAN
+
+
+def write_plan(tmp_path, plan):
+    path = tmp_path / "plan.json"
+    path.write_text(json.dumps(plan))
+    return str(path)
+
+
+def test_validate_accepts_a_valid_plan(tmp_path, capsys):
+    assert cli.main(["validate", write_plan(tmp_path, SAMPLE_PLAN)]) == 0
+    assert "1 steps OK" in capsys.readouterr().out
+
+
+def test_validate_rejects_unknown_objects(tmp_path, capsys):
+    plan = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_99"}}]
+    assert cli.main(["validate", write_plan(tmp_path, plan)]) == 1
+    assert "Unknown object 'tube_99'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "plan, error",
+    [
+        ({"a": 1}, "must be a JSON list"),
+        ("grasp_container", "must be a JSON list"),
+        ([SAMPLE_PLAN[0], ["grasp_container"]], "[Step 1] Step must be an object"),
+    ],
+)
+def test_validate_rejects_malformed_plans(tmp_path, capsys, plan, error):
+    assert cli.main(["validate", write_plan(tmp_path, plan)]) == 1
+    assert error in capsys.readouterr().err
+
+
+def test_validate_rejects_invalid_json(tmp_path):
+    path = tmp_path / "plan.json"
+    path.write_text("[{")
+    assert cli.main(["validate", str(path)]) == 1
+
+
+@pytest.mark.parametrize(
+    "plan, error",
+    [
+        ({"a": 1}, "must be a JSON list"),
+        ([{"skill_name": "teleport", "arguments": {}}], "Unknown skill: 'teleport'"),
+    ],
+)
+def test_execute_rejects_invalid_plans(tmp_path, capsys, plan, error):
+    assert cli.main(["execute", write_plan(tmp_path, plan)]) == 1
+    assert error in capsys.readouterr().err
+
+
+class StubPlanner:
+    def __init__(self, plan):
+        self.result = plan
+
+    def plan(self, task, world_state, use_cache=True):
+        return self.result
+
+
+def test_plan_rejects_invalid_model_output(monkeypatch, capsys):
+    from planner import planner
+
+    bad = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_99"}}]
+    monkeypatch.setattr(planner, "get_planner", lambda: StubPlanner(bad))
+    assert cli.main(["plan", "pick tube_99"]) == 1
+    assert "Unknown object 'tube_99'" in capsys.readouterr().err
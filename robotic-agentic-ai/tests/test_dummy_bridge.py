@@ -0,0 +1,114 @@
+import threading
+import time
+
+from executor import codec
+from executor import test as dummy
+from executor.redis_io import task_fields
+from executor.test import (
+    CONTROL_STREAM,
+    EVENT_STREAM,
+    PROGRESS_KEY,
+    TASK_GROUP,
+    TASK_STREAM,
+    DummyBridge,
+)
+from redis_config import create_group
+
+STEP = {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}
+
+
+def bridge(client, **kwargs):
+    return DummyBridge(
+        client, exec_time=lambda skill: 0, fail_probability=0, verbose=False, **kwargs
+    )
+
+
+def run_until(worker, until, timeout=5):
+    stop = threading.Event()
+    thread = threading.Thread(target=worker.run, args=(stop, 50), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        thread.join(5)
+
+
+def test_malformed_task_is_acked_and_skipped(fake_redis):
+    create_group(TASK_STREAM, TASK_GROUP)
+    fake_redis.xadd(TASK_STREAM, {b"c": b"m1", b"d": b"\xc1"})
+    fake_redis.xadd(TASK_STREAM, task_fields("task-ok", STEP))
+    worker = bridge(fake_redis)
+
+    run_until(worker, lambda: worker.executed >= 1)
+
+    assert worker.executed == 1
+    assert fake_redis.xpending(TASK_STREAM, TASK_GROUP)["pending"] == 0
+
+
+def test_malformed_control_entry_is_skipped(fake_redis):
+    worker = bridge(fake_redis)
+    fake_redis.xadd(CONTROL_STREAM, {b"c": b"z1", b"d": b"?"})
+    cancel = {"type": "cancel", "plan_id": "plan-1", "epoch": 2}
+    fake_redis.xadd(CONTROL_STREAM, codec.encode(CONTROL_STREAM, cancel))
+
+    worker.poll_control("0-0")
+    assert worker.min_epoch == {"plan-1": 2}
+
+
+def claim(client, consumer):
+    ((_, entries),) = client.xreadgroup(TASK_GROUP, consumer, {TASK_STREAM: ">"}, count=1)
+    ((msg_id, fields),) = entries
+    return msg_id, codec.decode(fields)
+
+
+def event_ids(client):
+    return [codec.decode(fields)["task_id"] for _, fields in client.xrange(EVENT_STREAM)]
+
+
+def test_bridges_keep_plan_steps_in_seq_order(fake_redis):
+    create_group(TASK_STREAM, TASK_GROUP)
+    fake_redis.zadd(PROGRESS_KEY, {"plan-1": 0})
+    fake_redis.xadd(TASK_STREAM, task_fields("task-1", STEP, "plan-1", 1))
+    fake_redis.xadd(TASK_STREAM, task_fields("task-2", STEP, "plan-1", 2))
+    first, second = bridge(fake_redis, consumer="b1"), bridge(fake_redis, consumer="b2")
+    step_1, step_2 = claim(fake_redis, "b1"), claim(fake_redis, "b2")
+
+    waiting = threading.Thread(target=second.handle, args=step_2)
+    waiting.start()
+    time.sleep(0.1)
+    assert event_ids(fake_redis) == []
+
+    first.handle(*step_1)
+    waiting.join(5)
+    assert event_ids(fake_redis) == ["task-1", "task-2"]
+    assert fake_redis.zscore(PROGRESS_KEY, "plan-1") == 2
+
+
+def test_out_of_turn_step_times_out(fake_redis, monkeypatch):
+    monkeypatch.setattr(dummy, "ORDER_TIMEOUT_SEC", 0.05)
+    create_group(TASK_STREAM, TASK_GROUP)
+    fake_redis.zadd(PROGRESS_KEY, {"plan-1": 0})
+    fake_redis.xadd(TASK_STREAM, task_fields("task-2", STEP, "plan-1", 2))
+
+    bridge(fake_redis).handle(*claim(fake_redis, "b1"))
+
+    ((_, fields),) = fake_redis.xrange(EVENT_STREAM)
+    assert codec.decode(fields)["reason"] == "ORDER_TIMEOUT"
+    assert fake_redis.xpending(TASK_STREAM, TASK_GROUP)["pending"] == 0
+
+
+def test_failed_step_cancels_the_epoch_on_other_bridges(fake_redis):
+    create_group(TASK_STREAM, TASK_GROUP)
+    failing = {**STEP, "skill_name": "fail"}
+    fake_redis.xadd(TASK_STREAM, task_fields("task-1", failing, "plan-1", 1))
+    fake_redis.xadd(TASK_STREAM, task_fields("task-2", STEP, "plan-1", 2))
+    step_1, step_2 = claim(fake_redis, "b1"), claim(fake_redis, "b2")
+
+    bridge(fake_redis, consumer="b1").handle(*step_1)
+    bridge(fake_redis, consumer="b2").handle(*step_2)
+
+    statuses = [codec.decode(fields)["status"] for _, fields in fake_redis.xrange(EVENT_STREAM)]
+    assert statuses == ["FAILED", "CANCELLED"]
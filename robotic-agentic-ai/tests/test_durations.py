@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+import redis
+
+from executor import durations
+from executor.durations import DurationModel
+
+STEP = {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}
+PLAN = [STEP, {"skill_name": "go_home", "arguments": {}}]
+
+
+@pytest.fixture
+def model(fake_redis):
+    samples = [("grasp_container", STEP["arguments"], 2.0 + i / 100) for i in range(40)]
+    DurationModel().record(samples)
+    return DurationModel()
+
+
+def test_async_estimates_match_sync(model):
+    sync = DurationModel()
+    assert asyncio.run(model.adeadline(STEP)) == sync.deadline(STEP)
+    assert asyncio.run(model.apredict_makespan(PLAN)) == sync.predict_makespan(PLAN)
+    assert sync.deadline(STEP) != durations.DEFAULT_TIMEOUT_SEC
+
+
+def test_async_deadline_is_served_from_cache(model, monkeypatch):
+    first = asyncio.run(model.adeadline(STEP))
+
+    class Offline:
+        def pipeline(self, transaction=True):
+            raise AssertionError("cached stats needed a round trip")
+
+    monkeypatch.setattr(DurationModel, "async_client", Offline())
+    assert asyncio.run(model.adeadline(STEP)) == first
+
+
+def test_apublish_eta(model):
+    eta = asyncio.run(model.apublish_eta("plan-1", PLAN, 1, "arm_1"))
+    assert model.plan_eta("plan-1") == eta
+    assert eta["remaining_s"] == durations.DEFAULT_DURATION_SEC
+    assert (eta["step"], eta["steps"], eta["robot_id"]) == (1, 2, "arm_1")
+
+
+def test_publish_eta_estimates_each_step_once(model, monkeypatch):
+    first = model.publish_eta("plan-1", PLAN, 0)
+    looked_up = []
+    monkeypatch.setattr(
+        model, "expected", lambda step: looked_up.append(step) or durations.DEFAULT_DURATION_SEC
+    )
+
+    assert model.publish_eta("plan-1", PLAN, 1)["remaining_s"] == durations.DEFAULT_DURATION_SEC
+    assert looked_up == []
+
+    grown = PLAN + [STEP]
+    second = model.publish_eta("plan-1", grown, 1)
+    assert looked_up == [STEP]
+    assert second["remaining_s"] == pytest.approx(2 * durations.DEFAULT_DURATION_SEC)
+    assert first["remaining_s"] > durations.DEFAULT_DURATION_SEC
+
+
+def test_publish_eta_is_best_effort(model, monkeypatch):
+    def down(*args, **kwargs):
+        raise redis.ConnectionError("redis is down")
+
+    monkeypatch.setattr(model.client, "hset", down)
+    assert model.publish_eta("plan-1", PLAN, 0) is None
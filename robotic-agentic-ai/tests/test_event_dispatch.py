@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+import redis
+
+from executor import codec, redis_io
+from executor.async_redis_io import AsyncEventDispatcher
+from executor.redis_io import EVENT_STREAM, EventDispatcher
+
+MALFORMED = [
+    {b"c": b"m1", b"d": b"\xc1"},
+    {b"c": b"j1", b"d": b"[1, 2]"},
+    {b"task_id": b"t", b"params": b"{"},
+]
+
+
+def add_event(client, task_id):
+    event = {"task_id": task_id, "status": "SUCCESS", "reason": ""}
+    client.xadd(EVENT_STREAM, codec.encode(EVENT_STREAM, event))
+
+
+@pytest.mark.parametrize("fields", MALFORMED)
+def test_decode_rejects_malformed_entries(fields):
+    with pytest.raises(ValueError):
+        codec.decode(fields)
+
+
+def test_dispatcher_skips_malformed_events(fake_redis):
+    dispatcher = EventDispatcher(fake_redis)
+    fut = dispatcher.expect("task-1")
+    for fields in MALFORMED:
+        fake_redis.xadd(EVENT_STREAM, fields)
+    add_event(fake_redis, "task-1")
+    try:
+        assert fut.result(timeout=5)["status"] == "SUCCESS"
+    finally:
+        dispatcher.stop()
+
+
+def test_async_dispatcher_skips_malformed_events(fake_redis):
+    async def scenario():
+        dispatcher = AsyncEventDispatcher()
+        fut = await dispatcher.expect("task-1")
+        for fields in MALFORMED:
+            fake_redis.xadd(EVENT_STREAM, fields)
+        add_event(fake_redis, "task-1")
+        try:
+            return await asyncio.wait_for(fut, 5)
+        finally:
+            await dispatcher.stop()
+
+    assert asyncio.run(scenario())["status"] == "SUCCESS"
+
+
+def test_dispatcher_thread_survives_redis_errors(fake_redis, monkeypatch):
+    monkeypatch.setattr(redis_io, "READER_BACKOFF_SEC", 0.01)
+    xread = fake_redis.xread
+    errors = [redis.TimeoutError("timed out"), redis.ResponseError("stream was deleted")]
+
+    def flaky_xread(*args, **kwargs):
+        if errors:
+            raise errors.pop(0)
+        return xread(*args, **kwargs)
+
+    monkeypatch.setattr(fake_redis, "xread", flaky_xread)
+    dispatcher = EventDispatcher(fake_redis)
+    fut = dispatcher.expect("task-1")
+    add_event(fake_redis, "task-1")
+    try:
+        assert fut.result(timeout=5)["status"] == "SUCCESS"
+        assert not errors and dispatcher._thread.is_alive()
+    finally:
+        dispatcher.stop()
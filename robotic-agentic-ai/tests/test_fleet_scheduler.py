@@ -0,0 +1,51 @@
+import pytest
+import redis
+
+from fleet import scheduler as fs
+from fleet.registry import RobotInfo
+
+PLAN = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}]
+
+
+class FlakyRegistry:
+    def __init__(self, failures):
+        self.failures = failures
+        self.reads = 0
+
+    def robots(self):
+        self.reads += 1
+        if self.failures is None or self.reads <= self.failures:
+            raise redis.ConnectionError("connection reset")
+        return [RobotInfo("arm_1", None, None, 1)]
+
+
+class StubExecutor:
+    def invoke(self, state, config):
+        return {**state, "outcome": "SUCCESS"}
+
+
+def scheduler(registry, fake_redis):
+    return fs.FleetScheduler(registry, StubExecutor(), client=fake_redis)
+
+
+def test_registry_errors_are_retried(fake_redis, monkeypatch):
+    monkeypatch.setattr(fs, "REGISTRY_RETRY_SEC", 0.01)
+    registry = FlakyRegistry(failures=3)
+    fleet = scheduler(registry, fake_redis)
+    try:
+        final = fleet.submit(PLAN).result(timeout=5)
+    finally:
+        fleet.stop()
+    assert final["outcome"] == "SUCCESS" and final["robot_id"] == "arm_1"
+    assert registry.reads > 3
+
+
+def test_queued_plans_fail_when_registry_stays_unreadable(fake_redis, monkeypatch):
+    monkeypatch.setattr(fs, "REGISTRY_RETRY_SEC", 0.01)
+    monkeypatch.setattr(fs, "PLACEMENT_TIMEOUT_SEC", 0.1)
+    fleet = scheduler(FlakyRegistry(failures=None), fake_redis)
+    try:
+        with pytest.raises(redis.ConnectionError):
+            fleet.submit(PLAN).result(timeout=5)
+    finally:
+        fleet.stop()
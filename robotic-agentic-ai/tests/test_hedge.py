@@ -0,0 +1,103 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from planner import hedge
+from planner.hedge import Backend, BackendStats, HedgedPlanner
+
+PLAN = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}]
+INVALID = [{"skill_name": "grasp_container", "arguments": {"container_id": "no_such_tube"}}]
+
+
+class FakeModel:
+    """Answers `content` after `delay` seconds; None never answers."""
+
+    def __init__(self, content, delay=0.0):
+        self.content = json.dumps(content) if not isinstance(content, str) else content
+        self.delay = delay
+        self.cancelled = False
+
+    async def ainvoke(self, messages):
+        try:
+            if self.delay is None:
+                await asyncio.Event().wait()
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return SimpleNamespace(content=self.content)
+
+
+def hedger(client=None, fanout=2, **models):
+    return HedgedPlanner(
+        [Backend(name, {"model": name}, model) for name, model in models.items()],
+        client,
+        fanout=fanout,
+    )
+
+
+def test_first_valid_plan_wins_and_losers_are_cancelled(world_state):
+    slow = FakeModel(PLAN, delay=None)
+    planner = hedger(fast=FakeModel(PLAN), slow=slow)
+
+    assert planner.plan([], world_state) == PLAN
+    assert slow.cancelled
+    stats = planner.summary()
+    assert (stats["fast"]["wins"], stats["fast"]["valid"]) == (1, 1)
+    assert (stats["slow"]["attempts"], stats["slow"]["valid"]) == (1, 0)
+
+
+def test_invalid_plans_do_not_win(world_state):
+    planner = hedger(fast=FakeModel(INVALID), slow=FakeModel(PLAN, delay=0.05))
+
+    assert planner.plan([], world_state) == PLAN
+    assert planner.summary()["fast"]["errors"] == 1
+
+
+def test_infeasible_only_wins_without_a_plan(world_state):
+    planner = hedger(fast=FakeModel([]), slow=FakeModel(PLAN, delay=0.05))
+    assert planner.plan([], world_state) == PLAN
+
+    planner = hedger(fast=FakeModel([]), broken=FakeModel("not json"))
+    assert planner.plan([], world_state) == []
+
+
+def test_no_valid_plan_raises(world_state):
+    planner = hedger(a=FakeModel("not json"), b=FakeModel(INVALID))
+    with pytest.raises(ValueError, match="No backend produced a valid plan"):
+        planner.plan([], world_state)
+
+
+def test_score_is_latency_per_valid_plan():
+    assert BackendStats().score() == 0.0
+    # (valid + 1) / (attempts + 2) = 0.5
+    assert BackendStats(attempts=8, valid=4, latency=2.0).score() == 4.0
+
+
+def test_choose_tries_cold_backends_then_best_scores(monkeypatch):
+    monkeypatch.setattr(hedge, "MIN_SAMPLES", 5)
+    planner = hedger(
+        fanout=2, slow=FakeModel(PLAN), fast=FakeModel(PLAN), cold=FakeModel(PLAN)
+    )
+    planner.stats["slow"] = BackendStats(attempts=10, valid=10, latency=9.0)
+    planner.stats["fast"] = BackendStats(attempts=10, valid=10, latency=1.0)
+    planner.stats["cold"] = BackendStats(attempts=1, valid=1, latency=20.0)
+    assert planner.choose() == ["cold", "fast"]
+
+    planner.stats["cold"] = BackendStats(attempts=10, valid=10, latency=20.0)
+    assert planner.choose() == ["fast", "slow"]
+
+
+def test_stats_are_shared_through_redis(fake_redis, world_state):
+    first = hedger(fake_redis, fast=FakeModel(PLAN), slow=FakeModel(PLAN, delay=None))
+    first.plan([], world_state)
+
+    second = hedger(fake_redis, fast=FakeModel(PLAN), slow=FakeModel(PLAN))
+    second.load_stats()
+    for name in ("fast", "slow"):
+        loaded, recorded = second.summary()[name], first.summary()[name]
+        assert loaded["attempts"] == recorded["attempts"] == 1
+        assert loaded["wins"] == recorded["wins"]
+        assert loaded["latency_s"] == pytest.approx(recorded["latency_s"])
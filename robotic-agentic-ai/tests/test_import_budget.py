@@ -0,0 +1,22 @@
+import pytest
+
+from bench.import_budget import CHECKS, import_times, run_check
+
+# Import time itself is too noisy to assert on here; the bench reports it.
+# These pin which modules each fast path loads instead.
+AVOIDED = {"inspect", "asyncio", "sqlite3"}
+
+
+@pytest.mark.parametrize("name", sorted(CHECKS))
+def test_fast_paths_avoid_heavy_modules(name):
+    code, stdin, budget_ms = CHECKS[name]
+    result = run_check(code, stdin, budget_ms)
+    assert result["exit_code"] == 0, result
+    assert result["heavy_modules"] == []
+
+
+@pytest.mark.parametrize("name", sorted(CHECKS))
+def test_fast_paths_avoid_stdlib_extras(name):
+    code, stdin, _ = CHECKS[name]
+    imports, _ = import_times(code, stdin)
+    assert AVOIDED.isdisjoint(module for module, _, _ in imports)
@@ -0,0 +1,52 @@
+import threading
+
+from executor import codec
+from executor.durations import duration_model
+from executor.graph import run_config
+from executor.parallel import build_parallel_executor, step_deadlines
+from executor.redis_io import dispatcher
+from executor.state import new_parallel_state
+from executor.test import TASK_GROUP, TASK_STREAM, DummyBridge
+from redis_config import create_group
+
+STEPS = [
+    {"skill_name": "grasp_container", "arguments": {"container_id": f"tube_{i}"}}
+    for i in range(3)
+]
+
+
+def test_step_deadlines_cover_the_steps_queued_ahead(monkeypatch):
+    monkeypatch.setattr(duration_model, "deadline", lambda step: 10.0)
+    monkeypatch.setattr(duration_model, "expected", lambda step: 4.0)
+    state = new_parallel_state(STEPS, [[], [], []])
+    state["in_flight"] = {"t0": 0, "t1": 1, "t2": 2}
+    state["sent_at"] = {"t0": 100.0, "t1": 100.0, "t2": 101.0}
+
+    assert step_deadlines(state) == {"t0": 110.0, "t1": 114.0, "t2": 119.0}
+
+
+def test_queued_independent_steps_do_not_time_out(fake_redis, monkeypatch):
+    # One bridge runs the three steps back to back; each alone fits its
+    # deadline, but the last one only starts after the other two.
+    monkeypatch.setattr(duration_model, "deadline", lambda step: 0.45)
+    monkeypatch.setattr(duration_model, "expected", lambda step: 0.3)
+    create_group(TASK_STREAM, TASK_GROUP)
+    bridge = DummyBridge(
+        fake_redis, exec_time=lambda skill: 0.3, fail_probability=0, verbose=False
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=bridge.run, args=(stop, 50), daemon=True)
+    thread.start()
+    state = new_parallel_state(STEPS, [[], [], []], plan_id="plan-1")
+    try:
+        final = build_parallel_executor().invoke(state, run_config(len(STEPS)))
+    finally:
+        stop.set()
+        thread.join(5)
+        dispatcher.stop()
+
+    assert final["status"] == ["DONE"] * 3
+    assert final["step_retries"] == [0, 0, 0]
+    assert bridge.executed == 3
+    tasks = [codec.decode(fields) for _, fields in fake_redis.xrange(TASK_STREAM)]
+    assert [task["plan_id"] for task in tasks] == ["plan-1"] * 3
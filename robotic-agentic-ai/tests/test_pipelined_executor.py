@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from executor import codec
+from executor.graph import build_executor, run_config
+from executor.redis_io import PROGRESS_KEY, dispatcher, send_window
+from executor.state import new_exec_state
+from executor.test import TASK_GROUP, TASK_STREAM, DummyBridge
+from redis_config import create_group
+
+GRASP = {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}
+RELEASE = {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}}
+FAIL = {"skill_name": "fail", "arguments": {}}
+
+
+class RecordingBridge(DummyBridge):
+    def __init__(self, client, consumer, started):
+        super().__init__(
+            client, consumer, exec_time=lambda skill: 0.02, fail_probability=0, verbose=False
+        )
+        self.started = started
+
+    def execute_fake_skill(self, task):
+        self.started.append((task["seq"], task["epoch"]))
+        return super().execute_fake_skill(task)
+
+
+@pytest.fixture
+def bridges(fake_redis):
+    """Two bridges in the group; yields the (seq, epoch) of every run step."""
+    create_group(TASK_STREAM, TASK_GROUP)
+    started = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=RecordingBridge(fake_redis, f"bridge_{i}", started).run,
+            args=(stop, 20),
+            daemon=True,
+        )
+        for i in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    yield started
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+    dispatcher.stop()
+
+
+def run(plan, window):
+    state = new_exec_state(plan, window=window)
+    return build_executor().invoke(state, run_config(len(plan)))
+
+
+def test_send_window_seeds_plan_progress(fake_redis):
+    send_window([(2, GRASP), (3, RELEASE)], "plan-1", epoch=1)
+    assert fake_redis.zscore(PROGRESS_KEY, "plan-1") == 1
+    # Steps 2 and 3 are still queued, so step 4 must not mark them done.
+    send_window([(4, GRASP)], "plan-1", epoch=1, done=1)
+    dispatcher.stop()
+
+    assert fake_redis.zscore(PROGRESS_KEY, "plan-1") == 1
+    tasks = [codec.decode(fields) for _, fields in fake_redis.xrange(TASK_STREAM)]
+    assert [(t["plan_id"], t["seq"], t["epoch"]) for t in tasks] == [
+        ("plan-1", 2, 1),
+        ("plan-1", 3, 1),
+        ("plan-1", 4, 1),
+    ]
+
+
+def test_window_runs_steps_in_seq_order_across_bridges(bridges):
+    plan = [GRASP, RELEASE] * 3
+
+    final = run(plan, window=3)
+
+    assert final["outcome"] == "SUCCESS"
+    assert bridges == [(seq, 0) for seq in range(len(plan))]
+
+
+def test_failure_cancels_the_queued_rest_of_the_epoch(bridges):
+    final = run([GRASP, FAIL, RELEASE], window=3)
+
+    assert final["outcome"] == "FAILED"
+    # release (seq 2) was queued behind the failure and never ran.
+    assert bridges == [(0, 0), (1, 0), (1, 1)]
@@ -0,0 +1,36 @@
+from planner.plan_cache import PlanCache
+
+PLAN = [{"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}]
+KEY = ("key", "catalog", "world")
+
+
+def fresh_plan():
+    return [{**step, "arguments": dict(step["arguments"])} for step in PLAN]
+
+
+def test_get_returns_a_copy():
+    cache = PlanCache()
+    cache.put(*KEY, fresh_plan())
+
+    plan = cache.get(*KEY)
+    plan[0]["arguments"]["container_id"] = "tube_2"
+    plan.append({"skill_name": "go_home", "arguments": {}})
+    assert cache.get(*KEY) == PLAN
+
+
+def test_put_keeps_its_own_copy():
+    cache = PlanCache()
+    plan = fresh_plan()
+    cache.put(*KEY, plan)
+    plan[0]["arguments"]["container_id"] = "tube_2"
+    assert cache.get(*KEY) == PLAN
+
+
+def test_redis_hits_are_copies(fake_redis):
+    cache = PlanCache(fake_redis)
+    cache.put(*KEY, fresh_plan())
+    # A fresh process only has the Redis level.
+    other = PlanCache(fake_redis)
+    other.get(*KEY)[0]["arguments"].clear()
+    assert other.get(*KEY) == PLAN
+    assert other.stats()["redis_hits"] == 1
@@ -0,0 +1,105 @@
+import json
+from types import SimpleNamespace
+
+from planner import planner as planner_module
+from planner.plan_cache import PlanCache
+from planner.planner import MODEL_PARAMS, Planner
+
+
+def offline_planner(**kwargs):
+    # Nothing listens on the discard port.
+    params = {**MODEL_PARAMS, "base_url": "http://127.0.0.1:9"}
+    return Planner(model_params=params, cache=None, **kwargs)
+
+
+def test_planner_starts_without_model_server():
+    offline_planner()
+
+
+def test_symbolic_plan_without_model_server(world_state):
+    plan = offline_planner().plan("pour tube_1 into beaker_2", world_state)
+    assert [step["skill_name"] for step in plan] == [
+        "grasp_container",
+        "pour_liquid",
+        "release_container",
+    ]
+
+
+class StreamingModel:
+    def __init__(self, plan):
+        self.text = json.dumps(plan)
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        for i in range(0, len(self.text), 7):
+            yield SimpleNamespace(content=self.text[i : i + 7])
+
+
+PLAN = [
+    {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}},
+    {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}},
+]
+
+
+def streaming_planner(plan):
+    planner = offline_planner(symbolic=False, project_prompts=False)
+    planner.cache = PlanCache()
+    planner.model = StreamingModel(plan)
+    return planner
+
+
+def test_plan_stream_caches_valid_plans(world_state):
+    planner = streaming_planner(PLAN)
+    assert list(planner.plan_stream("move tube_1", world_state)) == PLAN
+    assert list(planner.plan_stream("move tube_1", world_state)) == PLAN
+    assert planner.model.calls == 1
+
+
+def test_plan_stream_validates_whole_plan_before_caching(world_state, monkeypatch):
+    def reject(plan, world_state=None):
+        raise ValueError("plan does not hold together")
+
+    monkeypatch.setattr(planner_module, "check_skills_validity", reject)
+    planner = streaming_planner(PLAN)
+    assert list(planner.plan_stream("move tube_1", world_state)) == PLAN
+    assert planner.cache.stats()["size"] == 0
+
+
+class StubHedger:
+    cache_params = {"hedge": {"fast": {"model": "fast"}}}
+
+    def __init__(self, plan):
+        self.result = plan
+
+    def plan(self, messages, world_state):
+        return self.result
+
+
+def test_plan_stream_shares_the_hedged_cache_key(world_state):
+    hedged = PLAN[:1]
+    planner = streaming_planner(PLAN)
+    planner.hedger = StubHedger(hedged)
+
+    assert planner.plan("move tube_1", world_state) == hedged
+    assert list(planner.plan_stream("move tube_1", world_state)) == hedged
+    assert planner.model.calls == 0
+
+    # The streamed plan came from the primary model, not a hedged backend.
+    assert list(planner.plan_stream("move tube_1 again", world_state)) == PLAN
+    assert planner.cache.stats()["size"] == 1
+
+
+class InvokingModel:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def invoke(self, messages):
+        return SimpleNamespace(content=json.dumps(self.plan), usage_metadata=None)
+
+
+def test_model_plan_is_parsed(world_state, capsys):
+    planner = offline_planner(symbolic=False, project_prompts=False)
+    planner.model = InvokingModel(PLAN)
+    assert planner.plan("move tube_1", world_state) == PLAN
+    assert "grasp_container" not in capsys.readouterr().out
@@ -0,0 +1,39 @@
+from planner.projection import select_skills
+from verifier.skill_catalog import SkillCatalog, get_catalog
+
+SKILLS = """
+skills:
+  - name: stir
+    args: [container_id]
+    keywords: [stir, mix]
+    requires: [heat]
+  - name: heat
+    args: [container_id]
+    keywords: [heat]
+    requires: [grasp]
+  - name: grasp
+    args: [container_id]
+    keywords: [grasp]
+  - name: shake
+    args: [container_id]
+    keywords: [shake]
+  - name: go_home
+    args: []
+"""
+
+
+def test_requires_are_followed_transitively(tmp_path):
+    path = tmp_path / "skills.yaml"
+    path.write_text(SKILLS)
+    catalog = SkillCatalog(str(path))
+
+    # stir -> heat -> grasp, plus the argument-free glue skill.
+    assert select_skills("stir tube_1", catalog) == ["stir", "heat", "grasp", "go_home"]
+    assert select_skills("shake tube_1", catalog) == ["shake", "go_home"]
+    # Nothing matched: every skill stays.
+    assert select_skills("do something", catalog) == list(catalog.skills)
+
+
+def test_pour_keeps_the_skills_it_requires():
+    selected = select_skills("pour tube_1 into beaker_2", get_catalog())
+    assert {"pour_liquid", "grasp_container", "release_container"} <= set(selected)
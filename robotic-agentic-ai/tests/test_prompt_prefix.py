@@ -0,0 +1,40 @@
+from bench import prompt_prefix as pp
+from planner.planner import MODEL_PARAMS, Planner
+
+
+class RecordingModel:
+    def __init__(self):
+        self.prompts = []
+
+    def stream(self, messages):
+        self.prompts.append("".join(m.content for m in messages))
+        yield None
+
+
+def common_prefix(a: str, b: str) -> int:
+    n = 0
+    while n < min(len(a), len(b)) and a[n] == b[n]:
+        n += 1
+    return n
+
+
+def test_layouts_run_in_blocks_after_a_warm_up(world_state):
+    planner = Planner(model_params={**MODEL_PARAMS, "base_url": "http://127.0.0.1:9"}, cache=None)
+    planner.model = RecordingModel()
+    results = pp.run_layouts(planner, world_state, rounds=2)
+
+    per_block = 1 + 2 * len(pp.TASKS)
+    assert {layout: len(s) for layout, s in results.items()} == {
+        "stable_prefix": 2 * len(pp.TASKS),
+        "task_first": 2 * len(pp.TASKS),
+    }
+    prompts = planner.model.prompts
+    assert len(prompts) == 2 * per_block
+    stable, task_first = prompts[:per_block], prompts[per_block:]
+
+    static = planner.static_prefix()
+    assert all(p.startswith(static) for p in stable)
+    # Consecutive task_first requests share the "TASK:" header and at most
+    # a few letters of the task, never the world state or catalog.
+    for before, after in zip(task_first, task_first[1:]):
+        assert common_prefix(before, after) < len("TASK:\n") + 10
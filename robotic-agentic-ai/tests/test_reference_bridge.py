@@ -0,0 +1,82 @@
+import threading
+import time
+
+from bridge import reference_bridge as rb
+from executor import codec
+from executor.redis_io import task_fields
+
+STEP = {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}
+
+
+def test_held_entries_are_not_reclaimed(fake_redis, monkeypatch):
+    # Each task runs for longer than the claim idle time.
+    monkeypatch.setattr(rb, "CLAIM_IDLE_MS", 150)
+    monkeypatch.setattr(rb, "CLAIM_EVERY_SEC", 0.03)
+    rb.ensure_group(fake_redis)
+    for i in range(3):
+        fake_redis.xadd(rb.TASK_STREAM, task_fields(f"task-{i}", STEP))
+
+    calls = []
+
+    def slow(skill, params):
+        calls.append(skill)
+        time.sleep(0.25)
+        return True, None
+
+    owner = rb.BridgeWorker(fake_redis, "owner", slow)
+    other = rb.BridgeWorker(fake_redis, "other", slow)
+    stop = threading.Event()
+    thread = threading.Thread(target=owner.run, args=(stop,), daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while owner.executed < 3 and time.monotonic() < deadline:
+        other.reclaim()
+        time.sleep(0.02)
+    stop.set()
+    thread.join(5)
+
+    assert other.reclaimed == 0
+    assert len(calls) == 3
+    assert fake_redis.xpending(rb.TASK_STREAM, rb.TASK_GROUP)["pending"] == 0
+
+
+def test_malformed_task_is_acked_and_skipped(fake_redis):
+    rb.ensure_group(fake_redis)
+    fake_redis.xadd(rb.TASK_STREAM, {b"c": b"m1", b"d": b"\xc1"})
+    fake_redis.xadd(rb.TASK_STREAM, task_fields("task-ok", STEP))
+
+    calls = []
+
+    def handler(skill, params):
+        calls.append(skill)
+        return True, None
+
+    worker = rb.BridgeWorker(fake_redis, "owner", handler)
+    stop = threading.Event()
+    thread = threading.Thread(target=worker.run, args=(stop,), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while worker.executed < 1 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    stop.set()
+    thread.join(5)
+
+    assert calls == [STEP["skill_name"]]
+    assert fake_redis.xpending(rb.TASK_STREAM, rb.TASK_GROUP)["pending"] == 0
+
+
+def test_malformed_control_entry_is_skipped(fake_redis):
+    worker = rb.BridgeWorker(fake_redis, "owner", lambda skill, params: (True, None))
+    fake_redis.xadd(rb.CONTROL_STREAM, {b"c": b"z1", b"d": b"?"})
+    cancel = {"type": "cancel", "plan_id": "plan-1", "epoch": 2}
+    fake_redis.xadd(rb.CONTROL_STREAM, codec.encode(rb.CONTROL_STREAM, cancel))
+
+    worker.poll_control()
+    assert worker.min_epoch == {"plan-1": 2}
+
+
+def test_robot_slots_do_not_follow_worker_count():
+    bridge = rb.ReferenceBridge(workers=8, robot_id="arm_1")
+    assert bridge.robot.slots == 1
+    assert rb.ReferenceBridge(workers=8, robot_id="arm_1", slots=2).robot.slots == 2
@@ -0,0 +1,110 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from executor import graph
+from executor.graph import MAX_REPAIRS, build_executor, run_config
+from executor.state import new_exec_state
+from planner.planner import MODEL_PARAMS, Planner
+
+GRASP = {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}}
+RELEASE = {"skill_name": "release_container", "arguments": {"container_id": "tube_1"}}
+FAIL = {"skill_name": "fail", "arguments": {}}
+
+
+@pytest.fixture
+def robot(fake_redis, monkeypatch):
+    """Sent skills, by task id; the skill named "fail" always fails."""
+    sent = {}
+
+    def record(skill, *args):
+        task_id = str(uuid.uuid4())
+        sent[task_id] = skill
+        return task_id
+
+    def outcome(task_id, timeout):
+        if sent[task_id]["skill_name"] == "fail":
+            return False, "FORCED_FAILURE"
+        return True, None
+
+    monkeypatch.setattr(graph, "send_skill", record)
+    monkeypatch.setattr(graph, "wait_for_outcome", outcome)
+    return sent
+
+
+def run(plan, repairer, world_state):
+    state = new_exec_state(plan, task="move tube_1", world_state=world_state)
+    return build_executor(repairer=repairer).invoke(state, run_config(len(plan)))
+
+
+def test_repaired_suffix_replaces_the_failed_step(robot, world_state):
+    calls = []
+
+    def repairer(task, world, completed, failed, reason):
+        calls.append((completed, failed, reason))
+        assert world != world_state
+        return [RELEASE]
+
+    final = run([GRASP, FAIL, GRASP], repairer, world_state)
+
+    assert final["outcome"] == "SUCCESS"
+    assert final["plan"] == [GRASP, RELEASE]
+    assert final["repairs"] == 1
+    assert calls == [([GRASP], FAIL, "FORCED_FAILURE")]
+    # The completed prefix is not sent again.
+    assert [s["skill_name"] for s in robot.values()].count("grasp_container") == 1
+
+
+def test_repairs_stop_at_max_repairs(robot, world_state):
+    calls = []
+
+    def repairer(task, world, completed, failed, reason):
+        calls.append(failed)
+        return [FAIL]
+
+    final = run([GRASP, FAIL], repairer, world_state)
+
+    assert final["outcome"] == "FAILED"
+    assert len(calls) == MAX_REPAIRS
+
+
+def test_repairer_exception_aborts_the_plan(robot, world_state):
+    def repairer(*args):
+        raise RuntimeError("planner unreachable")
+
+    final = run([FAIL], repairer, world_state)
+
+    assert final["outcome"] == "FAILED"
+    assert final["error"] == "Plan repair failed: planner unreachable"
+
+
+class InvokingModel:
+    def __init__(self, content):
+        self.content = content
+
+    def invoke(self, messages):
+        return SimpleNamespace(content=self.content)
+
+
+def model_repairer(content):
+    # Nothing listens on the discard port.
+    params = {**MODEL_PARAMS, "base_url": "http://127.0.0.1:9"}
+    planner = Planner(model_params=params, cache=None, preload=False)
+    planner.model = InvokingModel(content)
+    return planner.repair
+
+
+@pytest.mark.parametrize(
+    "content, error",
+    [
+        ('[{"skill_name": "release_container", "arguments": {}}]', "Plan repair failed: "),
+        ("I could not find a plan.", "Repair response is not a plan"),
+        ('{"skill_name": "release_container"}', "Repair response is not a plan"),
+    ],
+)
+def test_invalid_repair_aborts_the_plan(robot, world_state, content, error):
+    final = run([GRASP, FAIL], model_repairer(content), world_state)
+
+    assert final["outcome"] == "FAILED"
+    assert error in final["error"]
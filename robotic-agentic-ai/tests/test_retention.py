@@ -0,0 +1,69 @@
+import argparse
+
+import pytest
+
+from executor import codec
+from retention import archiver
+from retention.replay import replay, run
+
+
+def add_tasks(client, stream, count, start=0):
+    for i in range(start, start + count):
+        client.xadd(stream, codec.encode(stream, {"task_id": f"task-{i}"}))
+
+
+def task_ids(client, stream):
+    return [codec.decode(fields)["task_id"] for _, fields in client.xrange(stream)]
+
+
+def test_repeated_passes_keep_max_len_entries(fake_redis, tmp_path):
+    policy = archiver.RetentionPolicy(max_len=10)
+    add_tasks(fake_redis, "robot.tasks", 25)
+    archiver.archive_once(fake_redis, policy, ["robot.tasks"], str(tmp_path))
+    assert task_ids(fake_redis, "robot.tasks") == [f"task-{i}" for i in range(15, 25)]
+
+    add_tasks(fake_redis, "robot.tasks", 5, start=25)
+    counts = archiver.archive_once(fake_redis, policy, ["robot.tasks"], str(tmp_path))
+    assert counts == {"robot.tasks": 5}
+    assert task_ids(fake_redis, "robot.tasks") == [f"task-{i}" for i in range(20, 30)]
+
+
+def test_per_robot_streams_are_archived(fake_redis, tmp_path):
+    add_tasks(fake_redis, "robot.tasks.arm_1", 4)
+    fake_redis.set("robot.tasks.not_a_stream", "x")
+    assert archiver.robot_streams(fake_redis) == [*archiver.STREAMS, "robot.tasks.arm_1"]
+
+    counts = archiver.archive_once(
+        fake_redis, archiver.RetentionPolicy(max_len=1), archive_dir=str(tmp_path)
+    )
+    assert counts["robot.tasks.arm_1"] == 3
+    assert task_ids(fake_redis, "robot.tasks.arm_1") == ["task-3"]
+
+
+@pytest.mark.parametrize("target", ["robot.tasks", "robot.events.arm_1", "robot.tasks.arm_2"])
+def test_replay_refuses_live_streams(target, tmp_path):
+    args = argparse.Namespace(target=target, archive_dir=str(tmp_path))
+    with pytest.raises(ValueError, match="live stream"):
+        run(args)
+
+
+def test_undecodable_entries_are_archived_raw(fake_redis, tmp_path):
+    add_tasks(fake_redis, "robot.tasks", 2)
+    bad = {b"c": b"m1", b"d": b"\xc1\xff"}
+    fake_redis.xadd("robot.tasks", bad)
+    add_tasks(fake_redis, "robot.tasks", 2, start=2)
+
+    counts = archiver.archive_once(
+        fake_redis, archiver.RetentionPolicy(max_len=0), ["robot.tasks"], str(tmp_path)
+    )
+    assert counts == {"robot.tasks": 5}
+    assert fake_redis.xlen("robot.tasks") == 0
+
+    db = archiver.open_index(str(tmp_path))
+    (path,) = db.execute("SELECT path FROM segments").fetchone()
+    entries = archiver.read_segment(path)
+    assert [e.get("msg", {}).get("task_id") for e in entries] == [
+        "task-0", "task-1", None, "task-2", "task-3"
+    ]
+    assert replay(fake_redis, iter(entries), "scratch.tasks") == 5
+    assert fake_redis.xrange("scratch.tasks")[2][1] == bad
@@ -0,0 +1,58 @@
+import os
+import shutil
+
+import pytest
+
+from verifier.skill_catalog import SKILLS_PATH, SkillCatalog
+from verifier.skill_validator import check_skills_validity
+
+
+@pytest.fixture
+def skills_file(tmp_path):
+    path = tmp_path / "skills.yaml"
+    shutil.copy(SKILLS_PATH, path)
+    return path
+
+
+def touch(path, seconds_later=1):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds_later * 10**9))
+
+
+def test_catalog_reloads_only_when_mtime_changes(skills_file):
+    catalog = SkillCatalog(str(skills_file))
+    assert "go_home" in catalog
+    first_hash = catalog.hash
+
+    assert catalog.refresh() is False
+
+    text = skills_file.read_text()
+    skills_file.write_text(text.replace("name: go_home", "name: go_rest"))
+    touch(skills_file)
+
+    assert catalog.refresh() is True
+    assert "go_home" not in catalog and "go_rest" in catalog
+    assert catalog.hash != first_hash
+    assert catalog.refresh() is False
+
+
+def test_validate_reports_every_error(world_state):
+    plan = [
+        {"skill_name": "grasp_container", "arguments": {"container_id": "tube_1"}},
+        {"skill_name": "teleport", "arguments": {}},
+        {"skill_name": "pour_liquid", "arguments": {"source_id": "tube_1", "speed": 2}},
+        {"skill_name": "release_container", "arguments": {"container_id": "tube_9"}},
+        {"skill_name": "go_home", "arguments": []},
+    ]
+
+    with pytest.raises(ValueError) as raised:
+        check_skills_validity(plan, world_state)
+
+    assert str(raised.value).splitlines() == [
+        "[Step 1] Unknown skill: 'teleport'",
+        "[Step 2] Missing argument 'target_id' for skill 'pour_liquid'",
+        "[Step 2] Unexpected argument 'speed' for skill 'pour_liquid'",
+        "[Step 3] Unknown object 'tube_9' for argument 'container_id' of skill "
+        "'release_container'",
+        "[Step 4] Arguments for skill 'go_home' must be an object",
+    ]
@@ -0,0 +1,53 @@
+from planner.symbolic import parse_goal, symbolic_plan
+from verifier.skill_catalog import world_object_ids
+
+
+def goal(task, world_state):
+    return parse_goal(task, world_state, world_object_ids(world_state))
+
+
+def pours(plan):
+    return [step["arguments"] for step in plan if step["skill_name"] == "pour_liquid"]
+
+
+def test_pour_into(world_state):
+    assert goal("pour tube_1 into beaker_2", world_state) == [[("poured", ("tube_1", "beaker_2"))]]
+
+
+def test_pour_into_from(world_state):
+    assert goal("pour into beaker_2 from tube_1", world_state) == [
+        [("poured", ("tube_1", "beaker_2"))]
+    ]
+
+
+def test_pour_without_prepositions_is_left_to_the_model(world_state):
+    assert goal("pour tube_1 beaker_2", world_state) is None
+    assert goal("pour from tube_1 from beaker_2", world_state) is None
+
+
+def test_symbolic_pour_direction(world_state):
+    world_state["containers"][1]["fill_percentage"] = 50
+    plan = symbolic_plan("pour into tube_2 from tube_1", world_state)
+    assert pours(plan) == [{"source_id": "tube_1", "target_id": "tube_2"}]
+
+
+def test_no_pour_into_full_container(world_state):
+    # beaker_1 is at 100%.
+    assert symbolic_plan("pour tube_1 into beaker_1", world_state) is None
+    assert pours(symbolic_plan("pour tube_1 into beaker_2", world_state)) == [
+        {"source_id": "tube_1", "target_id": "beaker_2"}
+    ]
+
+
+def test_put_it_into_destination_is_left_to_the_model(world_state):
+    task = "pick tube_1 and put it into beaker_2"
+    assert goal(task, world_state) is None
+    assert symbolic_plan(task, world_state) is None
+    assert goal("place into beaker_2", world_state) is None
+
+
+def test_pronoun_refers_to_previous_object(world_state):
+    assert goal("pick tube_1 and place it", world_state) == [
+        [("holding", ("tube_1",))],
+        [("placed", ("tube_1",))],
+    ]
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import telemetry
+
+
+@pytest.fixture
+def trace(tmp_path, monkeypatch):
+    """Spans recorded from here on, read back from the trace file."""
+    monkeypatch.setattr(telemetry, "_histograms", {})
+    monkeypatch.setattr(telemetry, "_sent", {})
+    path = tmp_path / "trace.jsonl"
+    telemetry.configure(str(path))
+
+    def records():
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield records
+    telemetry.configure(None)
+
+
+def phases(records):
+    return {r["name"]: r["seconds"] for r in records if r["metric"] == "task_phase"}
+
+
+def test_finished_task_is_split_into_phases(trace):
+    telemetry.task_sent("task-1", "grasp_container", b"1000-0", "plan-1")
+    telemetry.task_finished(
+        {"task_id": "task-1", "status": "SUCCESS", "started_ms": "1500"}, "4000-0"
+    )
+
+    split = phases(trace())
+    assert split.pop("deliver") > 0
+    assert split == {"queue": 0.5, "execute": 2.5, "total": 3.0}
+    assert {r["skill"] for r in trace()} == {"grasp_container"}
+    assert {r["plan_id"] for r in trace()} == {"plan-1"}
+
+
+def test_without_started_ms_only_total_and_deliver(trace):
+    telemetry.task_sent("task-1", "grasp_container", "1000-0")
+    telemetry.task_finished({"task_id": "task-1", "status": "CANCELLED"}, "1200-0")
+
+    assert set(phases(trace())) == {"total", "deliver"}
+
+
+def test_unknown_and_forgotten_tasks_are_not_recorded(trace):
+    telemetry.task_sent("task-1", "grasp_container", "1000-0")
+    telemetry.task_forgotten("task-1")
+    telemetry.task_finished({"task_id": "task-1", "status": "SUCCESS"}, "1200-0")
+    telemetry.task_finished({"task_id": "task-2", "status": "SUCCESS"}, "1200-0")
+
+    assert telemetry.snapshot() == []
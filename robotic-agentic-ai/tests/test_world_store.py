@@ -0,0 +1,88 @@
+import threading
+import time
+
+import redis
+
+from executor import codec
+from world import store as ws
+
+EVENT_STREAM = ws.EVENT_STREAM
+
+
+def add_event(client, skill, params):
+    event = {"task_id": "t", "status": "SUCCESS", "reason": "", "skill": skill, "params": params}
+    client.xadd(EVENT_STREAM, codec.encode(EVENT_STREAM, event))
+
+
+def follow_until(store, until, timeout=5):
+    stop = threading.Event()
+    thread = threading.Thread(target=store.follow, args=([EVENT_STREAM], stop), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while not until() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        thread.join(5)
+
+
+def held_object(store):
+    return store.snapshot().get("held_object")
+
+
+def test_follow_skips_malformed_events(fake_redis, world_state):
+    store = ws.WorldStore(fake_redis)
+    store.seed(world_state)
+    fake_redis.xadd(EVENT_STREAM, {b"c": b"m1", b"d": b"\xc1"})
+    add_event(fake_redis, "grasp_container", {"container_id": "tube_1"})
+
+    follow_until(store, lambda: held_object(store) == "tube_1")
+    assert held_object(store) == "tube_1"
+
+
+def test_follow_survives_redis_errors(fake_redis, world_state, monkeypatch):
+    store = ws.WorldStore(fake_redis)
+    store.seed(world_state)
+    add_event(fake_redis, "grasp_container", {"container_id": "tube_1"})
+    xread = fake_redis.xread
+    failures = []
+
+    def flaky_xread(*args, **kwargs):
+        if not failures:
+            failures.append(1)
+            raise redis.ConnectionError("connection reset")
+        return xread(*args, **kwargs)
+
+    monkeypatch.setattr(fake_redis, "xread", flaky_xread)
+    follow_until(store, lambda: held_object(store) == "tube_1")
+    assert failures and held_object(store) == "tube_1"
+
+
+def test_apply_retries_when_objects_change(fake_redis, world_state, monkeypatch):
+    store = ws.WorldStore(fake_redis)
+    store.seed(world_state)
+    pipeline = fake_redis.pipeline
+    removed = []
+
+    def racing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        zrange = pipe.zrange
+
+        def racing_zrange(*zargs, **zkwargs):
+            result = zrange(*zargs, **zkwargs)
+            if not removed:
+                # Another client drops tube_1 before the transaction runs.
+                removed.append(1)
+                fake_redis.zrem(ws.OBJECTS_KEY, "tube_1")
+            return result
+
+        pipe.zrange = racing_zrange
+        return pipe
+
+    monkeypatch.setattr(fake_redis, "pipeline", racing_pipeline)
+    assert store.apply("rotate_container", {"container_id": "tube_1"}) is not None
+
+    obj = fake_redis.hgetall(ws.OBJECT_PREFIX + "tube_1")
+    assert obj[ws.OBJECT_VERSION_FIELD.encode()] == b"0"
+    assert b"mixed" not in obj
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import re
+import threading
+from typing import Iterable, Optional
+
+import yaml
+
+from executor.state import SkillCall
+
+SKILLS_PATH = "planner/skills.yaml"
+# libyaml parses the catalog about ten times faster when it is available.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+LITERAL_RE = re.compile(r"^(!?)\s*([a-z_][a-z0-9_]*)\s*(?:\(([^)]*)\))?$")
+
+# (positive, predicate, argument names), e.g. "!holding(container_id)"
+# -> (False, "holding", ("container_id",))
+Literal = tuple[bool, str, tuple[str, ...]]
+
+
+def parse_literal(text: str) -> Literal:
+    match = LITERAL_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Malformed literal: '{text}'")
+    negated, predicate, args = match.groups()
+    arg_names = tuple(a.strip() for a in args.split(",")) if args else ()
+    return not negated, predicate, arg_names
+
+
+class CompiledSkill:
+    __slots__ = (
+        "name",
+        "args",
+        "arg_set",
+        "id_args",
+        "description",
+        "keywords",
+        "requires",
+        "resources",
+        "preconditions",
+        "effects",
+        "spec",
+    )
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.name: str = spec["name"]
+        self.args: tuple[str, ...] = tuple(spec.get("args") or ())
+        self.arg_set = frozenset(self.args)
+        # Arguments named *_id must reference an object in the world state.
+        self.id_args = frozenset(a for a in self.args if a.endswith("_id"))
+        self.description: str = spec.get("description", "")
+        self.keywords = frozenset(spec.get("keywords") or ())
+        self.requires: tuple[str, ...] = tuple(spec.get("requires") or ())
+        # None means "undeclared": the step is treated as exclusive.
+        resources = spec.get("resources")
+        self.resources = frozenset(resources) if resources is not None else None
+        # Symbolic model used by the fast-path planner; empty when undeclared.
+        self.preconditions = tuple(parse_literal(t) for t in spec.get("preconditions") or ())
+        self.effects = tuple(parse_literal(t) for t in spec.get("effects") or ())
+        for _, _, names in self.preconditions + self.effects:
+            for name in names:
+                if name not in self.arg_set:
+                    raise ValueError(f"Skill '{self.name}': unknown argument '{name}' in literal")
+
+    def prompt_spec(self) -> dict:
+        return {"name": self.name, "args": list(self.args), "description": self.description}
+
+
+def world_object_ids(world_state: dict) -> frozenset[str]:
+    ids = set()
+    for value in world_state.values():
+        if not isinstance(value, list):
+            continue
+        for obj in value:
+            if not isinstance(obj, dict):
+                continue
+            for key, v in obj.items():
+                if key.endswith("_id") and isinstance(v, str):
+                    ids.add(v)
+    return frozenset(ids)
+
+
+class SkillCatalog:
+    """
+    Parsed skills.yaml, compiled into per-skill argument sets. The file is
+    re-read only when its mtime changes.
+    """
+
+    def __init__(self, path: str = SKILLS_PATH):
+        self.path = path
+        self._mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()
+        self.raw: dict = {}
+        self.hash = ""
+        self.skills: dict[str, CompiledSkill] = {}
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Reload if the file changed on disk. Returns True when reloaded."""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return False
+
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return False
+            with open(self.path, "rb") as f:
+                data = f.read()
+            raw = yaml.load(data, Loader=YAML_LOADER)
+            self.skills = {spec["name"]: CompiledSkill(spec) for spec in raw["skills"]}
+            self.raw = raw
+            self.hash = hashlib.sha256(data).hexdigest()
+            self._mtime_ns = mtime_ns
+
+        print(f"[CATALOG] Loaded {len(self.skills)} skills from {self.path}")
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.skills
+
+    def get(self, name: str) -> Optional[CompiledSkill]:
+        return self.skills.get(name)
+
+    def prompt_skills(self, names: Optional[Iterable[str]] = None) -> dict:
+        """Catalog as shown to the planner, optionally limited to `names`."""
+        self.refresh()
+        keep = None if names is None else set(names)
+        return {
+            "skills": [
+                skill.prompt_spec()
+                for skill in self.skills.values()
+                if keep is None or skill.name in keep
+            ]
+        }
+
+    def step_errors(
+        self,
+        step_idx: int,
+        skill_call: SkillCall,
+        object_ids: Optional[frozenset[str]] = None,
+    ) -> list[str]:
+        name = skill_call.get("skill_name")
+        args = skill_call.get("arguments")
+
+        skill = self.skills.get(name)
+        if skill is None:
+            return [f"[Step {step_idx}] Unknown skill: '{name}'"]
+        if not isinstance(args, dict):
+            return [f"[Step {step_idx}] Arguments for skill '{name}' must be an object"]
+
+        errors = []
+
+        for param in skill.args:
+            if param not in args:
+                errors.append(
+                    f"[Step {step_idx}] Missing argument '{param}' for skill '{name}'"
+                )
+        for arg in args:
+            if arg not in skill.arg_set:
+                errors.append(
+                    f"[Step {step_idx}] Unexpected argument '{arg}' for skill '{name}'"
+                )
+
+        if object_ids is not None:
+            for arg in skill.id_args:
+                if arg in args and args[arg] not in object_ids:
+                    errors.append(
+                        f"[Step {step_idx}] Unknown object '{args[arg]}' "
+                        f"for argument '{arg}' of skill '{name}'"
+                    )
+
+        return errors
+
+    def validate(
+        self,
+        plan: Iterable[SkillCall],
+        world_state: Optional[dict] = None,
+        start: int = 0,
+    ) -> list[str]:
+        """Validate a whole plan in one pass and return every error found."""
+        self.refresh()
+        object_ids = world_object_ids(world_state) if world_state is not None else None
+
+        errors: list[str] = []
+        for step_idx, skill_call in enumerate(plan, start):
+            errors.extend(self.step_errors(step_idx, skill_call, object_ids))
+        return errors
+
+
+_catalogs: dict[str, SkillCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str = SKILLS_PATH) -> SkillCatalog:
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = _catalogs[path] = SkillCatalog(path)
+    return catalog
@@ -0,0 +1,446 @@
+"""
+Live world state in Redis, kept current from skill events.
+
+planner/world_state.json is only the seed. Each object is a hash
+world.obj:<id> whose fields hold JSON values, listed in order in the
+world.objects sorted set. Top-level entries such as gripper_state live in
+the world.scene hash. The follower reads robot.events (and the per-robot
+event streams of registered robots) and applies the declared effects of
+every successful skill. Each update bumps world.version and the changed
+objects' versions in one transaction, then publishes the change on
+world.changes.
+
+Run from robotic-agentic-ai/:
+    python -m world.store --seed planner/world_state.json --follow
+"""
+
+import argparse
+import copy
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+import redis
+
+from executor import codec
+from fleet.registry import RobotRegistry
+from redis_config import REDIS_URL, get_client
+from verifier.skill_catalog import CompiledSkill, SkillCatalog, get_catalog
+
+EVENT_STREAM = "robot.events"
+WORLD_STATE_PATH = "planner/world_state.json"
+OBJECTS_KEY = "world.objects"
+OBJECT_PREFIX = "world.obj:"
+SCENE_KEY = "world.scene"
+VERSION_KEY = "world.version"
+# Hash: event stream -> last applied entry id; "__seed" holds the seed time.
+CURSOR_KEY = "world.cursor"
+CHANGES_CHANNEL = "world.changes"
+
+# Reserved object fields, dropped from snapshots.
+COLLECTION_FIELD = "__collection"
+OBJECT_VERSION_FIELD = "__version"
+SEED_FIELD = "__seed"
+
+EVENT_BATCH = 256
+EVENT_BLOCK_MS = 1000
+
+# Predicate -> (fields when asserted, fields when negated). Object effects
+# change the object named by the first argument, scene effects the
+# top-level entries. None deletes a field and "$<n>" is the n-th argument.
+# Predicates not listed here (poured, placed) have no world-state field.
+OBJECT_EFFECTS = {
+    # The amount after a pour is unknown, so only the status is kept.
+    "filled": ({"status": "filled", "fill_percentage": None}, None),
+    "empty": ({"status": "empty", "fill_percentage": 0}, None),
+    "mixed": ({"mixed": True}, {"mixed": False}),
+    "verified": ({"color": "$1"}, None),
+}
+SCENE_EFFECTS = {
+    "holding": ({"held_object": "$0", "gripper_state": "closed"}, {"held_object": None}),
+    "gripper_empty": ({"gripper_state": "open", "held_object": None}, None),
+    "at_home": ({"arm_pose": "home"}, {"arm_pose": None}),
+}
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _bind(fields: dict, args: list) -> dict:
+    bound = {}
+    for key, value in fields.items():
+        if isinstance(value, str) and value.startswith("$"):
+            index = int(value[1:])
+            value = args[index] if index < len(args) else None
+        bound[key] = value
+    return bound
+
+
+def effect_changes(skill: CompiledSkill, params: dict) -> tuple[dict[str, dict], dict]:
+    """
+    Field changes ({object_id: {field: value}}, {field: value}) a successful
+    `skill` call makes; a value of None deletes the field.
+    """
+    objects: dict[str, dict] = {}
+    scene: dict = {}
+    for positive, predicate, names in skill.effects:
+        args = [params.get(n) for n in names]
+        if predicate in OBJECT_EFFECTS and args and isinstance(args[0], str):
+            fields = OBJECT_EFFECTS[predicate][0 if positive else 1]
+            if fields:
+                objects.setdefault(args[0], {}).update(_bind(fields, args))
+        elif predicate in SCENE_EFFECTS:
+            fields = SCENE_EFFECTS[predicate][0 if positive else 1]
+            if fields:
+                scene.update(_bind(fields, args))
+    return objects, scene
+
+
+def _merge(target: dict, fields: dict):
+    for key, value in fields.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = value
+
+
+def apply_steps(world_state: dict, steps: list, catalog: Optional[SkillCatalog] = None) -> dict:
+    """Copy of `world_state` after `steps` succeeded, from their declared effects."""
+    catalog = catalog or get_catalog()
+    world = copy.deepcopy(world_state)
+    objects = {}
+    for value in world.values():
+        if not isinstance(value, list):
+            continue
+        for obj in value:
+            if not isinstance(obj, dict):
+                continue
+            obj_id = next((v for k, v in obj.items() if k.endswith("_id")), None)
+            if isinstance(obj_id, str):
+                objects[obj_id] = obj
+    for step in steps:
+        skill = catalog.get(step["skill_name"])
+        if skill is None:
+            continue
+        changes, scene = effect_changes(skill, step["arguments"])
+        for obj_id, fields in changes.items():
+            if obj_id in objects:
+                _merge(objects[obj_id], fields)
+        _merge(world, scene)
+    return world
+
+
+def _write_fields(pipe, key: str, fields: dict):
+    present = {k: json.dumps(v) for k, v in fields.items() if v is not None}
+    deleted = [k for k, v in fields.items() if v is None]
+    if present:
+        pipe.hset(key, mapping=present)
+    if deleted:
+        pipe.hdel(key, *deleted)
+
+
+def _read_fields(raw: dict) -> dict:
+    fields = {_text(k): v for k, v in raw.items()}
+    return {k: json.loads(v) for k, v in fields.items() if not k.startswith("__")}
+
+
+def _read_object(raw: dict) -> tuple[str, dict]:
+    collection = next(json.loads(v) for k, v in raw.items() if _text(k) == COLLECTION_FIELD)
+    return collection, _read_fields(raw)
+
+
+class WorldStore:
+    """
+    Versioned world state shared through Redis.
+
+    snapshot() costs one GET while nothing has changed. With subscribe(),
+    change notifications mark the objects that changed, and only those are
+    fetched again.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, catalog: Optional[SkillCatalog] = None):
+        self.r = client or get_client()
+        self.catalog = catalog or get_catalog()
+
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._order: list[str] = []
+        self._objects: dict[str, tuple[str, dict]] = {}
+        self._scene: dict = {}
+        # Changes announced since the cached version; valid up to _notified.
+        self._notified: Optional[int] = None
+        self._dirty: set[str] = set()
+        self._dirty_scene = False
+        self._listeners: list[Callable[[dict], None]] = []
+        self._pubsub_thread = None
+
+    # ---- writes ----
+
+    def seed(self, world_state: dict) -> int:
+        """Replace the stored world with `world_state`; returns the new version."""
+        old = [_text(i) for i in self.r.zrange(OBJECTS_KEY, 0, -1)]
+        pipe = self.r.pipeline(transaction=True)
+        pipe.delete(OBJECTS_KEY, SCENE_KEY, CURSOR_KEY, *(OBJECT_PREFIX + i for i in old))
+
+        order = 0
+        scene = {}
+        for key, value in world_state.items():
+            if not isinstance(value, list) or not all(isinstance(o, dict) for o in value):
+                scene[key] = value
+                continue
+            for obj in value:
+                obj_id = next(
+                    (v for k, v in obj.items() if k.endswith("_id") and isinstance(v, str)),
+                    None,
+                )
+                if obj_id is None:
+                    raise ValueError(f"Object without an id in '{key}': {obj}")
+                pipe.zadd(OBJECTS_KEY, {obj_id: order})
+                pipe.hset(
+                    OBJECT_PREFIX + obj_id,
+                    mapping={
+                        **{k: json.dumps(v) for k, v in obj.items()},
+                        COLLECTION_FIELD: json.dumps(key),
+                        OBJECT_VERSION_FIELD: 0,
+                    },
+                )
+                order += 1
+        _write_fields(pipe, SCENE_KEY, scene)
+        # Events published before the seed are already reflected in it.
+        pipe.hset(CURSOR_KEY, SEED_FIELD, f"{int(time.time() * 1000)}-0")
+        pipe.incr(VERSION_KEY)
+        version = pipe.execute()[-1]
+
+        self.r.publish(CHANGES_CHANNEL, json.dumps({"version": version, "reset": True}))
+        print(f"[WORLD] Seeded {order} objects at version {version}")
+        return version
+
+    def apply(
+        self,
+        skill_name: str,
+        params: dict,
+        cursor: Optional[dict] = None,
+    ) -> Optional[int]:
+        """
+        Apply the effects of one successful skill call. `cursor` ({stream:
+        entry_id}) is committed in the same transaction. Returns the new
+        version, or None when nothing changed.
+        """
+        skill = self.catalog.get(skill_name)
+        effects, scene = effect_changes(skill, params) if skill is not None else ({}, {})
+
+        with self.r.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    objects = {}
+                    if effects:
+                        # Watched, so a seed between this read and EXEC makes
+                        # the transaction retry against the new objects.
+                        pipe.watch(OBJECTS_KEY)
+                        known = {_text(i) for i in pipe.zrange(OBJECTS_KEY, 0, -1)}
+                        objects = {k: v for k, v in effects.items() if k in known}
+
+                    pipe.multi()
+                    if cursor:
+                        pipe.hset(CURSOR_KEY, mapping=cursor)
+                    if not objects and not scene:
+                        if cursor:
+                            pipe.execute()
+                        return None
+
+                    for obj_id, fields in objects.items():
+                        _write_fields(pipe, OBJECT_PREFIX + obj_id, fields)
+                        pipe.hincrby(OBJECT_PREFIX + obj_id, OBJECT_VERSION_FIELD, 1)
+                    if scene:
+                        _write_fields(pipe, SCENE_KEY, scene)
+                    pipe.incr(VERSION_KEY)
+                    version = pipe.execute()[-1]
+                    break
+                except redis.WatchError:
+                    continue
+
+        change = {"version": version, "objects": sorted(objects), "scene": sorted(scene)}
+        self.r.publish(CHANGES_CHANNEL, json.dumps(change))
+        return version
+
+    # ---- reads ----
+
+    def version(self) -> int:
+        return int(self.r.get(VERSION_KEY) or 0)
+
+    def snapshot(self) -> dict:
+        """The current world state in world_state.json layout ({} if unseeded)."""
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                if self._notified == version and self._version is not None:
+                    self._refresh(version)
+                else:
+                    self._reload(version)
+            return self._build()
+
+    def _reload(self, version: int):
+        order = [_text(i) for i in self.r.zrange(OBJECTS_KEY, 0, -1)]
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hgetall(SCENE_KEY)
+        for obj_id in order:
+            pipe.hgetall(OBJECT_PREFIX + obj_id)
+        scene, *objects = pipe.execute()
+
+        self._order = order
+        self._objects = {obj_id: _read_object(raw) for obj_id, raw in zip(order, objects) if raw}
+        self._scene = _read_fields(scene)
+        self._mark_current(version)
+
+    def _refresh(self, version: int):
+        dirty = [i for i in self._dirty if i in self._objects]
+        pipe = self.r.pipeline(transaction=True)
+        if self._dirty_scene:
+            pipe.hgetall(SCENE_KEY)
+        for obj_id in dirty:
+            pipe.hgetall(OBJECT_PREFIX + obj_id)
+        results = pipe.execute()
+
+        if self._dirty_scene:
+            self._scene = _read_fields(results.pop(0))
+        for obj_id, raw in zip(dirty, results):
+            self._objects[obj_id] = (self._objects[obj_id][0], _read_fields(raw))
+        self._mark_current(version)
+
+    def _mark_current(self, version: int):
+        self._version = version
+        self._notified = version if self._pubsub_thread is not None else None
+        self._dirty = set()
+        self._dirty_scene = False
+
+    def _build(self) -> dict:
+        world: dict = {}
+        for obj_id in self._order:
+            if obj_id in self._objects:
+                collection, fields = self._objects[obj_id]
+                world.setdefault(collection, []).append(dict(fields))
+        world.update(self._scene)
+        return world
+
+    # ---- notifications ----
+
+    def subscribe(self, listener: Optional[Callable[[dict], None]] = None):
+        """
+        Follow world.changes so snapshot() refetches only changed objects;
+        `listener` is called with every change message.
+        """
+        if listener is not None:
+            self._listeners.append(listener)
+        if self._pubsub_thread is not None:
+            return
+        pubsub = self.r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANGES_CHANNEL: self._on_message})
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def unsubscribe(self):
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        with self._lock:
+            self._notified = None
+
+    def _on_message(self, message):
+        change = json.loads(message["data"])
+        with self._lock:
+            if change.get("reset"):
+                self._notified = None
+            elif self._notified is not None and change["version"] == self._notified + 1:
+                self._notified = change["version"]
+                self._dirty.update(change.get("objects", ()))
+                self._dirty_scene = self._dirty_scene or bool(change.get("scene"))
+            elif self._notified is not None and change["version"] > self._notified:
+                # Missed a change: the next snapshot reloads everything.
+                self._notified = None
+        for listener in self._listeners:
+            listener(change)
+
+    # ---- event follower ----
+
+    def event_streams(self) -> list[str]:
+        robots = RobotRegistry(self.r).robots(alive_only=False)
+        return [EVENT_STREAM] + [f"{EVENT_STREAM}.{robot.robot_id}" for robot in robots]
+
+    def follow(self, streams: Optional[list[str]] = None, stop: Optional[threading.Event] = None):
+        """Apply skill events to the stored world until `stop` is set."""
+        print("[WORLD] Following skill events")
+        while stop is None or not stop.is_set():
+            try:
+                self._follow_batch(streams)
+            except redis.RedisError as e:
+                print(f"[WORLD] Redis error while following events: {e}")
+                time.sleep(1)
+
+    def _follow_batch(self, streams: Optional[list[str]] = None):
+        cursors = {_text(k): _text(v) for k, v in self.r.hgetall(CURSOR_KEY).items()}
+        seed_id = cursors.pop(SEED_FIELD, "0-0")
+        watched = streams or self.event_streams()
+        resp = self.r.xread(
+            {s: cursors.get(s, seed_id) for s in watched},
+            count=EVENT_BATCH,
+            block=EVENT_BLOCK_MS,
+        )
+        for stream, entries in resp or []:
+            stream = _text(stream)
+            for entry_id, fields in entries:
+                cursor = {stream: _text(entry_id)}
+                try:
+                    event = codec.decode(fields)
+                except ValueError as e:
+                    print(f"[WORLD] Skipping malformed event {cursor[stream]} on {stream}: {e}")
+                    self.r.hset(CURSOR_KEY, mapping=cursor)
+                    continue
+                if event.get("status") == "SUCCESS" and event.get("skill"):
+                    version = self.apply(event["skill"], event.get("params") or {}, cursor)
+                    if version is not None:
+                        print(f"[WORLD] {event['skill']} -> version {version}")
+                else:
+                    self.r.hset(CURSOR_KEY, mapping=cursor)
+
+
+def load_world_state(live: bool = False, path: str = WORLD_STATE_PATH) -> dict:
+    """
+    The static scene file, or with `live` the world-state store, seeded from
+    that file the first time.
+    """
+    if live:
+        store = WorldStore()
+        world_state = store.snapshot()
+        if world_state:
+            return world_state
+    with open(path) as f:
+        world_state = json.load(f)
+    if live:
+        store.seed(world_state)
+    return world_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live world-state store")
+    parser.add_argument("--url", default=REDIS_URL)
+    parser.add_argument("--seed", default=None, help="world_state.json to load first")
+    parser.add_argument("--follow", action="store_true", help="apply skill events")
+    parser.add_argument("--stream", action="append", default=None, help="event stream to follow")
+    args = parser.parse_args()
+
+    store = WorldStore(get_client(url=args.url))
+    if args.seed:
+        with open(args.seed) as f:
+            store.seed(json.load(f))
+    if args.follow:
+        try:
+            store.follow(args.stream)
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(store.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()